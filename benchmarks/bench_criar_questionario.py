@@ -0,0 +1,137 @@
+"""
+Benchmark da criação de questionários.
+
+Compara `inserir_questionario` (inserts em lote com RETURNING) com o
+caminho antigo, que fazia um flush por questão para obter o seu id. No
+PostgreSQL o caminho em lote emite sempre três comandos, qualquer que
+seja o tamanho do questionário; o tempo cresce só com o volume de linhas.
+
+    python -m benchmarks.bench_criar_questionario
+    python -m benchmarks.bench_criar_questionario --database-url postgresql+psycopg://...
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from pesquisa.models import (
+    Opcao,
+    Questao,
+    Questionario,
+    table_registry,
+)
+from pesquisa.router_questionario import inserir_questionario
+from pesquisa.schemas import TIPOS_PERGUNTA, QuestionarioSchema
+
+
+def montar_questionario(perguntas: int, opcoes: int) -> QuestionarioSchema:
+    return QuestionarioSchema(
+        titulo='Benchmark',
+        descricao='Questionário gerado para benchmark',
+        perguntas=[
+            {
+                'texto': f'Pergunta {i}',
+                'tipo': 'select_multiple',
+                'opcoes': [{'texto': f'Opção {j}'} for j in range(opcoes)],
+                'limite_respostas': 3,
+            }
+            for i in range(perguntas)
+        ],
+    )
+
+
+def criar_legado(session: Session, dados: QuestionarioSchema) -> None:
+    """O caminho antigo: um flush por questão para obter o id."""
+    questionario = Questionario(
+        titulo=dados.titulo, descricao=dados.descricao, questoes=[]
+    )
+    session.add(questionario)
+    session.flush()
+    for pergunta in dados.perguntas:
+        questao = Questao(
+            texto=pergunta.texto,
+            tipo=TIPOS_PERGUNTA[pergunta.tipo],
+            questionario_id=questionario.id,
+            limite_respostas=pergunta.limite_respostas,
+            opcoes=[],
+        )
+        session.add(questao)
+        session.flush()
+        for opcao in pergunta.opcoes:
+            session.add(
+                Opcao(
+                    texto=opcao.texto, questao_id=questao.id, questao=questao
+                )
+            )
+
+
+def medir(engine, funcao, dados, repeticoes: int) -> dict:
+    comandos = 0
+
+    def contar(*args):
+        nonlocal comandos
+        comandos += 1
+
+    tempos = []
+    event.listen(engine, 'before_cursor_execute', contar)
+    try:
+        for _ in range(repeticoes):
+            comandos = 0
+            with Session(engine) as session:
+                inicio = time.perf_counter()
+                funcao(session, dados)
+                session.commit()
+                tempos.append(time.perf_counter() - inicio)
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+
+    return {
+        'mediana_ms': round(statistics.median(tempos) * 1000, 3),
+        'comandos': comandos,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url', default='sqlite://')
+    parser.add_argument(
+        '--perguntas', type=int, nargs='+', default=[5, 10, 25, 50, 100]
+    )
+    parser.add_argument('--opcoes', type=int, default=10)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    table_registry.metadata.create_all(engine)
+
+    repeticoes = args.repeticoes
+    resultados = []
+    for perguntas in args.perguntas:
+        dados = montar_questionario(perguntas, args.opcoes)
+        resultados.append({
+            'perguntas': perguntas,
+            'opcoes': perguntas * args.opcoes,
+            'lote': medir(engine, inserir_questionario, dados, repeticoes),
+            'legado': medir(engine, criar_legado, dados, repeticoes),
+        })
+
+    print(
+        f'{"perguntas":>9} {"opções":>7} {"lote ms":>9} {"cmds":>5}'
+        f' {"legado ms":>10} {"cmds":>5}'
+    )
+    for linha in resultados:
+        print(
+            f'{linha["perguntas"]:>9} {linha["opcoes"]:>7}'
+            f' {linha["lote"]["mediana_ms"]:>9} {linha["lote"]["comandos"]:>5}'
+            f' {linha["legado"]["mediana_ms"]:>10}'
+            f' {linha["legado"]["comandos"]:>5}'
+        )
+    print(json.dumps(resultados))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark da página pública de resposta (`GET /pesquisa/s/{id}`).
+
+Mede quantas páginas por segundo `paginas.obter` entrega para um
+questionário de `--perguntas` questões:
+
+- `frio_sem_templates`: caches de páginas e de templates vazios (o
+  template vem do bytecode em disco, como no primeiro acesso de um
+  worker novo);
+- `frio`: cache de páginas vazio, template já compilado (a cada nova
+  versão do questionário);
+- `quente`: página em cache; sobra a leitura da versão e a troca do
+  nonce.
+
+    python -m benchmarks.bench_pagina_publica
+    python -m benchmarks.bench_pagina_publica --perguntas 50 --database-url ...
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks import dados
+from benchmarks.comum import percentis, salvar_resultado
+from pesquisa import paginas, templating
+from pesquisa.models import table_registry
+
+
+def medir(funcao, repeticoes: int) -> list[float]:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url', default='sqlite://')
+    parser.add_argument('--perguntas', type=int, default=20)
+    parser.add_argument('--opcoes', type=int, default=5)
+    parser.add_argument('--repeticoes', type=int, default=500)
+    parser.add_argument('--saida', type=Path)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    table_registry.metadata.create_all(engine)
+    templating.compilar()
+
+    with Session(engine) as session:
+        (questionario_id,) = dados.semear(
+            session, 1, args.perguntas, args.opcoes, 0
+        )
+
+        def sem_templates():
+            templating.env.cache.clear()
+            paginas.cache.clear()
+            paginas.obter(session, questionario_id)
+
+        def frio():
+            paginas.cache.clear()
+            paginas.obter(session, questionario_id)
+
+        def quente():
+            pagina = paginas.obter(session, questionario_id)
+            pagina.com_nonce(templating.novo_nonce())
+
+        casos = {}
+        for nome, funcao in (
+            ('frio_sem_templates', sem_templates),
+            ('frio', frio),
+            ('quente', quente),
+        ):
+            funcao()
+            medidas = percentis(medir(funcao, args.repeticoes))
+            medidas['paginas_por_segundo'] = round(
+                1000 / medidas['media_ms'], 1
+            )
+            casos[nome] = medidas
+
+    resultado = {
+        'banco': engine.dialect.name,
+        'parametros': {
+            'perguntas': args.perguntas,
+            'opcoes': args.opcoes,
+            'repeticoes': args.repeticoes,
+        },
+        'tamanho_bytes': paginas.cache.bytes,
+        'casos': casos,
+    }
+
+    print(f'{"caso":<20} {"p50 ms":>9} {"p99 ms":>9} {"páginas/s":>10}')
+    for nome, medidas in casos.items():
+        print(
+            f'{nome:<20} {medidas["p50_ms"]:>9} {medidas["p99_ms"]:>9}'
+            f' {medidas["paginas_por_segundo"]:>10}'
+        )
+    caminho = salvar_resultado('pagina_publica', resultado, args.saida)
+    print(f'Resultado em {caminho}')
+    print(json.dumps(casos))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark da paginação: OFFSET + count() contra paginação por chave.
+
+Lista as respostas de um questionário (índice `(questionario_id, id)`)
+em páginas cada vez mais profundas. Com OFFSET o banco percorre e
+descarta todas as linhas anteriores, e o count() repetido em cada página
+percorre todas; com o cursor a página 10.000 custa o mesmo que a
+primeira.
+
+    python -m benchmarks.bench_paginacao
+    python -m benchmarks.bench_paginacao --database-url postgresql+psycopg://...
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from pesquisa.models import Questionario, RespostaQuestionario, table_registry
+from pesquisa.paginacao import codificar_cursor, paginar
+
+
+def preparar(session: Session, linhas: int) -> int:
+    """Garante um questionário com pelo menos `linhas` respostas."""
+    questionario_id = session.scalar(
+        select(RespostaQuestionario.questionario_id)
+        .group_by(RespostaQuestionario.questionario_id)
+        .having(func.count() >= linhas)
+        .limit(1)
+    )
+    if questionario_id is not None:
+        return questionario_id
+
+    questionario_id = session.scalar(
+        insert(Questionario)
+        .values(titulo='Benchmark', descricao='Paginação')
+        .returning(Questionario.id)
+    )
+    for inicio in range(0, linhas, 10_000):
+        session.execute(
+            insert(RespostaQuestionario),
+            [
+                {
+                    'nome': f'Pessoa {i}',
+                    'email': f'pessoa{i}@example.com',
+                    'questionario_id': questionario_id,
+                }
+                for i in range(inicio, min(linhas, inicio + 10_000))
+            ],
+        )
+    session.commit()
+    return questionario_id
+
+
+def pagina_offset(session: Session, questionario_id: int, pagina, tamanho):
+    filtro = RespostaQuestionario.questionario_id == questionario_id
+    rows = session.scalars(
+        select(RespostaQuestionario)
+        .where(filtro)
+        .order_by(RespostaQuestionario.id)
+        .offset((pagina - 1) * tamanho)
+        .limit(tamanho)
+    ).all()
+    total = session.scalar(
+        select(func.count()).select_from(
+            select(RespostaQuestionario).where(filtro).subquery()
+        )
+    )
+    return rows, total
+
+
+def pagina_cursor(session: Session, questionario_id: int, cursor, tamanho):
+    return paginar(
+        session,
+        select(RespostaQuestionario).where(
+            RespostaQuestionario.questionario_id == questionario_id
+        ),
+        (RespostaQuestionario.id,),
+        cursor=cursor,
+        limite=tamanho,
+    )
+
+
+def medir(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return round(statistics.median(tempos) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url', default='sqlite://')
+    parser.add_argument(
+        '--paginas', type=int, nargs='+', default=[1, 10, 100, 1000, 10_000]
+    )
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    table_registry.metadata.create_all(engine)
+    tamanho = args.page_size
+
+    resultados = []
+    with Session(engine) as session:
+        questionario_id = preparar(session, max(args.paginas) * tamanho)
+        for pagina in args.paginas:
+            # O cursor que o cliente teria recebido na página anterior
+            cursor = None
+            if pagina > 1:
+                anterior = session.scalar(
+                    select(RespostaQuestionario.id)
+                    .where(
+                        RespostaQuestionario.questionario_id == questionario_id
+                    )
+                    .order_by(RespostaQuestionario.id)
+                    .offset((pagina - 1) * tamanho - 1)
+                    .limit(1)
+                )
+                cursor = codificar_cursor([anterior])
+
+            offset_ms = medir(
+                lambda: pagina_offset(
+                    session, questionario_id, pagina, tamanho
+                ),
+                args.repeticoes,
+            )
+            cursor_ms = medir(
+                lambda: pagina_cursor(
+                    session, questionario_id, cursor, tamanho
+                ),
+                args.repeticoes,
+            )
+            a, _ = pagina_offset(session, questionario_id, pagina, tamanho)
+            b = pagina_cursor(session, questionario_id, cursor, tamanho).rows
+            assert [r.id for r in a] == [r.id for r in b]
+            resultados.append({
+                'pagina': pagina,
+                'offset_count_ms': offset_ms,
+                'cursor_ms': cursor_ms,
+            })
+
+    print(f'{"página":>8} {"offset+count ms":>16} {"cursor ms":>10}')
+    for linha in resultados:
+        print(
+            f'{linha["pagina"]:>8} {linha["offset_count_ms"]:>16}'
+            f' {linha["cursor_ms"]:>10}'
+        )
+    print(json.dumps(resultados))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark das verificações de papéis e permissões.
+
+Compara a verificação antiga, que percorria `user.roles` ->
+`role.permissions` a cada chamada, com a matriz de bits de
+`pesquisa.rbac`. O grafo é montado em memória (sem banco): o caminho
+antigo é medido sem o custo dos lazy loads, que só o tornaria mais lento.
+
+    python -m benchmarks.bench_rbac
+    python -m benchmarks.bench_rbac --papeis 1000 --permissoes 5000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from pesquisa.rbac import MatrizRBAC
+
+
+def verificar_legado(current_user, roles, permissions) -> bool:
+    """O corpo da verificação antiga, sem as exceções."""
+    if roles and not any(
+        role.role.name in roles for role in current_user.roles
+    ):
+        return False
+    if permissions:
+        user_permissions = {
+            perm.name
+            for role in current_user.roles
+            for perm in role.role.permissions
+        }
+        if not all(perm in user_permissions for perm in permissions):
+            return False
+    return True
+
+
+def verificar_matriz(matriz, papeis_usuario, exigidos) -> bool:
+    _, papeis_exigidos, permissoes_exigidas = exigidos
+    papeis, permissoes = matriz.usuario(papeis_usuario)
+    if papeis_exigidos and not papeis & papeis_exigidos:
+        return False
+    return permissoes & permissoes_exigidas == permissoes_exigidas
+
+
+def montar_grafo(papeis: int, permissoes: int, por_papel: int, semente: int):
+    aleatorio = random.Random(semente)
+    linhas_papeis = [(i, f'papel_{i}') for i in range(papeis)]
+    linhas_permissoes = [
+        (i, f'permissao_{i}', f'modulo_{i % 50}') for i in range(permissoes)
+    ]
+    ligacoes = [
+        (papel_id, permissao_id)
+        for papel_id, _ in linhas_papeis
+        for permissao_id in aleatorio.sample(range(permissoes), por_papel)
+    ]
+    return linhas_papeis, linhas_permissoes, ligacoes
+
+
+def medir(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main():  # noqa: PLR0914
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--papeis', type=int, default=1000)
+    parser.add_argument('--permissoes', type=int, default=5000)
+    parser.add_argument('--por-papel', type=int, default=200)
+    parser.add_argument('--papeis-usuario', type=int, default=5)
+    parser.add_argument('--exigidas', type=int, default=3)
+    parser.add_argument('--chamadas', type=int, default=10_000)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    papeis, permissoes, ligacoes = montar_grafo(
+        args.papeis, args.permissoes, args.por_papel, args.semente
+    )
+
+    inicio = time.perf_counter()
+    matriz = MatrizRBAC.construir(1, papeis, permissoes, ligacoes)
+    carga = time.perf_counter() - inicio
+
+    # O mesmo grafo como objetos, na forma que o caminho antigo percorria
+    objetos_permissao = {
+        i: SimpleNamespace(name=nome) for i, nome, _ in permissoes
+    }
+    objetos_papel = {
+        i: SimpleNamespace(name=nome, permissions=[]) for i, nome in papeis
+    }
+    for papel_id, permissao_id in ligacoes:
+        objetos_papel[papel_id].permissions.append(
+            objetos_permissao[permissao_id]
+        )
+
+    aleatorio = random.Random(args.semente)
+    escolhidos = aleatorio.sample(range(args.papeis), args.papeis_usuario)
+    usuario = SimpleNamespace(
+        roles=[SimpleNamespace(role=objetos_papel[i]) for i in escolhidos]
+    )
+    papeis_usuario = frozenset(objetos_papel[i].name for i in escolhidos)
+    roles = [objetos_papel[escolhidos[0]].name]
+    permissions = [
+        permissao.name
+        for permissao in objetos_papel[escolhidos[0]].permissions[
+            : args.exigidas
+        ]
+    ]
+    exigidos = (
+        matriz,
+        matriz.mascara_papeis(roles),
+        matriz.mascara_permissoes(permissions),
+    )
+    assert verificar_legado(usuario, roles, permissions)
+    assert verificar_matriz(matriz, papeis_usuario, exigidos)
+
+    chamadas = range(args.chamadas)
+    legado = medir(
+        lambda: [
+            verificar_legado(usuario, roles, permissions) for _ in chamadas
+        ],
+        5,
+    )
+    bits = medir(
+        lambda: [
+            verificar_matriz(matriz, papeis_usuario, exigidos)
+            for _ in chamadas
+        ],
+        5,
+    )
+
+    resultado = {
+        'papeis': args.papeis,
+        'permissoes': args.permissoes,
+        'ligacoes': len(ligacoes),
+        'carga_matriz_ms': round(carga * 1000, 3),
+        'legado_us': round(legado / args.chamadas * 1e6, 3),
+        'matriz_us': round(bits / args.chamadas * 1e6, 3),
+    }
+    print(f'carga da matriz: {resultado["carga_matriz_ms"]} ms')
+    print(f'legado: {resultado["legado_us"]} µs/verificação')
+    print(f'matriz: {resultado["matriz_us"]} µs/verificação')
+    print(json.dumps(resultado))
+
+
+if __name__ == '__main__':
+    main()
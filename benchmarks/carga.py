@@ -0,0 +1,200 @@
+"""
+Teste de carga do fluxo de respondentes.
+
+Usuários virtuais concorrentes repetem, durante `--duracao` segundos, o
+fluxo de quem responde um questionário: listar, abrir e responder (com
+pesos `--pesos`). Sem `--url` a aplicação roda em processo, pelo
+transporte ASGI do httpx, sobre o banco das Settings, e o relatório
+inclui os comandos SQL por requisição; com `--url` a carga vai para um
+servidor já no ar.
+
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.carga
+    python -m benchmarks.carga --concorrencia 50 --duracao 60
+    python -m benchmarks.carga --url http://localhost:8000 --questionario 1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from benchmarks import dados
+from benchmarks.comum import ContadorConsultas, percentis, salvar_resultado
+from benchmarks.micro import montar_respostas
+from pesquisa.app import app
+from pesquisa.database import async_engine, engine
+from pesquisa.models import Questionario, table_registry
+
+ERRO_HTTP = 400
+
+
+class Cenario:
+    """O fluxo de um respondente e as medidas acumuladas."""
+
+    def __init__(self, cliente, questionario_id: int, respostas: dict, pesos):
+        self.cliente = cliente
+        self.questionario_id = questionario_id
+        self.respostas = respostas
+        self.acoes = [self.listar, self.abrir, self.responder]
+        self.pesos = pesos
+        self.tempos = defaultdict(list)
+        self.erros = defaultdict(int)
+
+    async def listar(self):
+        return 'listar', await self.cliente.get(
+            '/pesquisa/questionarios/', params={'page_size': 10}
+        )
+
+    async def abrir(self):
+        return 'abrir', await self.cliente.get(
+            f'/pesquisa/questionarios/{self.questionario_id}'
+        )
+
+    async def responder(self):
+        return 'responder', await self.cliente.post(
+            f'/pesquisa/questionarios/{self.questionario_id}/respostas/',
+            params={'nome': 'Carga', 'email': 'carga@example.com'},
+            json=self.respostas,
+        )
+
+    async def usuario_virtual(self, fim: float, aleatorio: random.Random):
+        while time.perf_counter() < fim:
+            acao = aleatorio.choices(self.acoes, self.pesos)[0]
+            inicio = time.perf_counter()
+            try:
+                nome, resposta = await acao()
+                ok = resposta.status_code < ERRO_HTTP
+            except Exception:
+                nome, ok = acao.__name__, False
+            self.tempos[nome].append(time.perf_counter() - inicio)
+            if not ok:
+                self.erros[nome] += 1
+
+
+async def executar(args) -> dict:
+    contador = None
+    if args.url:
+        transporte = None
+        base_url = args.url
+        questionario_id = args.questionario
+        async with httpx.AsyncClient(base_url=base_url) as cliente:
+            resposta = await cliente.get(
+                f'/pesquisa/questionarios/{questionario_id}'
+            )
+            questionario = resposta.raise_for_status().json()
+        respostas = {
+            str(questao['id']): (
+                [str(questao['opcoes'][0]['id'])]
+                if questao['opcoes']
+                else ['Resposta de carga']
+            )
+            for questao in questionario['perguntas']
+        }
+    else:
+        table_registry.metadata.create_all(engine)
+        with Session(engine) as session:
+            if session.scalar(select(Questionario.id).limit(1)) is None:
+                dados.semear(session, 10, 10, 5, 200)
+            questionario_id = args.questionario or session.scalar(
+                select(Questionario.id).order_by(Questionario.id).limit(1)
+            )
+            respostas = montar_respostas(session, questionario_id)
+        transporte = httpx.ASGITransport(app=app)
+        base_url = 'http://carga'
+        contador = ContadorConsultas(engine, async_engine.sync_engine)
+
+    limites = httpx.Limits(max_connections=args.concorrencia)
+    async with httpx.AsyncClient(
+        transport=transporte, base_url=base_url, limits=limites, timeout=30
+    ) as cliente:
+        cenario = Cenario(cliente, questionario_id, respostas, args.pesos)
+        fim = time.perf_counter() + args.duracao
+        inicio = time.perf_counter()
+        usuarios = [
+            cenario.usuario_virtual(fim, random.Random(i))
+            for i in range(args.concorrencia)
+        ]
+        if contador:
+            with contador.ativo():
+                await asyncio.gather(*usuarios)
+        else:
+            await asyncio.gather(*usuarios)
+        decorrido = time.perf_counter() - inicio
+
+    requisicoes = sum(len(t) for t in cenario.tempos.values())
+    resultado = {
+        'alvo': args.url or 'asgi',
+        'parametros': {
+            'concorrencia': args.concorrencia,
+            'duracao': args.duracao,
+            'pesos': args.pesos,
+        },
+        'requisicoes': requisicoes,
+        'rps': round(requisicoes / decorrido, 1),
+        'erros': sum(cenario.erros.values()),
+        'total': percentis([
+            t for tempos in cenario.tempos.values() for t in tempos
+        ]),
+        'acoes': {
+            nome: {**percentis(tempos), 'erros': cenario.erros[nome]}
+            for nome, tempos in sorted(cenario.tempos.items())
+        },
+    }
+    if contador and requisicoes:
+        resultado['banco'] = engine.dialect.name
+        resultado['consultas_por_requisicao'] = round(
+            contador.total / requisicoes, 2
+        )
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='servidor já no ar (sem ASGI local)')
+    parser.add_argument('--questionario', type=int)
+    parser.add_argument('--concorrencia', type=int, default=20)
+    parser.add_argument('--duracao', type=float, default=15)
+    parser.add_argument(
+        '--pesos',
+        type=int,
+        nargs=3,
+        default=[1, 3, 6],
+        metavar=('LISTAR', 'ABRIR', 'RESPONDER'),
+    )
+    parser.add_argument('--saida', type=Path)
+    args = parser.parse_args()
+    if args.url and not args.questionario:
+        parser.error('--url exige --questionario')
+
+    resultado = asyncio.run(executar(args))
+
+    print(
+        f'{resultado["requisicoes"]} requisições, {resultado["rps"]} req/s,'
+        f' {resultado["erros"]} erros'
+    )
+    if 'consultas_por_requisicao' in resultado:
+        print(
+            f'{resultado["consultas_por_requisicao"]} consultas por requisição'
+        )
+    print(f'{"ação":<10} {"n":>7} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    for nome, medidas in [
+        *resultado['acoes'].items(),
+        ('total', resultado['total']),
+    ]:
+        print(
+            f'{nome:<10} {medidas["n"]:>7} {medidas["p50_ms"]:>9}'
+            f' {medidas["p95_ms"]:>9} {medidas["p99_ms"]:>9}'
+        )
+    print(f'Resultado em {salvar_resultado("carga", resultado, args.saida)}')
+    print(json.dumps(resultado['total']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Compara dois resultados de benchmark (de `micro` ou `carga`).
+
+Mostra a variação de cada métrica de latência e de consultas entre a
+execução base e a nova, e sai com código 1 se alguma piorou mais que
+`--limiar` por cento (para uso em CI).
+
+    python -m benchmarks.comparar base.json novo.json
+    python -m benchmarks.comparar base.json novo.json --limiar 15
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+METRICAS = ('p50_ms', 'p95_ms', 'p99_ms', 'consultas_por_chamada')
+
+
+def medidas(resultado: dict) -> dict[str, dict]:
+    """As medidas por caso, qualquer que seja o benchmark de origem."""
+    if 'casos' in resultado:
+        return resultado['casos']
+    casos = {**resultado.get('acoes', {}), 'total': resultado['total']}
+    if 'consultas_por_requisicao' in resultado:
+        casos['total'] = {
+            **casos['total'],
+            'consultas_por_chamada': resultado['consultas_por_requisicao'],
+        }
+    return casos
+
+
+def comparar(base: dict, novo: dict, limiar: float) -> list[dict]:
+    linhas = []
+    casos_base, casos_novo = medidas(base), medidas(novo)
+    for caso in casos_base.keys() & casos_novo.keys():
+        for metrica in METRICAS:
+            antes = casos_base[caso].get(metrica)
+            depois = casos_novo[caso].get(metrica)
+            if antes is None or depois is None:
+                continue
+            variacao = (depois - antes) / antes * 100 if antes else 0.0
+            linhas.append({
+                'caso': caso,
+                'metrica': metrica,
+                'base': antes,
+                'novo': depois,
+                'variacao': round(variacao, 1),
+                'regressao': variacao > limiar,
+            })
+    linhas.sort(key=lambda linha: (linha['caso'], linha['metrica']))
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('base', type=Path)
+    parser.add_argument('novo', type=Path)
+    parser.add_argument('--limiar', type=float, default=10)
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text())
+    novo = json.loads(args.novo.read_text())
+    linhas = comparar(base, novo, args.limiar)
+
+    print(f'{base.get("commit")} -> {novo.get("commit")}')
+    print(
+        f'{"caso":<26} {"métrica":<22} {"base":>10} {"novo":>10}'
+        f' {"variação":>9}'
+    )
+    for linha in linhas:
+        marca = '  <- regressão' if linha['regressao'] else ''
+        print(
+            f'{linha["caso"]:<26} {linha["metrica"]:<22}'
+            f' {linha["base"]:>10} {linha["novo"]:>10}'
+            f' {linha["variacao"]:>+8}%{marca}'
+        )
+    if any(linha['regressao'] for linha in linhas):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Utilitários compartilhados pelos scripts de benchmark."""
+
+import json
+import platform
+import statistics
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import event
+
+DIRETORIO_RESULTADOS = Path(__file__).parent / 'resultados'
+
+
+def percentis(tempos: list[float]) -> dict:
+    """p50/p95/p99 e média, em milissegundos, de tempos em segundos."""
+    if not tempos:
+        return {'n': 0}
+    ordenados = sorted(tempos)
+
+    def p(fracao):
+        indice = min(len(ordenados) - 1, int(len(ordenados) * fracao))
+        return round(ordenados[indice] * 1000, 3)
+
+    return {
+        'n': len(ordenados),
+        'media_ms': round(statistics.fmean(ordenados) * 1000, 3),
+        'p50_ms': p(0.50),
+        'p95_ms': p(0.95),
+        'p99_ms': p(0.99),
+        'max_ms': round(ordenados[-1] * 1000, 3),
+    }
+
+
+class ContadorConsultas:
+    """Conta os comandos enviados ao banco pelas engines da aplicação."""
+
+    def __init__(self, *engines):
+        self.engines = engines
+        self.total = 0
+
+    def _contar(self, *args):
+        self.total += 1
+
+    @contextmanager
+    def ativo(self):
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._contar)
+        try:
+            yield self
+        finally:
+            for engine in self.engines:
+                event.remove(engine, 'before_cursor_execute', self._contar)
+
+
+def commit_atual() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def salvar_resultado(
+    nome: str, dados: dict, saida: Path | None = None
+) -> Path:
+    """
+    Grava `dados` com os metadados da execução em
+    `benchmarks/resultados/<nome>-<commit>-<data>.json` (ou em `saida`),
+    para comparar execuções com `python -m benchmarks.comparar`.
+    """
+    commit = commit_atual()
+    agora = datetime.now()
+    if saida is None:
+        DIRETORIO_RESULTADOS.mkdir(exist_ok=True)
+        saida = DIRETORIO_RESULTADOS / (
+            f'{nome}-{commit or "sem-commit"}-'
+            f'{agora.strftime("%Y%m%dT%H%M%S")}.json'
+        )
+    saida.write_text(
+        json.dumps(
+            {
+                'benchmark': nome,
+                'commit': commit,
+                'data': agora.isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'maquina': platform.machine(),
+                **dados,
+            },
+            indent=2,
+            ensure_ascii=False,
+        )
+    )
+    return saida
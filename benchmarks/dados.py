@@ -0,0 +1,249 @@
+"""
+Gerador de dados para os benchmarks.
+
+Semeia N questionários × M questões × K opções × R respondentes por
+questionário, com uma resposta por questão por respondente, além de um
+usuário `benchmark` com um papel e algumas permissões (para os
+benchmarks de autenticação e RBAC). Os contadores de resultados são
+recalculados no fim.
+
+    python -m benchmarks.dados --database-url sqlite:////tmp/bench.sqlite
+    python -m benchmarks.dados -n 50 -m 20 -k 5 -r 2000 --database-url ...
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from pesquisa import resultados
+from pesquisa.hashing import pwd_context
+from pesquisa.models import (
+    Module,
+    Opcao,
+    Permission,
+    Questao,
+    Questionario,
+    RespostaQuestao,
+    RespostaQuestionario,
+    Role,
+    RolePermissions,
+    TipoQuestao,
+    User,
+    UserRoles,
+    table_registry,
+)
+
+USUARIO = 'benchmark'
+SENHA = 'benchmark'
+PAPEL = 'benchmark'
+PERMISSOES = ('ler', 'responder', 'exportar')
+LOTE = 5000
+
+
+def _proximo_id(session: Session, modelo) -> int:
+    return (session.scalar(select(func.max(modelo.id))) or 0) + 1
+
+
+def semear_usuario(session: Session) -> str:
+    """
+    Cria (uma vez) o usuário, o papel e as permissões de benchmark. Os ids
+    são explícitos porque as chaves BigInteger não são autoincrementais no
+    SQLite.
+    """
+    if session.scalar(select(User.id).where(User.username == USUARIO)):
+        return USUARIO
+
+    modulo_id = _proximo_id(session, Module)
+    session.execute(insert(Module).values(id=modulo_id, title='benchmark'))
+    papel_id = _proximo_id(session, Role)
+    session.execute(insert(Role).values(id=papel_id, name=PAPEL))
+    permissao_id = _proximo_id(session, Permission)
+    ligacao_id = _proximo_id(session, RolePermissions)
+    for i, nome in enumerate(PERMISSOES):
+        session.execute(
+            insert(Permission).values(
+                id=permissao_id + i, name=nome, module_id=modulo_id
+            )
+        )
+        session.execute(
+            insert(RolePermissions).values(
+                id=ligacao_id + i,
+                role_id=papel_id,
+                permission_id=permissao_id + i,
+            )
+        )
+
+    user_id = _proximo_id(session, User)
+    session.execute(
+        insert(User).values(
+            id=user_id,
+            username=USUARIO,
+            password=pwd_context.hash(SENHA),
+            email='benchmark@example.com',
+            full_name='Benchmark',
+            is_active=True,
+            is_staff=True,
+            is_superuser=False,
+            login_otp_used=False,
+        )
+    )
+    session.execute(
+        insert(UserRoles).values(
+            id=_proximo_id(session, UserRoles),
+            user_id=user_id,
+            role_id=papel_id,
+        )
+    )
+    session.commit()
+    return USUARIO
+
+
+def semear(  # noqa: PLR0913, PLR0914, PLR0917
+    session: Session,
+    questionarios: int,
+    questoes: int,
+    opcoes: int,
+    respondentes: int,
+    semente: int = 0,
+) -> list[int]:
+    """Semeia os questionários e as respostas; devolve os ids criados."""
+    aleatorio = random.Random(semente)
+    tipos = list(TipoQuestao)
+
+    ids_questionarios = []
+    for n in range(questionarios):
+        questionario_id = session.scalar(
+            insert(Questionario)
+            .values(titulo=f'Questionário {n}', descricao='Benchmark')
+            .returning(Questionario.id)
+        )
+        ids_questionarios.append(questionario_id)
+
+        definicoes = [
+            {
+                'texto': f'Questão {m}',
+                'tipo': tipos[m % len(tipos)],
+                'questionario_id': questionario_id,
+                'limite_respostas': (
+                    2
+                    if tipos[m % len(tipos)] == TipoQuestao.SELECT_MULTIPLE
+                    else None
+                ),
+            }
+            for m in range(questoes)
+        ]
+        ids_questoes = session.scalars(
+            insert(Questao).returning(
+                Questao.id, sort_by_parameter_order=True
+            ),
+            definicoes,
+        ).all()
+
+        opcoes_por_questao: dict[int, list[int]] = {}
+        com_opcoes = [
+            questao_id
+            for questao_id, definicao in zip(ids_questoes, definicoes)
+            if definicao['tipo'] != TipoQuestao.TEXT
+        ]
+        if com_opcoes:
+            linhas_opcoes = [
+                {'texto': f'Opção {k}', 'questao_id': questao_id}
+                for questao_id in com_opcoes
+                for k in range(opcoes)
+            ]
+            ids_opcoes = session.scalars(
+                insert(Opcao).returning(
+                    Opcao.id, sort_by_parameter_order=True
+                ),
+                linhas_opcoes,
+            ).all()
+            for linha, opcao_id in zip(linhas_opcoes, ids_opcoes):
+                opcoes_por_questao.setdefault(linha['questao_id'], []).append(
+                    opcao_id
+                )
+
+        for inicio in range(0, respondentes, LOTE):
+            quantidade = min(LOTE, respondentes - inicio)
+            ids_respostas = session.scalars(
+                insert(RespostaQuestionario).returning(
+                    RespostaQuestionario.id, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        'nome': f'Pessoa {inicio + r}',
+                        'email': f'pessoa{inicio + r}@example.com',
+                        'questionario_id': questionario_id,
+                    }
+                    for r in range(quantidade)
+                ],
+            ).all()
+
+            linhas = []
+            for resposta_id in ids_respostas:
+                for questao_id, definicao in zip(ids_questoes, definicoes):
+                    base = {
+                        'resposta_questionario_id': resposta_id,
+                        'questao_id': questao_id,
+                    }
+                    if definicao['tipo'] == TipoQuestao.TEXT:
+                        linhas.append({
+                            **base,
+                            'resposta_texto': f'Texto livre {resposta_id}',
+                            'opcao_id': None,
+                        })
+                        continue
+                    disponiveis = opcoes_por_questao.get(questao_id, [])
+                    escolhidas = aleatorio.sample(
+                        disponiveis,
+                        min(
+                            len(disponiveis),
+                            definicao['limite_respostas'] or 1,
+                        ),
+                    )
+                    linhas.extend(
+                        {**base, 'resposta_texto': None, 'opcao_id': opcao}
+                        for opcao in escolhidas
+                    )
+            if linhas:
+                session.execute(insert(RespostaQuestao), linhas)
+        session.commit()
+
+    resultados.reprocessar_todos(session)
+    return ids_questionarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url', required=True)
+    parser.add_argument('-n', '--questionarios', type=int, default=10)
+    parser.add_argument('-m', '--questoes', type=int, default=10)
+    parser.add_argument('-k', '--opcoes', type=int, default=5)
+    parser.add_argument('-r', '--respondentes', type=int, default=1000)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    table_registry.metadata.create_all(engine)
+    inicio = time.perf_counter()
+    with Session(engine) as session:
+        semear_usuario(session)
+        ids = semear(
+            session,
+            args.questionarios,
+            args.questoes,
+            args.opcoes,
+            args.respondentes,
+            args.semente,
+        )
+    print(
+        f'{len(ids)} questionários e '
+        f'{len(ids) * args.respondentes} respondentes semeados em '
+        f'{time.perf_counter() - inicio:.1f}s'
+    )
+
+
+if __name__ == '__main__':
+    main()
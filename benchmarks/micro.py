@@ -0,0 +1,204 @@
+"""
+Microbenchmarks dos caminhos quentes da API de questionários.
+
+Mede, contra o banco das Settings (`DATABASE_URL` e
+`DATABASE_URL_ASYNC`, SQLite ou PostgreSQL):
+
+- `criar_questionario` e `responder_questionario`, pela aplicação ASGI
+  em processo (httpx, sem rede), com o número de comandos SQL por
+  requisição;
+- `get_current_user` com o cache de usuários vazio e aquecido;
+- a dependência de `rbac.require` com a matriz já carregada.
+
+O banco é criado e semeado por `benchmarks.dados` se estiver vazio. O
+resultado vai para `benchmarks/resultados/` (ver `benchmarks.comparar`).
+
+    DATABASE_URL=sqlite:////tmp/bench.sqlite \\
+    DATABASE_URL_ASYNC=sqlite+aiosqlite:////tmp/bench.sqlite \\
+        python -m benchmarks.micro
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.micro
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from benchmarks import dados
+from benchmarks.comum import ContadorConsultas, percentis, salvar_resultado
+from pesquisa import rbac as modulo_rbac
+from pesquisa.app import app
+from pesquisa.database import async_engine, engine
+from pesquisa.models import Questao, Questionario, TipoQuestao, table_registry
+from pesquisa.security import (
+    create_access_token,
+    get_current_user,
+    usuarios_cache,
+)
+
+
+async def medir(funcao, repeticoes: int, aquecimento: int = 5):
+    """Tempos de `repeticoes` chamadas de `funcao` (síncrona ou não)."""
+    tempos = []
+    for i in range(aquecimento + repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        if asyncio.iscoroutine(resultado):
+            await resultado
+        if i >= aquecimento:
+            tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def questionario_json(perguntas: int, opcoes: int) -> dict:
+    tipos = ('texto', 'select_single', 'select_multiple')
+    return {
+        'titulo': 'Benchmark',
+        'descricao': 'Questionário gerado para benchmark',
+        'perguntas': [
+            {
+                'texto': f'Pergunta {i}',
+                'tipo': tipo,
+                'opcoes': (
+                    []
+                    if tipo == 'texto'
+                    else [{'texto': f'Opção {j}'} for j in range(opcoes)]
+                ),
+                'limite_respostas': 2 if tipo == 'select_multiple' else None,
+            }
+            for i, tipo in enumerate(
+                tipos[i % len(tipos)] for i in range(perguntas)
+            )
+        ],
+    }
+
+
+def montar_respostas(session: Session, questionario_id: int) -> dict:
+    """Uma submissão válida para o questionário: texto ou a 1ª opção."""
+    questoes = session.scalars(
+        select(Questao).where(Questao.questionario_id == questionario_id)
+    ).all()
+    return {
+        str(questao.id): (
+            ['Resposta de benchmark']
+            if questao.tipo == TipoQuestao.TEXT
+            else [str(questao.opcoes[0].id)]
+        )
+        for questao in questoes
+    }
+
+
+async def executar(args) -> dict:
+    table_registry.metadata.create_all(engine)
+    with Session(engine) as session:
+        dados.semear_usuario(session)
+        if session.scalar(select(Questionario.id).limit(1)) is None:
+            dados.semear(session, 5, args.perguntas, args.opcoes, 200)
+        questionario_id = session.scalar(
+            select(Questionario.id).order_by(Questionario.id).limit(1)
+        )
+        respostas = montar_respostas(session, questionario_id)
+
+    contador = ContadorConsultas(engine, async_engine.sync_engine)
+    casos = {}
+
+    async def caso(nome, funcao, repeticoes):
+        with contador.ativo():
+            antes = contador.total
+            tempos = await medir(funcao, repeticoes, aquecimento=0)
+            consultas = (contador.total - antes) / repeticoes
+        casos[nome] = {
+            **percentis(tempos),
+            'consultas_por_chamada': round(consultas, 2),
+        }
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transporte, base_url='http://bench'
+    ) as cliente:
+        corpo = questionario_json(args.perguntas, args.opcoes)
+
+        async def criar():
+            resposta = await cliente.post(
+                '/pesquisa/questionarios/', json=corpo
+            )
+            resposta.raise_for_status()
+
+        async def responder():
+            resposta = await cliente.post(
+                f'/pesquisa/questionarios/{questionario_id}/respostas/',
+                params={'nome': 'Bench', 'email': 'bench@example.com'},
+                json=respostas,
+            )
+            resposta.raise_for_status()
+
+        await medir(criar, 0, aquecimento=5)
+        await medir(responder, 0, aquecimento=5)
+        await caso('criar_questionario', criar, args.repeticoes)
+        await caso('responder_questionario', responder, args.repeticoes)
+
+    token = create_access_token({'sub': dados.USUARIO})
+    with Session(engine) as session:
+
+        async def usuario_frio():
+            usuarios_cache.clear()
+            await get_current_user(session=session, token=token)
+
+        async def usuario_quente():
+            await get_current_user(session=session, token=token)
+
+        await caso('get_current_user_frio', usuario_frio, args.repeticoes)
+        await caso('get_current_user_quente', usuario_quente, args.repeticoes)
+
+        usuario = await get_current_user(session=session, token=token)
+        verificar = modulo_rbac.require(
+            roles=[dados.PAPEL], permissions=dados.PERMISSOES[:2]
+        )
+        verificar(current_user=usuario, session=session)
+        await caso(
+            'rbac_require',
+            lambda: verificar(current_user=usuario, session=session),
+            args.repeticoes * 10,
+        )
+
+    return {
+        'banco': engine.dialect.name,
+        'parametros': {
+            'repeticoes': args.repeticoes,
+            'perguntas': args.perguntas,
+            'opcoes': args.opcoes,
+        },
+        'casos': casos,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticoes', type=int, default=200)
+    parser.add_argument('--perguntas', type=int, default=10)
+    parser.add_argument('--opcoes', type=int, default=5)
+    parser.add_argument('--saida', type=Path)
+    args = parser.parse_args()
+
+    resultado = asyncio.run(executar(args))
+
+    print(
+        f'{"caso":<26} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}'
+        f' {"consultas":>10}'
+    )
+    for nome, medidas in resultado['casos'].items():
+        print(
+            f'{nome:<26} {medidas["p50_ms"]:>9} {medidas["p95_ms"]:>9}'
+            f' {medidas["p99_ms"]:>9} {medidas["consultas_por_chamada"]:>10}'
+        )
+    print(f'Resultado em {salvar_resultado("micro", resultado, args.saida)}')
+    print(json.dumps(resultado['casos']))
+
+
+if __name__ == '__main__':
+    main()
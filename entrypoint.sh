@@ -3,5 +3,9 @@
 # Executa as migrações do banco de dados
 poetry run alembic upgrade head
 
-# Inicia a aplicação
-poetry run uvicorn --host 0.0.0.0 --port 8002 pesquisa.app:app
\ No newline at end of file
+# Estáticos com hash e pré-comprimidos (volume compartilhado com o nginx)
+poetry run pesquisa-admin estaticos
+
+# Inicia a aplicação: um mestre e SERVIDOR_WORKERS workers (servidor.py).
+# `exec` para o mestre receber o SIGTERM do `docker stop`
+exec poetry run pesquisa-admin servidor --host 0.0.0.0 --porta 8002
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""contabiliza respostas por linha
+
+Revision ID: a8d3e5c1f9b2
+Revises: f2a7c94d1b3e
+Create Date: 2026-10-18 19:12:44.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3e5c1f9b2'
+down_revision: Union[str, None] = 'f2a7c94d1b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('respostas_questionario', sa.Column('contabilizada', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # O que estava até a marca d'água já foi somado aos resultados
+    op.execute("""
+        UPDATE respostas_questionario SET contabilizada = true
+        WHERE id <= (
+            SELECT r.ultima_resposta_id FROM resultados_questionario r
+            WHERE r.questionario_id = respostas_questionario.questionario_id
+        )
+    """)
+    op.create_index('ix_respostas_questionario_pendentes', 'respostas_questionario', ['questionario_id'], unique=False, postgresql_where=sa.text('NOT contabilizada'), sqlite_where=sa.text('contabilizada = 0'))
+    with op.batch_alter_table('resultados_questionario') as batch_op:
+        batch_op.drop_column('ultima_resposta_id')
+
+
+def downgrade() -> None:
+    op.add_column('resultados_questionario', sa.Column('ultima_resposta_id', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE resultados_questionario SET ultima_resposta_id = coalesce((
+            SELECT max(q.id) FROM respostas_questionario q
+            WHERE q.questionario_id = resultados_questionario.questionario_id
+              AND q.contabilizada
+        ), 0)
+    """)
+    op.drop_index('ix_respostas_questionario_pendentes', table_name='respostas_questionario', postgresql_where=sa.text('NOT contabilizada'), sqlite_where=sa.text('contabilizada = 0'))
+    with op.batch_alter_table('respostas_questionario') as batch_op:
+        batch_op.drop_column('contabilizada')
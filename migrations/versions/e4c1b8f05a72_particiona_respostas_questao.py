@@ -0,0 +1,156 @@
+"""particiona respostas_questao por mes
+
+Revision ID: e4c1b8f05a72
+Revises: b3964703498d
+Create Date: 2026-10-18 16:21:44.902317
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c1b8f05a72'
+down_revision: Union[str, None] = 'b3964703498d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partições mensais criadas além da do mês atual (depois disso, o
+# `pesquisa-admin particoes criar` mantém a antecedência)
+MESES_ADIANTE = 3
+
+COLUNAS = 'id, resposta_questionario_id, questao_id, resposta_texto, opcao_id'
+
+INDICES = {
+    'ix_respostas_questao_resposta_questionario_id':
+        '(resposta_questionario_id)',
+    'ix_respostas_questao_questao_id_opcao_id': '(questao_id, opcao_id)',
+    'ix_respostas_questao_opcao_id': '(opcao_id)',
+}
+INDICE_TRIGRAMA = (
+    'ix_respostas_questao_resposta_texto_trgm',
+    'USING gin (resposta_texto gin_trgm_ops)',
+)
+
+
+def _criar_indices(tem_trgm: bool) -> None:
+    for nome, colunas in INDICES.items():
+        op.execute(f'CREATE INDEX {nome} ON respostas_questao {colunas}')
+    if tem_trgm:
+        nome, definicao = INDICE_TRIGRAMA
+        op.execute(f'CREATE INDEX {nome} ON respostas_questao {definicao}')
+
+
+def _remover_indices() -> None:
+    for nome in (*INDICES, INDICE_TRIGRAMA[0]):
+        op.execute(f'DROP INDEX IF EXISTS {nome}')
+
+
+def _tem_trgm() -> bool:
+    return bool(op.get_bind().scalar(sa.text(
+        "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+    )))
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        # O SQLite não aceita ADD COLUMN com default não constante
+        with op.batch_alter_table('respostas_questionario', recreate='always') as batch_op:
+            batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False))
+        with op.batch_alter_table('respostas_questao', recreate='always') as batch_op:
+            batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False))
+        op.execute(
+            'UPDATE respostas_questao SET created_at = ('
+            ' SELECT created_at FROM respostas_questionario'
+            ' WHERE respostas_questionario.id'
+            ' = respostas_questao.resposta_questionario_id)'
+        )
+        return
+
+    op.add_column('respostas_questionario', sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+
+    # A tabela atual sai do caminho; a sequência dos ids passa para a nova
+    op.execute('ALTER TABLE respostas_questao RENAME TO respostas_questao_antiga')
+    op.execute(
+        'ALTER TABLE respostas_questao_antiga '
+        'RENAME CONSTRAINT respostas_questao_pkey TO respostas_questao_antiga_pkey'
+    )
+    _remover_indices()
+    op.execute('ALTER SEQUENCE respostas_questao_id_seq OWNED BY NONE')
+
+    # A chave primária inclui a coluna da partição (exigência do PostgreSQL)
+    op.execute("""
+        CREATE TABLE respostas_questao (
+            id INTEGER NOT NULL DEFAULT nextval('respostas_questao_id_seq'),
+            resposta_questionario_id INTEGER NOT NULL
+                REFERENCES respostas_questionario (id),
+            questao_id INTEGER NOT NULL REFERENCES questoes (id),
+            resposta_texto TEXT,
+            opcao_id INTEGER REFERENCES opcoes (id),
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('ALTER SEQUENCE respostas_questao_id_seq OWNED BY respostas_questao.id')
+
+    op.execute('CREATE TABLE respostas_questao_padrao PARTITION OF respostas_questao DEFAULT')
+    # As submissões existentes receberam o created_at da migração: todas
+    # caem no mês atual
+    mes = date.today().replace(day=1)
+    for _ in range(MESES_ADIANTE + 1):
+        proximo = date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+        op.execute(
+            f'CREATE TABLE respostas_questao_p{mes:%Y_%m} '
+            f"PARTITION OF respostas_questao FOR VALUES FROM ('{mes}') TO ('{proximo}')"
+        )
+        mes = proximo
+
+    op.execute(f"""
+        INSERT INTO respostas_questao ({COLUNAS}, created_at)
+        SELECT {', '.join(f'a.{c}' for c in COLUNAS.split(', '))}, rq.created_at
+        FROM respostas_questao_antiga a
+        JOIN respostas_questionario rq ON rq.id = a.resposta_questionario_id
+    """)
+    op.execute('DROP TABLE respostas_questao_antiga')
+    # O índice de trigramas depende do pg_trgm (migração b3964703498d)
+    _criar_indices(_tem_trgm())
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('respostas_questao', recreate='always') as batch_op:
+            batch_op.drop_column('created_at')
+        with op.batch_alter_table('respostas_questionario', recreate='always') as batch_op:
+            batch_op.drop_column('created_at')
+        return
+
+    # Partições já desanexadas (arquivadas) não voltam
+    op.execute('ALTER TABLE respostas_questao RENAME TO respostas_questao_particionada')
+    op.execute(
+        'ALTER TABLE respostas_questao_particionada '
+        'RENAME CONSTRAINT respostas_questao_pkey TO respostas_questao_particionada_pkey'
+    )
+    _remover_indices()
+    op.execute('ALTER SEQUENCE respostas_questao_id_seq OWNED BY NONE')
+    op.execute("""
+        CREATE TABLE respostas_questao (
+            id INTEGER NOT NULL DEFAULT nextval('respostas_questao_id_seq'),
+            resposta_questionario_id INTEGER NOT NULL
+                REFERENCES respostas_questionario (id),
+            questao_id INTEGER NOT NULL REFERENCES questoes (id),
+            resposta_texto TEXT,
+            opcao_id INTEGER REFERENCES opcoes (id),
+            PRIMARY KEY (id)
+        )
+    """)
+    op.execute('ALTER SEQUENCE respostas_questao_id_seq OWNED BY respostas_questao.id')
+    op.execute(f"""
+        INSERT INTO respostas_questao ({COLUNAS})
+        SELECT {COLUNAS} FROM respostas_questao_particionada
+    """)
+    op.execute('DROP TABLE respostas_questao_particionada')
+    _criar_indices(_tem_trgm())
+    op.drop_column('respostas_questionario', 'created_at')
@@ -1,20 +1,99 @@
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+
 from fastapi import FastAPI, Request
-from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 
+from pesquisa import templating
+from pesquisa.carga import ControleCargaMiddleware
+from pesquisa.estaticos import EstaticosPrecomprimidos, GZipExcetoEstaticos
+from pesquisa.hashing import PoolOcupado, pool_hashing
+from pesquisa.ingestao import fila_ingestao
+from pesquisa.instrumentacao import InstrumentacaoMiddleware, metricas
+from pesquisa.limites import LimiteMiddleware
+from pesquisa.profiler import ProfilerMiddleware
+from pesquisa.router_admin import router as router_admin
+from pesquisa.router_auth import router as router_auth
+from pesquisa.router_busca import router as router_busca
 from pesquisa.router_questionario import router as router_quest
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compila os templates antes da primeira requisição
+    templating.compilar()
+    if settings.INGESTAO_ASSINCRONA:
+        await fila_ingestao.iniciar()
+    yield
+    # Desligamento gracioso: grava o que ainda está na fila
+    await fila_ingestao.parar(timeout=settings.INGESTAO_TIMEOUT_DRENAGEM)
+    pool_hashing.parar()
 
-app = FastAPI()
-app.mount("/static", StaticFiles(directory="pesquisa/static"), name="static")
-app.add_middleware(GZipMiddleware)
 
-templates = Jinja2Templates(directory='pesquisa/templates')
+app = FastAPI(lifespan=lifespan)
+app.mount(
+    "/static",
+    EstaticosPrecomprimidos(directory="pesquisa/static"),
+    name="static",
+)
+app.add_middleware(GZipExcetoEstaticos)
+# O último adicionado roda primeiro: o limite de taxa recusa antes de a
+# requisição contar como em andamento no controle de carga
+app.add_middleware(ControleCargaMiddleware)
+if settings.LIMITE_HABILITADO:
+    app.add_middleware(LimiteMiddleware)
+app.add_middleware(InstrumentacaoMiddleware)
 
 
+app.include_router(router_auth)
+app.include_router(router_busca)
 app.include_router(router_quest)
 
+# Opt-in: desligado, nem a rota nem o middleware existem
+if settings.PROFILING_HABILITADO:
+    app.include_router(router_admin)
+    app.add_middleware(ProfilerMiddleware)
+
+
+@app.exception_handler(PoolOcupado)
+async def pool_hashing_ocupado(request: Request, exc: PoolOcupado):
+    return JSONResponse(
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        content={'detail': 'Too many authentication requests'},
+        headers={'Retry-After': '1'},
+    )
+
+
+@app.get('/metricas/hashing')
+def metricas_hashing():
+    return pool_hashing.metricas()
+
+
+@metricas.coletor
+def _metricas_hashing():
+    dados = pool_hashing.metricas()
+    for nome, tipo in (
+        ('em_andamento', 'gauge'),
+        ('fila', 'gauge'),
+        ('operacoes', 'counter'),
+        ('rejeitadas', 'counter'),
+    ):
+        sufixo = '_total' if tipo == 'counter' else ''
+        yield f'# TYPE pesquisa_hashing_{nome}{sufixo} {tipo}'
+        yield f'pesquisa_hashing_{nome}{sufixo} {dados[nome]}'
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def metrics():
+    """Métricas deste processo no formato texto do Prometheus."""
+    return PlainTextResponse(
+        metricas.renderizar(), media_type='text/plain; version=0.0.4'
+    )
+
+
 @app.get('/test')
 def read_root():
     return {'message': 'Olá Mundo!'}
@@ -22,4 +101,6 @@ def read_root():
 
 @app.get('/', response_class=HTMLResponse)
 async def index(request: Request):
-    return templates.TemplateResponse('base.html', {'request': request})
+    return templating.templates.TemplateResponse(
+        'base.html', {'request': request}
+    )
@@ -0,0 +1,190 @@
+"""
+Busca por trecho de texto em usernames, títulos de questionários e
+respostas abertas.
+
+No PostgreSQL a busca usa `ILIKE '%termo%'`, atendido pelos índices GIN
+de trigramas (pg_trgm), e ordena por `similarity()`. Em outros bancos
+(SQLite nos testes) um índice de trigramas em memória faz o mesmo papel,
+com a mesma medida de similaridade; ele é reconstruído quando o número
+de linhas ou o maior id da tabela mudam.
+"""
+
+import time
+from dataclasses import dataclass
+from threading import Lock
+
+from sqlalchemy import Float, func, select
+from sqlalchemy.orm import Session
+
+from pesquisa.models import (
+    Questionario,
+    RespostaQuestao,
+    RespostaQuestionario,
+    User,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Alvo:
+    modelo: type
+    coluna: object
+
+
+ALVOS = {
+    'usuarios': Alvo(User, User.username),
+    'questionarios': Alvo(Questionario, Questionario.titulo),
+    'respostas': Alvo(RespostaQuestao, RespostaQuestao.resposta_texto),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Resultado:
+    id: int
+    texto: str
+    score: float
+
+
+def trigramas(texto: str) -> set[str]:
+    """Os trigramas de cada palavra, como o pg_trgm os extrai."""
+    resultado = set()
+    for palavra in texto.casefold().split():
+        cercada = f'  {palavra} '
+        resultado.update(cercada[i : i + 3] for i in range(len(cercada) - 2))
+    return resultado
+
+
+def similaridade(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _escapar_like(termo: str) -> str:
+    return termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class IndiceNgram:
+    """Índice invertido de trigramas de uma coluna, em memória."""
+
+    def __init__(self):
+        self.assinatura = None
+        self.textos: dict[int, str] = {}
+        self.postings: dict[str, set[int]] = {}
+
+    def reconstruir(self, linhas, assinatura) -> None:
+        textos, postings = {}, {}
+        for id_, texto in linhas:
+            if texto is None:
+                continue
+            textos[id_] = texto
+            for trigrama in trigramas(texto):
+                postings.setdefault(trigrama, set()).add(id_)
+        self.textos, self.postings = textos, postings
+        self.assinatura = assinatura
+
+    def buscar(
+        self, termo: str, limite: int, ids: set[int] | None = None
+    ) -> list[Resultado]:
+        alvo = trigramas(termo)
+        # Candidatos: linhas com todos os trigramas do termo (se houver)
+        candidatos = None
+        for trigrama in sorted(
+            alvo, key=lambda t: len(self.postings.get(t, ()))
+        ):
+            if trigrama.startswith(' ') or trigrama.endswith(' '):
+                # Bordas de palavra não se aplicam a um trecho do meio
+                continue
+            posting = self.postings.get(trigrama, set())
+            candidatos = (
+                set(posting) if candidatos is None else candidatos & posting
+            )
+            if not candidatos:
+                return []
+        if candidatos is None:
+            candidatos = set(self.textos)
+        if ids is not None:
+            candidatos &= ids
+
+        termo_cf = termo.casefold()
+        resultados = [
+            Resultado(
+                id_,
+                self.textos[id_],
+                similaridade(alvo, trigramas(self.textos[id_])),
+            )
+            for id_ in candidatos
+            if termo_cf in self.textos[id_].casefold()
+        ]
+        resultados.sort(key=lambda r: (-r.score, r.id))
+        return resultados[:limite]
+
+
+_indices: dict[str, IndiceNgram] = {nome: IndiceNgram() for nome in ALVOS}
+_lock = Lock()
+
+
+def _indice_atualizado(session: Session, nome: str) -> IndiceNgram:
+    alvo = ALVOS[nome]
+    assinatura = tuple(
+        session.execute(select(func.count(), func.max(alvo.modelo.id))).one()
+    )
+    indice = _indices[nome]
+    if indice.assinatura != assinatura:
+        with _lock:
+            if indice.assinatura != assinatura:
+                indice.reconstruir(
+                    session.execute(select(alvo.modelo.id, alvo.coluna)),
+                    assinatura,
+                )
+    return indice
+
+
+def buscar(
+    session: Session,
+    nome: str,
+    termo: str,
+    limite: int = 20,
+    questionario_id: int | None = None,
+) -> list[Resultado]:
+    """
+    Os `limite` registros de `nome` (uma chave de `ALVOS`) que contêm
+    `termo`, do mais ao menos parecido. `questionario_id` restringe a
+    busca em respostas às de um questionário.
+    """
+    alvo = ALVOS[nome]
+    filtros = []
+    if questionario_id is not None:
+        submissoes = RespostaQuestionario.questionario_id == questionario_id
+        filtros += [
+            RespostaQuestao.resposta_questionario_id.in_(
+                select(RespostaQuestionario.id).where(submissoes)
+            ),
+            *RespostaQuestao.desde(session, submissoes),
+        ]
+
+    if session.get_bind().dialect.name != 'postgresql':
+        ids = None
+        if filtros:
+            ids = set(session.scalars(select(alvo.modelo.id).where(*filtros)))
+        return _indice_atualizado(session, nome).buscar(termo, limite, ids)
+
+    score = func.similarity(alvo.coluna, termo, type_=Float)
+    linhas = session.execute(
+        select(alvo.modelo.id, alvo.coluna, score)
+        .where(
+            alvo.coluna.ilike(f'%{_escapar_like(termo)}%', escape='\\'),
+            *filtros,
+        )
+        .order_by(score.desc(), alvo.modelo.id)
+        .limit(limite)
+    )
+    return [Resultado(id_, texto, score) for id_, texto, score in linhas]
+
+
+def buscar_medindo(
+    session: Session, nome: str, termo: str, **kwargs
+) -> tuple[list[Resultado], float]:
+    """Como `buscar`, devolvendo também o tempo gasto em milissegundos."""
+    inicio = time.perf_counter()
+    resultados = buscar(session, nome, termo, **kwargs)
+    return resultados, (time.perf_counter() - inicio) * 1000
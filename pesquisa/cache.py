@@ -0,0 +1,97 @@
+import sys
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+# valor, tamanho estimado, momento em que expira
+Entrada = tuple[Any, int, float | None]
+
+
+class LRUCache:
+    """
+    Cache LRU em memória, seguro entre threads, limitado por número de
+    itens e, opcionalmente, pelo tamanho estimado em bytes dos valores e
+    pelo tempo de vida (`ttl`, em segundos) de cada entrada.
+    """
+
+    def __init__(
+        self,
+        max_itens: int,
+        max_bytes: int | None = None,
+        tamanho: Callable[[Any], int] = sys.getsizeof,
+        ttl: float | None = None,
+    ):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._tamanho = tamanho
+        self._itens: OrderedDict[Hashable, Entrada] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[2] and item[2] < time.monotonic():
+                del self._itens[chave]
+                self._bytes -= item[1]
+                item = None
+            if item is None:
+                self.falhas += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[0]
+
+    def set(self, chave: Hashable, valor: Any) -> None:
+        tamanho = self._tamanho(valor)
+        # Um valor maior que o próprio cache nunca é armazenado
+        if self.max_bytes is not None and tamanho > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            expira = time.monotonic() + self.ttl if self.ttl else None
+            self._itens[chave] = (valor, tamanho, expira)
+            self._bytes += tamanho
+            self._despejar()
+
+    def pop(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            item = self._itens.pop(chave, None)
+            if item is None:
+                return padrao
+            self._bytes -= item[1]
+            return item[0]
+
+    def remover_se(self, predicado: Callable[[Hashable], bool]) -> int:
+        """Remove todas as entradas cuja chave satisfaz `predicado`."""
+        with self._lock:
+            chaves = [chave for chave in self._itens if predicado(chave)]
+            for chave in chaves:
+                self._bytes -= self._itens.pop(chave)[1]
+            return len(chaves)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def _despejar(self) -> None:
+        while self._itens and (
+            len(self._itens) > self.max_itens
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, tamanho, _) = self._itens.popitem(last=False)
+            self._bytes -= tamanho
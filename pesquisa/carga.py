@@ -0,0 +1,168 @@
+"""
+Descarte de carga por worker.
+
+O `ControleCargaMiddleware` recusa com 503 e `Retry-After` as
+requisições que chegam quando o worker já está sobrecarregado, antes de
+elas ocuparem uma conexão do pool:
+
+- requisições em andamento acima de `CARGA_MAX_EM_ANDAMENTO`, ou
+- espera média por uma conexão do pool acima de `CARGA_ESPERA_POOL_MS`.
+
+Os limites valem por prioridade: as submissões de respostas só são
+descartadas no limite cheio, o tráfego comum a partir de 75% dele e o
+administrativo (busca, exportação, resultados, /admin) a partir de 50%.
+As métricas ficam de fora.
+
+A espera pelo pool é medida pelas classes de pool `PoolMedido` e
+`PoolAssincronoMedido` (ver `database.py`), como uma média móvel que
+decai com o tempo: sem tráfego no banco ela volta a zero sozinha.
+"""
+
+import enum
+import re
+import threading
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.responses import JSONResponse
+
+from pesquisa.instrumentacao import metricas
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+
+class Prioridade(enum.IntEnum):
+    baixa = 0
+    normal = 1
+    alta = 2
+
+
+# Fração dos limites a partir da qual cada prioridade é descartada
+FRACOES = {
+    Prioridade.baixa: 0.5,
+    Prioridade.normal: 0.75,
+    Prioridade.alta: 1.0,
+}
+
+SUBMISSAO = re.compile(r'^/pesquisa/questionarios/(\d+)/respostas/?$')
+_ADMINISTRATIVAS = re.compile(
+    r'^/(admin|busca)(/|$)'
+    r'|^/pesquisa/questionarios/\d+/(export|resultados|respostas)'
+)
+_ISENTAS = ('/metrics', '/metricas/')
+
+
+def classificar(metodo: str, caminho: str) -> Prioridade | None:
+    """A prioridade da requisição; `None` se nunca é descartada."""
+    if caminho.startswith(_ISENTAS):
+        return None
+    if metodo == 'POST' and SUBMISSAO.match(caminho):
+        return Prioridade.alta
+    if _ADMINISTRATIVAS.match(caminho):
+        return Prioridade.baixa
+    return Prioridade.normal
+
+
+class EsperaPool:
+    """Média móvel da espera por conexões, com meia-vida em segundos."""
+
+    def __init__(self, peso: float = 0.2, meia_vida: float = 1.0):
+        self.peso = peso
+        self.meia_vida = meia_vida
+        self._valor = 0.0
+        self._momento = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decaido(self, agora: float) -> float:
+        return self._valor * 0.5 ** ((agora - self._momento) / self.meia_vida)
+
+    def registrar(self, segundos: float) -> None:
+        agora = time.monotonic()
+        with self._lock:
+            atual = self._decaido(agora)
+            self._valor = atual + (segundos - atual) * self.peso
+            self._momento = agora
+
+    def atual(self) -> float:
+        return self._decaido(time.monotonic())
+
+
+espera_pool = EsperaPool()
+
+
+class PoolMedido(QueuePool):
+    """`QueuePool` que registra quanto cada checkout esperou."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera_pool.registrar(time.perf_counter() - inicio)
+
+
+class PoolAssincronoMedido(PoolMedido, AsyncAdaptedQueuePool):
+    pass
+
+
+metricas.contador(
+    'pesquisa_carga_descartadas_total',
+    'Requisições recusadas com 503 por sobrecarga',
+)
+
+
+class ControleCargaMiddleware:
+    """Recusa com 503 o que passa dos limites de carga (ASGI puro)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.em_andamento = 0
+        metricas.coletor(self._metricas)
+
+    def _metricas(self):
+        yield '# TYPE pesquisa_carga_em_andamento gauge'
+        yield f'pesquisa_carga_em_andamento {self.em_andamento}'
+        yield '# TYPE pesquisa_carga_espera_pool_segundos gauge'
+        yield f'pesquisa_carga_espera_pool_segundos {espera_pool.atual()}'
+
+    def sobrecarga(self, prioridade: Prioridade) -> str | None:
+        """O motivo para descartar uma requisição dessa prioridade."""
+        fracao = FRACOES[prioridade]
+        maximo = settings.CARGA_MAX_EM_ANDAMENTO
+        if maximo and self.em_andamento >= maximo * fracao:
+            return 'em_andamento'
+        limiar = settings.CARGA_ESPERA_POOL_MS / 1000
+        if limiar and espera_pool.atual() > limiar * fracao:
+            return 'espera_pool'
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        prioridade = classificar(scope['method'], scope['path'])
+        if prioridade is None:
+            await self.app(scope, receive, send)
+            return
+
+        motivo = self.sobrecarga(prioridade)
+        if motivo:
+            metricas.incrementar(
+                'pesquisa_carga_descartadas_total',
+                prioridade=prioridade.name,
+                motivo=motivo,
+            )
+            resposta = JSONResponse(
+                {'detail': 'Serviço sobrecarregado, tente novamente'},
+                status_code=503,
+                headers={'Retry-After': str(settings.CARGA_RETRY_AFTER)},
+            )
+            await resposta(scope, receive, send)
+            return
+
+        self.em_andamento += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.em_andamento -= 1
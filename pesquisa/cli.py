@@ -0,0 +1,468 @@
+"""
+Comandos administrativos: `pesquisa-admin --help`.
+
+`estaticos` gera os arquivos estáticos com hash e pré-comprimidos.
+
+`servidor` sobe a aplicação em produção com vários workers (servidor.py).
+
+`particoes` mantém as partições mensais de `respostas_questao`.
+
+`import-users` carrega usuários de um arquivo CSV ou NDJSON em lotes. Em
+cada lote as senhas são transformadas em hash em um pool de processos,
+as linhas vão por `COPY` para uma tabela temporária e de lá para `users`
+(`ON CONFLICT (username)`) e `user_roles`, tudo na mesma transação.
+Depois de cada lote gravado o checkpoint registra quantos registros do
+arquivo já foram importados; rodar o comando de novo continua dali.
+"""
+
+import csv
+import json
+import logging
+import os
+import subprocess
+import time
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+import click
+import psycopg
+import pyotp
+import pytz
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from pesquisa import estaticos, hashing, particoes, servidor
+from pesquisa.models import User
+from pesquisa.settings import Settings
+
+CAMPOS_OBRIGATORIOS = ('username', 'email', 'full_name', 'password')
+
+SQL_TABELA_TEMPORARIA = """
+    CREATE TEMPORARY TABLE importacao_usuarios (
+        username text NOT NULL,
+        password text NOT NULL,
+        email text NOT NULL,
+        full_name text NOT NULL,
+        otp_base32 text NOT NULL,
+        otp_auth_url text NOT NULL,
+        roles text[] NOT NULL
+    ) ON COMMIT DROP
+"""
+
+SQL_COPY = """
+    COPY importacao_usuarios (
+        username, password, email, full_name, otp_base32, otp_auth_url, roles
+    ) FROM STDIN
+"""
+
+# O segredo OTP de quem já existe é preservado
+SQL_UPSERT_USUARIOS = """
+    INSERT INTO users (
+        username, password, email, full_name, otp_base32, otp_auth_url,
+        is_active, is_staff, is_superuser, otp_created_at, login_otp_used
+    )
+    SELECT
+        username, password, email, full_name, otp_base32, otp_auth_url,
+        true, true, false, now(), false
+    FROM importacao_usuarios
+    ON CONFLICT (username) DO UPDATE SET
+        password = EXCLUDED.password,
+        email = EXCLUDED.email,
+        full_name = EXCLUDED.full_name,
+        updated_at = now()
+"""
+
+SQL_PAPEIS = """
+    INSERT INTO user_roles (user_id, role_id)
+    SELECT DISTINCT u.id, r.id
+    FROM importacao_usuarios i
+    CROSS JOIN LATERAL unnest(i.roles) AS papel(nome)
+    JOIN users u ON u.username = i.username
+    JOIN roles r ON r.name = papel.nome
+    WHERE NOT EXISTS (
+        SELECT 1 FROM user_roles ur
+        WHERE ur.user_id = u.id AND ur.role_id = r.id
+    )
+"""
+
+SQL_PAPEIS_DESCONHECIDOS = """
+    SELECT DISTINCT papel.nome
+    FROM importacao_usuarios i
+    CROSS JOIN LATERAL unnest(i.roles) AS papel(nome)
+    WHERE NOT EXISTS (SELECT 1 FROM roles r WHERE r.name = papel.nome)
+"""
+
+
+def create_local_session(engine):
+    """Cria uma sessão de banco de dados."""
+    return Session(engine, autoflush=False)
+
+
+@click.group()
+def cli():
+    """Administração do pesquisa."""
+
+
+@cli.command('create-superuser')
+@click.option(
+    '--username', prompt=True, help='O nome de usuário para o superusuário.'
+)
+@click.option(
+    '--password',
+    prompt=True,
+    hide_input=True,
+    confirmation_prompt=True,
+    help='A senha para o superusuário.',
+)
+@click.option('--email', prompt=True, help='O email do superusuário.')
+@click.option(
+    '--full-name', prompt=True, help='Nome completo do superusuário.'
+)
+def create_superuser(username: str, password: str, email: str, full_name: str):
+    """Cria um novo superusuário no banco de dados."""
+
+    hashed_password = hashing.pwd_context.hash(password)
+
+    # Criação da sessão de banco de dados
+    settings = Settings()
+    engine = create_engine(settings.DATABASE_URL)
+    session = create_local_session(engine)
+
+    TIME_ZONE = 'America/Sao_Paulo'
+    tz = pytz.timezone(TIME_ZONE)
+
+    try:
+        user = User(
+            username=username,
+            password=hashed_password,
+            email=email,
+            full_name=full_name,
+            is_superuser=True,
+            is_staff=True,
+            otp_auth_url='',
+            otp_base32=User.create_otp_base32(),
+            otp_created_at=datetime.now(tz),
+        )
+
+        session.add(user)
+        session.commit()
+        click.echo(f'Superusuário {username} criado com sucesso!')
+    except Exception as e:
+        session.rollback()
+        click.echo(f'Erro ao criar o superusuário: {e}')
+    finally:
+        session.close()
+
+
+def ler_registros(arquivo: Path, formato: str) -> Iterator[dict]:
+    """Lê o arquivo registro a registro, sem carregá-lo inteiro."""
+    with arquivo.open(encoding='utf-8', newline='') as f:
+        if formato == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+
+
+def _preparar(registro: dict, papeis_extra: tuple[str, ...]) -> tuple:
+    faltando = [
+        campo for campo in CAMPOS_OBRIGATORIOS if not registro.get(campo)
+    ]
+    if faltando:
+        raise ValueError(f'campos obrigatórios vazios: {", ".join(faltando)}')
+
+    # O mesmo que o listener `before_insert` de User faria; o COPY não
+    # passa pelo ORM
+    otp_base32 = pyotp.random_base32()
+    otp_auth_url = pyotp.TOTP(otp_base32).provisioning_uri(
+        name=registro['full_name'].lower(), issuer_name='Codigo'
+    )
+    papeis = registro.get('roles') or []
+    if isinstance(papeis, str):
+        # Papéis no CSV: nomes separados por ';'
+        papeis = papeis.split(';')
+    papeis = sorted({
+        *(papel.strip() for papel in papeis if papel.strip()),
+        *papeis_extra,
+    })
+    return (
+        registro['username'],
+        registro['password'],
+        registro['email'],
+        registro['full_name'],
+        otp_base32,
+        otp_auth_url,
+        papeis,
+    )
+
+
+def _ler_checkpoint(caminho: Path, arquivo: Path) -> int:
+    if not caminho.exists():
+        return 0
+    checkpoint = json.loads(caminho.read_text(encoding='utf-8'))
+    if checkpoint['arquivo'] != str(arquivo.resolve()):
+        raise click.ClickException(
+            f'O checkpoint {caminho} é de outro arquivo: '
+            f'{checkpoint["arquivo"]}'
+        )
+    return checkpoint['registros']
+
+
+def _gravar_checkpoint(caminho: Path, arquivo: Path, registros: int) -> None:
+    temporario = caminho.with_name(caminho.name + '.tmp')
+    temporario.write_text(
+        json.dumps({
+            'arquivo': str(arquivo.resolve()),
+            'registros': registros,
+            'atualizado_em': datetime.now().isoformat(),
+        }),
+        encoding='utf-8',
+    )
+    os.replace(temporario, caminho)
+
+
+def _gravar_lote(engine, linhas: list[tuple]) -> set[str]:
+    """Grava um lote em uma transação; devolve os papéis inexistentes."""
+    with engine.begin() as conn:
+        cursor = conn.connection.dbapi_connection.cursor()
+        cursor.execute(SQL_TABELA_TEMPORARIA)
+        with cursor.copy(SQL_COPY) as copy:
+            for linha in linhas:
+                copy.write_row(linha)
+        cursor.execute(SQL_UPSERT_USUARIOS)
+        cursor.execute(SQL_PAPEIS)
+        cursor.execute(SQL_PAPEIS_DESCONHECIDOS)
+        return {nome for (nome,) in cursor.fetchall()}
+
+
+@cli.command('import-users')
+@click.argument(
+    'arquivo', type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.option(
+    '--formato',
+    type=click.Choice(['csv', 'ndjson']),
+    help='Padrão: pela extensão do arquivo.',
+)
+@click.option('--lote', default=2000, show_default=True)
+@click.option(
+    '--processos',
+    type=int,
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help='Processos para o hash das senhas.',
+)
+@click.option(
+    '--role',
+    'papeis_extra',
+    multiple=True,
+    help='Papel atribuído a todos os usuários importados (repetível).',
+)
+@click.option(
+    '--checkpoint',
+    type=click.Path(dir_okay=False, path_type=Path),
+    help='Padrão: <arquivo>.checkpoint.json',
+)
+@click.option(
+    '--recomecar', is_flag=True, help='Ignora um checkpoint existente.'
+)
+def import_users(  # noqa: PLR0913, PLR0917
+    arquivo: Path,
+    formato: str | None,
+    lote: int,
+    processos: int,
+    papeis_extra: tuple[str, ...],
+    checkpoint: Path | None,
+    recomecar: bool,
+):
+    """
+    Importa usuários de ARQUIVO (CSV ou NDJSON) com os campos username,
+    email, full_name, password e, opcionalmente, roles.
+    """
+    formato = formato or (
+        'ndjson' if arquivo.suffix in {'.ndjson', '.jsonl'} else 'csv'
+    )
+    checkpoint = checkpoint or arquivo.with_name(
+        arquivo.name + '.checkpoint.json'
+    )
+    engine = create_engine(Settings().DATABASE_URL)
+    if engine.dialect.name != 'postgresql':
+        raise click.ClickException('import-users requer PostgreSQL (COPY).')
+
+    inicio = 0 if recomecar else _ler_checkpoint(checkpoint, arquivo)
+    if inicio:
+        click.echo(f'Retomando após {inicio} registros ({checkpoint}).')
+
+    registros = islice(ler_registros(arquivo, formato), inicio, None)
+    lidos, importados, rejeitados = inicio, 0, 0
+    papeis_desconhecidos: set[str] = set()
+    t0 = time.perf_counter()
+
+    with hashing.criar_executor(processos) as executor:
+        while bloco := list(islice(registros, lote)):
+            linhas = []
+            for numero, registro in enumerate(bloco, start=lidos + 1):
+                try:
+                    linhas.append(_preparar(registro, papeis_extra))
+                except (ValueError, AttributeError) as erro:
+                    rejeitados += 1
+                    click.echo(f'registro {numero} ignorado: {erro}', err=True)
+            # Um username repetido no lote não pode ser atualizado duas
+            # vezes pelo mesmo INSERT ... ON CONFLICT: vale o último
+            linhas = list({linha[0]: linha for linha in linhas}.values())
+
+            senhas = executor.map(
+                hashing.gerar_hash,
+                [linha[1] for linha in linhas],
+                chunksize=max(1, len(linhas) // (processos * 4)),
+            )
+            linhas = [
+                (linha[0], senha, *linha[2:])
+                for linha, senha in zip(linhas, senhas)
+            ]
+
+            if linhas:
+                try:
+                    papeis_desconhecidos |= _gravar_lote(engine, linhas)
+                except psycopg.Error as erro:
+                    raise click.ClickException(
+                        f'Falha no lote que começa no registro {lidos + 1}'
+                        f' (nada dele foi gravado): {erro}'
+                    )
+            lidos += len(bloco)
+            importados += len(linhas)
+            _gravar_checkpoint(checkpoint, arquivo, lidos)
+
+            decorrido = time.perf_counter() - t0
+            click.echo(
+                f'{lidos} registros lidos, {importados} importados, '
+                f'{rejeitados} ignorados '
+                f'({importados / decorrido:.0f} usuários/s)'
+            )
+
+    if papeis_desconhecidos:
+        click.echo(
+            'Papéis inexistentes (não atribuídos): '
+            + ', '.join(sorted(papeis_desconhecidos)),
+            err=True,
+        )
+    click.echo(f'Importação concluída: {importados} usuários.')
+
+
+@cli.command('estaticos')
+@click.option(
+    '--tailwind/--sem-tailwind',
+    default=False,
+    help='Gera antes o CSS com o Tailwind (requer Node).',
+)
+def construir_estaticos(tailwind: bool):
+    """Copia os estáticos para dist/ com hash no nome, .gz e .br."""
+    if tailwind:
+        subprocess.run(
+            ['npm', 'run', 'build'],
+            cwd=Path(estaticos.__file__).parent / 'tailwindcss',
+            check=True,
+        )
+    if estaticos.brotli is None:
+        click.echo('brotli não instalado: gerando só as variantes .gz.')
+    for fonte, nome in estaticos.construir().items():
+        click.echo(f'{fonte} -> {nome}')
+
+
+@cli.command('servidor')
+@click.option('--host', default='0.0.0.0', show_default=True)
+@click.option('--porta', type=int, default=8002, show_default=True)
+def servidor_comando(host: str, porta: int):
+    """Serve a aplicação com SERVIDOR_WORKERS processos."""
+    logging.basicConfig(format='%(levelname)s:     %(message)s')
+    logging.getLogger(servidor.__name__).setLevel(logging.INFO)
+    servidor.servir(host, porta)
+
+
+def _engine_postgresql():
+    engine = create_engine(Settings().DATABASE_URL)
+    if engine.dialect.name != 'postgresql':
+        raise click.ClickException('Partições só existem no PostgreSQL.')
+    return engine
+
+
+def _mes(ctx, param, valor: str | None) -> date | None:
+    if valor is None:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m').date()
+    except ValueError:
+        raise click.BadParameter('use AAAA-MM')
+
+
+@cli.group('particoes')
+def particoes_grupo():
+    """Partições mensais de respostas_questao."""
+
+
+@particoes_grupo.command('listar')
+def particoes_listar():
+    """Lista as partições e seus intervalos."""
+    with _engine_postgresql().connect() as conn:
+        for particao in particoes.listar(conn):
+            faixa = (
+                f'{particao.inicio} a {particao.fim}'
+                if particao.inicio
+                else 'padrão'
+            )
+            click.echo(f'{particao.nome}\t{faixa}')
+
+
+@particoes_grupo.command('criar')
+@click.option(
+    '--meses',
+    type=int,
+    default=lambda: Settings().PARTICOES_ANTECEDENCIA_MESES,
+    show_default='PARTICOES_ANTECEDENCIA_MESES',
+    help='Quantos meses criar a partir do inicial.',
+)
+@click.option(
+    '--a-partir-de',
+    callback=_mes,
+    metavar='AAAA-MM',
+    help='Mês inicial (padrão: o atual).',
+)
+def particoes_criar(meses: int, a_partir_de: date | None):
+    """Cria com antecedência as partições dos próximos meses."""
+    with _engine_postgresql().begin() as conn:
+        criadas = particoes.criar(conn, a_partir_de or date.today(), meses)
+    for nome in criadas:
+        click.echo(f'criada: {nome}')
+    if not criadas:
+        click.echo('Nenhuma partição nova.')
+
+
+@particoes_grupo.command('desanexar')
+@click.option(
+    '--antes-de',
+    callback=_mes,
+    required=True,
+    metavar='AAAA-MM',
+    help='Desanexa os meses anteriores a este.',
+)
+@click.confirmation_option(
+    prompt='As respostas desses meses deixam de aparecer. Continuar?'
+)
+def particoes_desanexar(antes_de: date):
+    """
+    Desanexa as partições anteriores a --antes-de para arquivamento. Elas
+    continuam no banco como tabelas comuns (para pg_dump e DROP TABLE).
+    """
+    with _engine_postgresql().begin() as conn:
+        desanexadas = particoes.desanexar(conn, antes_de)
+    for nome in desanexadas:
+        click.echo(f'desanexada: {nome}')
+    if not desanexadas:
+        click.echo('Nenhuma partição anterior a esse mês.')
+
+
+if __name__ == '__main__':
+    cli()
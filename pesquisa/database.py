@@ -1,11 +1,62 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session
 
+from pesquisa import instrumentacao
+from pesquisa.carga import PoolAssincronoMedido, PoolMedido
 from pesquisa.settings import Settings
 
-engine = create_engine(Settings().DATABASE_URL)
+settings = Settings()
+
+
+def _tamanho_pool() -> tuple[int, int]:
+    """`pool_size` e `max_overflow` de cada engine deste processo."""
+    if not settings.DB_CONEXOES_MAX:
+        return settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    # Cada worker tem duas engines; sem overflow o total de conexões
+    # abertas nunca passa do orçamento. SERVIDOR_WORKERS é o número já
+    # resolvido pelo servidor (servidor.py); fora dele, um processo só
+    processos = max(1, settings.SERVIDOR_WORKERS)
+    return max(1, settings.DB_CONEXOES_MAX // (2 * processos)), 0
+
+
+def _opcoes_pool(url: str, assincrona: bool = False) -> dict:
+    # O SQLite (usado em testes e benchmarks) não tem pool configurável
+    if url.startswith('sqlite'):
+        return {}
+    pool_size, max_overflow = _tamanho_pool()
+    return {
+        # Mede a espera por conexões para o descarte de carga (carga.py)
+        'poolclass': PoolAssincronoMedido if assincrona else PoolMedido,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+    }
+
+
+engine = create_engine(
+    settings.DATABASE_URL, **_opcoes_pool(settings.DATABASE_URL)
+)
+
+# Engine assíncrona: com `postgresql+psycopg` o SQLAlchemy usa o driver
+# psycopg async sobre a mesma URL
+async_database_url = settings.DATABASE_URL_ASYNC or settings.DATABASE_URL
+async_engine = create_async_engine(
+    async_database_url, **_opcoes_pool(async_database_url, assincrona=True)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Contagem e tempo dos comandos SQL por requisição (ver instrumentacao.py)
+instrumentacao.instrumentar(engine)
+instrumentacao.instrumentar(async_engine.sync_engine)
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    async with AsyncSessionLocal() as session:
+        yield session
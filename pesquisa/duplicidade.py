@@ -0,0 +1,190 @@
+"""
+Submissões repetidas: reenvios com a mesma `Idempotency-Key` e segunda
+resposta do mesmo e-mail em questionários com `resposta_unica_por_email`.
+
+Quem garante são os índices únicos de `respostas_questionario`
+(`questionario_id, chave_idempotencia` e `questionario_id, email_unico`);
+o insert que colide falha e a submissão é tratada como repetida. Na
+frente deles, cada worker mantém um `Registro`: um LRU com o recibo das
+submissões recentes e um filtro de Bloom com todas as que viu. O caso
+comum, uma chave nova, é decidido pelo filtro sem consultar o banco; só
+um "talvez" (a chave foi vista, ou é um falso positivo) vai ao banco
+buscar o recibo original.
+"""
+
+import hashlib
+import math
+from threading import Lock
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from pesquisa.cache import LRUCache
+from pesquisa.models import RespostaQuestionario
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+
+class FiltroBloom:
+    """
+    Conjunto probabilístico: `chave in filtro` é `False` só para chaves
+    nunca adicionadas. Ao passar da capacidade, recomeça vazio para manter
+    a taxa de falsos positivos (o que foi esquecido ainda é barrado pelo
+    índice único).
+    """
+
+    def __init__(self, capacidade: int, falsos_positivos: float):
+        self.capacidade = capacidade
+        self.bits = max(
+            8,
+            math.ceil(
+                -capacidade * math.log(falsos_positivos) / math.log(2) ** 2
+            ),
+        )
+        self.funcoes = max(1, round(self.bits / capacidade * math.log(2)))
+        self._mapa = bytearray((self.bits + 7) // 8)
+        self._itens = 0
+        self._lock = Lock()
+
+    def _posicoes(self, chave: str):
+        resumo = hashlib.blake2b(chave.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(resumo[:8])
+        h2 = int.from_bytes(resumo[8:]) | 1
+        for i in range(self.funcoes):
+            yield (h1 + i * h2) % self.bits
+
+    def adicionar(self, chave: str) -> None:
+        posicoes = list(self._posicoes(chave))
+        with self._lock:
+            if self._itens >= self.capacidade:
+                self._mapa = bytearray(len(self._mapa))
+                self._itens = 0
+            for posicao in posicoes:
+                self._mapa[posicao >> 3] |= 1 << (posicao & 7)
+            self._itens += 1
+
+    def __contains__(self, chave: str) -> bool:
+        mapa = self._mapa
+        return all(
+            mapa[posicao >> 3] & (1 << (posicao & 7))
+            for posicao in self._posicoes(chave)
+        )
+
+
+class Registro:
+    """Recibos das submissões recentes (LRU) e das já vistas (Bloom)."""
+
+    def __init__(
+        self, recentes_max: int, capacidade: int, falsos_positivos: float
+    ):
+        self.recentes = LRUCache(max_itens=recentes_max)
+        self.filtro = FiltroBloom(capacidade, falsos_positivos)
+        self.consultas_banco = 0
+
+    def registrar(self, chave: str, recibo: str) -> None:
+        self.recentes.set(chave, recibo)
+        self.filtro.adicionar(chave)
+
+    def descartar(self, chave: str) -> None:
+        """
+        Esquece o recibo de `chave`. O filtro não tem remoção: a próxima
+        busca vai ao banco, que decide.
+        """
+        self.recentes.pop(chave)
+
+    def buscar(self, chave: str, no_banco) -> str | None:
+        """
+        O recibo de `chave`, se já foi submetida. `no_banco()` só é
+        chamada quando o filtro não descarta a chave.
+        """
+        recibo = self.recentes.get(chave)
+        if recibo is not None or chave not in self.filtro:
+            return recibo
+        self.consultas_banco += 1
+        recibo = no_banco()
+        if recibo is not None:
+            self.recentes.set(chave, recibo)
+        return recibo
+
+
+def _registro() -> Registro:
+    return Registro(
+        settings.DUPLICIDADE_RECENTES_MAX,
+        settings.DUPLICIDADE_BLOOM_CAPACIDADE,
+        settings.DUPLICIDADE_BLOOM_FALSOS_POSITIVOS,
+    )
+
+
+idempotencia = _registro()
+respondentes = _registro()
+
+
+def normalizar_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def recibo_original(
+    session: Session, questionario_id: int, chave_idempotencia: str
+) -> str | None:
+    """O recibo gravado com a chave, direto do banco."""
+    return session.scalar(
+        select(RespostaQuestionario.recibo).where(
+            RespostaQuestionario.questionario_id == questionario_id,
+            RespostaQuestionario.chave_idempotencia == chave_idempotencia,
+        )
+    )
+
+
+def reenvio(
+    session: Session, questionario_id: int, chave_idempotencia: str
+) -> str | None:
+    """O recibo da submissão feita antes com a mesma chave, se houver."""
+    return idempotencia.buscar(
+        f'{questionario_id}:{chave_idempotencia}',
+        lambda: recibo_original(session, questionario_id, chave_idempotencia),
+    )
+
+
+def ja_respondeu(
+    session: Session, questionario_id: int, email_unico: str
+) -> bool:
+    return (
+        respondentes.buscar(
+            f'{questionario_id}:{email_unico}',
+            lambda: session.scalar(
+                select(RespostaQuestionario.id).where(
+                    RespostaQuestionario.questionario_id == questionario_id,
+                    RespostaQuestionario.email_unico == email_unico,
+                )
+            ),
+        )
+        is not None
+    )
+
+
+def registrar(
+    questionario_id: int,
+    recibo: str,
+    chave_idempotencia: str | None,
+    email_unico: str | None,
+) -> None:
+    """Registra uma submissão aceita nos filtros deste worker."""
+    if chave_idempotencia:
+        idempotencia.registrar(
+            f'{questionario_id}:{chave_idempotencia}', recibo
+        )
+    if email_unico:
+        respondentes.registrar(f'{questionario_id}:{email_unico}', recibo)
+
+
+def descartar(
+    questionario_id: int,
+    chave_idempotencia: str | None,
+    email_unico: str | None,
+) -> None:
+    """Desfaz `registrar` para uma submissão que não chegou ao banco."""
+    if chave_idempotencia:
+        idempotencia.descartar(f'{questionario_id}:{chave_idempotencia}')
+    if email_unico:
+        respondentes.descartar(f'{questionario_id}:{email_unico}')
@@ -0,0 +1,189 @@
+"""
+Arquivos estáticos com nome por conteúdo e pré-comprimidos.
+
+`pesquisa-admin estaticos` (rodado no deploy, antes de subir a
+aplicação) copia cada arquivo de `FONTES` para `static/dist/` com o hash
+do conteúdo no nome (`css/app.css` -> `dist/css/app.3f2a9c1b7d4e.css`),
+grava ao lado as versões `.gz` e `.br` e registra o mapeamento em
+`dist/manifest.json`. O CSS em si vem do Tailwind (`npm run build` em
+`pesquisa/tailwindcss`), já purgado e minificado.
+
+Nos templates, `static_url('css/app.css')` devolve o nome com hash; sem
+manifesto (desenvolvimento) devolve o caminho original. Como o nome
+muda a cada conteúdo novo, os arquivos de `dist/` são servidos com
+`Cache-Control: immutable`, na variante comprimida que o cliente aceitar.
+Nada em `/static` passa pelo `GZipMiddleware`.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+# Opcional: sem nenhum dos dois, só as variantes .gz
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+DIRETORIO = Path(__file__).parent / 'static'
+DIST = 'dist'
+MANIFESTO = DIRETORIO / DIST / 'manifest.json'
+PREFIXO = '/static'
+FONTES = ('css/app.css',)
+
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+# Em ordem de preferência
+VARIANTES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _comprimir(conteudo: bytes) -> dict[str, bytes]:
+    variantes = {'.gz': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes['.br'] = brotli.compress(conteudo, quality=11)
+    return variantes
+
+
+def _gravar(caminho: Path, conteudo: bytes) -> None:
+    temporario = caminho.with_name(caminho.name + '.tmp')
+    temporario.write_bytes(conteudo)
+    temporario.replace(caminho)
+
+
+def construir(
+    diretorio: Path = DIRETORIO, fontes: tuple[str, ...] = FONTES
+) -> dict[str, str]:
+    """
+    Gera as cópias com hash e suas variantes comprimidas; devolve o
+    manifesto. As cópias de builds anteriores ficam, para as páginas
+    ainda em cache que apontam para elas.
+    """
+    manifesto = {}
+    for fonte in fontes:
+        conteudo = (diretorio / fonte).read_bytes()
+        resumo = hashlib.sha256(conteudo).hexdigest()[:12]
+        original = Path(fonte)
+        nome = (
+            Path(DIST)
+            / original.parent
+            / f'{original.stem}.{resumo}{original.suffix}'
+        )
+        destino = diretorio / nome
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        _gravar(destino, conteudo)
+        for sufixo, comprimido in _comprimir(conteudo).items():
+            _gravar(destino.with_name(destino.name + sufixo), comprimido)
+        manifesto[fonte] = nome.as_posix()
+
+    caminho = diretorio / DIST / 'manifest.json'
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    _gravar(caminho, json.dumps(manifesto, indent=2).encode())
+    return manifesto
+
+
+def carregar_manifesto(caminho: Path = MANIFESTO) -> dict[str, str]:
+    try:
+        return json.loads(caminho.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+
+
+_manifesto = carregar_manifesto()
+
+
+def static_url(caminho: str) -> str:
+    """URL de um arquivo de `static/`, com hash se houver build."""
+    return f'{PREFIXO}/{_manifesto.get(caminho, caminho)}'
+
+
+def _aceitas(accept_encoding: str) -> set[str]:
+    aceitas = set()
+    for item in accept_encoding.split(','):
+        nome, _, parametros = item.partition(';')
+        _, _, q = parametros.strip().partition('q=')
+        try:
+            if q and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        aceitas.add(nome.strip().lower())
+    return aceitas
+
+
+@lru_cache(maxsize=256)
+def _variantes(caminho: str) -> tuple[tuple[str, str, os.stat_result], ...]:
+    # Só para arquivos de dist/: o nome muda com o conteúdo, então o
+    # resultado pode ficar em cache
+    encontradas = []
+    for codificacao, sufixo in VARIANTES:
+        try:
+            stat = os.stat(caminho + sufixo)
+        except FileNotFoundError:
+            continue
+        encontradas.append((codificacao, caminho + sufixo, stat))
+    return tuple(encontradas)
+
+
+class EstaticosPrecomprimidos(StaticFiles):
+    """
+    `StaticFiles` que, para os arquivos de `dist/`, serve a variante
+    `.br`/`.gz` aceita pelo cliente e marca a resposta como imutável.
+    """
+
+    def __init__(self, *, directory, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self._dist = os.path.join(os.path.realpath(directory), DIST) + os.sep
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        full_path = os.fspath(full_path)
+        if not full_path.startswith(self._dist):
+            return super().file_response(
+                full_path, stat_result, scope, status_code
+            )
+
+        requisicao = Headers(scope=scope)
+        cabecalhos = {'Cache-Control': CACHE_IMUTAVEL}
+        caminho, tipo = full_path, None
+        variantes = _variantes(full_path)
+        if variantes:
+            cabecalhos['Vary'] = 'Accept-Encoding'
+            aceitas = _aceitas(requisicao.get('accept-encoding', ''))
+            for codificacao, variante, stat in variantes:
+                if codificacao in aceitas:
+                    caminho, stat_result = variante, stat
+                    tipo = mimetypes.guess_type(full_path)[0]
+                    cabecalhos['Content-Encoding'] = codificacao
+                    break
+
+        resposta = FileResponse(
+            caminho,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=tipo,
+            headers=cabecalhos,
+        )
+        if self.is_not_modified(resposta.headers, requisicao):
+            return NotModifiedResponse(resposta.headers)
+        return resposta
+
+
+class GZipExcetoEstaticos(GZipMiddleware):
+    """`GZipMiddleware` que deixa `/static` de fora."""
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'].startswith(PREFIXO + '/'):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+from sqlalchemy import and_, select
+
+from pesquisa.database import AsyncSessionLocal
+from pesquisa.models import Opcao, RespostaQuestao, RespostaQuestionario
+
+# Linhas buscadas por vez do cursor no servidor
+YIELD_PER = 1000
+# Tamanho aproximado de cada pedaço enviado ao cliente: pedaços maiores
+# comprimem melhor no GZipMiddleware, que processa um pedaço por vez
+TAMANHO_PEDACO = 64 * 1024
+
+
+async def _respondentes(
+    questionario_id: int,
+) -> AsyncIterator[tuple[int, str, str, dict[int, list[str]]]]:
+    """
+    Percorre as respostas de um questionário por um cursor no servidor e
+    agrupa as linhas consecutivas de cada respondente. A memória usada é a
+    de um lote do cursor mais um respondente, qualquer que seja o total.
+    """
+    submissoes = RespostaQuestionario.questionario_id == questionario_id
+
+    # A sessão é aberta aqui e não recebida por dependência: a resposta é
+    # enviada depois que as dependências do endpoint já foram encerradas
+    async with AsyncSessionLocal() as session:
+        # Só as partições a partir da primeira submissão do questionário
+        desde = await session.run_sync(RespostaQuestao.desde, submissoes)
+        stmt = (
+            select(
+                RespostaQuestionario.id,
+                RespostaQuestionario.nome,
+                RespostaQuestionario.email,
+                RespostaQuestao.questao_id,
+                RespostaQuestao.resposta_texto,
+                Opcao.texto,
+            )
+            .select_from(RespostaQuestionario)
+            .outerjoin(
+                RespostaQuestao,
+                and_(
+                    RespostaQuestao.resposta_questionario_id
+                    == RespostaQuestionario.id,
+                    *desde,
+                ),
+            )
+            .outerjoin(Opcao, Opcao.id == RespostaQuestao.opcao_id)
+            .where(submissoes)
+            .order_by(RespostaQuestionario.id, RespostaQuestao.id)
+            .execution_options(yield_per=YIELD_PER)
+        )
+        resultado = await session.stream(stmt)
+        atual = None
+        async for linhas in resultado.partitions():
+            for id_, nome, email, questao_id, texto, opcao in linhas:
+                if atual is None or atual[0] != id_:
+                    if atual is not None:
+                        yield atual
+                    atual = (id_, nome, email, {})
+                if questao_id is not None:
+                    atual[3].setdefault(questao_id, []).append(
+                        texto if opcao is None else opcao
+                    )
+        if atual is not None:
+            yield atual
+
+
+async def exportar_csv(
+    questionario_id: int, questoes: list[tuple[int, str]]
+) -> AsyncIterator[str]:
+    """Uma linha por respondente e uma coluna por questão."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['id', 'nome', 'email', *(texto for _, texto in questoes)])
+
+    async for id_, nome, email, respostas in _respondentes(questionario_id):
+        writer.writerow([
+            id_,
+            nome,
+            email,
+            *(
+                '; '.join(respostas.get(questao_id, ()))
+                for questao_id, _ in questoes
+            ),
+        ])
+        if buffer.tell() >= TAMANHO_PEDACO:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+async def exportar_ndjson(questionario_id: int) -> AsyncIterator[str]:
+    """Um objeto JSON por respondente, com as respostas por id de questão."""
+    pedaco: list[str] = []
+    tamanho = 0
+    async for id_, nome, email, respostas in _respondentes(questionario_id):
+        linha = json.dumps(
+            {'id': id_, 'nome': nome, 'email': email, 'respostas': respostas},
+            ensure_ascii=False,
+        )
+        pedaco.append(linha)
+        tamanho += len(linha) + 1
+        if tamanho >= TAMANHO_PEDACO:
+            yield '\n'.join(pedaco) + '\n'
+            pedaco.clear()
+            tamanho = 0
+
+    if pedaco:
+        yield '\n'.join(pedaco) + '\n'
@@ -0,0 +1,167 @@
+"""
+Hash e verificação de senhas em um pool de processos dedicado.
+
+O Argon2 gasta CPU e memória de propósito; rodando na thread da
+requisição, uma rajada de logins ocupa o worker inteiro e atrasa as
+submissões de questionários. Aqui as operações vão para um pool de
+`HASHING_PROCESSOS` processos e, quando já há `HASHING_FILA_MAX`
+operações esperando, novas chamadas são recusadas na hora com
+`PoolOcupado` (429 na API) em vez de enfileiradas.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+
+def criar_hasher(
+    time_cost: int, memory_cost: int, parallelism: int
+) -> PasswordHash:
+    return PasswordHash((
+        Argon2Hasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+        ),
+    ))
+
+
+# Parâmetros atuais: hashes gerados com outros são refeitos no login
+parametros = (
+    settings.ARGON2_TIME_COST,
+    settings.ARGON2_MEMORY_COST,
+    settings.ARGON2_PARALLELISM,
+)
+pwd_context = criar_hasher(*parametros)
+
+
+# Funções executadas nos processos do pool
+_hasher_processo: PasswordHash | None = None
+
+
+def _iniciar_processo(*parametros_processo) -> None:
+    # Initializer do pool: o estado por processo só pode ficar no módulo
+    global _hasher_processo  # noqa: PLW0603
+    _hasher_processo = criar_hasher(*parametros_processo)
+
+
+def criar_executor(processos: int) -> ProcessPoolExecutor:
+    # 'spawn': o processo filho não herda o loop nem as conexões abertas
+    # do processo pai
+    return ProcessPoolExecutor(
+        max_workers=processos,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_iniciar_processo,
+        initargs=parametros,
+    )
+
+
+def gerar_hash(senha: str) -> str:
+    return _hasher_processo.hash(senha)
+
+
+def _verify_and_update(senha: str, hash_: str) -> tuple[bool, str | None]:
+    return _hasher_processo.verify_and_update(senha, hash_)
+
+
+class PoolOcupado(Exception):
+    """Há operações demais esperando pelo pool."""
+
+
+class PoolHashing:
+    def __init__(self, processos: int, fila_max: int):
+        self.processos = processos
+        self.fila_max = fila_max
+        self._executor: ProcessPoolExecutor | None = None
+        self._em_andamento = 0
+        self._latencias: deque[float] = deque(maxlen=1000)
+        self.operacoes = 0
+        self.rejeitadas = 0
+
+    @property
+    def em_andamento(self) -> int:
+        return self._em_andamento
+
+    @property
+    def fila(self) -> int:
+        """Operações aguardando um processo livre."""
+        return max(0, self._em_andamento - self.processos)
+
+    def _obter_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = criar_executor(self.processos)
+        return self._executor
+
+    async def _executar(self, funcao, *args):
+        if self._em_andamento >= self.processos + self.fila_max:
+            self.rejeitadas += 1
+            raise PoolOcupado
+        self._em_andamento += 1
+        inicio = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._obter_executor(), funcao, *args
+            )
+        finally:
+            self._em_andamento -= 1
+            self._latencias.append(time.perf_counter() - inicio)
+            self.operacoes += 1
+
+    async def hash(self, senha: str) -> str:
+        return await self._executar(gerar_hash, senha)
+
+    async def verify(self, senha: str, hash_: str) -> bool:
+        valido, _ = await self.verify_and_update(senha, hash_)
+        return valido
+
+    async def verify_and_update(
+        self, senha: str, hash_: str
+    ) -> tuple[bool, str | None]:
+        """
+        Verifica a senha e, se o hash foi gerado com outros parâmetros,
+        devolve também o hash novo que deve substituí-lo.
+        """
+        return await self._executar(_verify_and_update, senha, hash_)
+
+    def parar(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def metricas(self) -> dict:
+        latencias = sorted(self._latencias)
+        return {
+            'processos': self.processos,
+            'em_andamento': self._em_andamento,
+            'fila': self.fila,
+            'fila_max': self.fila_max,
+            'operacoes': self.operacoes,
+            'rejeitadas': self.rejeitadas,
+            'latencia_ms': {
+                'p50': _percentil(latencias, 0.5),
+                'p95': _percentil(latencias, 0.95),
+                'max': _percentil(latencias, 1),
+            },
+        }
+
+
+def _percentil(ordenados: list[float], fracao: float) -> float | None:
+    if not ordenados:
+        return None
+    indice = min(len(ordenados) - 1, int(len(ordenados) * fracao))
+    return round(ordenados[indice] * 1000, 3)
+
+
+pool_hashing = PoolHashing(
+    processos=settings.HASHING_PROCESSOS,
+    fila_max=settings.HASHING_FILA_MAX,
+)
@@ -0,0 +1,325 @@
+import asyncio
+import contextlib
+import enum
+import logging
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import exc, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pesquisa import duplicidade, resultados
+from pesquisa.cache import LRUCache
+from pesquisa.database import AsyncSessionLocal
+from pesquisa.models import RespostaQuestao, RespostaQuestionario
+from pesquisa.settings import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# Espera entre as tentativas de gravar um lote: dobra a cada falha
+ESPERA_INICIAL = 0.1  # segundos
+ESPERA_MAXIMA = 5.0
+
+
+class StatusRecibo(str, enum.Enum):
+    pendente = 'pendente'
+    gravado = 'gravado'
+    erro = 'erro'
+
+
+class FilaCheia(Exception):
+    """A fila está cheia ou não aceita mais submissões (desligamento)."""
+
+
+@dataclass(slots=True)
+class Submissao:
+    recibo: str
+    questionario_id: int
+    nome: str
+    email: str
+    linhas: list[dict]
+    chave_idempotencia: str | None = None
+    email_unico: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class EstadoRecibo:
+    status: StatusRecibo
+    resposta_questionario_id: int | None = None
+    detalhe: str | None = None
+
+
+class FilaIngestao:
+    """
+    Fila limitada, em processo, de submissões já validadas. Um escritor em
+    segundo plano drena a fila e grava lotes de cabeçalhos e respostas com
+    inserts de múltiplas linhas, ao atingir `lote_max` submissões ou
+    `intervalo` segundos desde a primeira submissão do lote.
+    """
+
+    def __init__(self, tamanho_max: int, lote_max: int, intervalo: float):
+        self.tamanho_max = tamanho_max
+        self.lote_max = lote_max
+        self.intervalo = intervalo
+        self.recibos = LRUCache(max_itens=settings.INGESTAO_RECIBOS_MAX)
+        self._fila: asyncio.Queue[Submissao | None] | None = None
+        self._escritor: asyncio.Task | None = None
+        self._gravando = 0  # submissões do lote sendo gravado
+
+    @property
+    def ativa(self) -> bool:
+        return self._escritor is not None
+
+    @property
+    def profundidade(self) -> int:
+        return self._fila.qsize() if self._fila else 0
+
+    async def iniciar(self) -> None:
+        if self.ativa:
+            return
+        self._fila = asyncio.Queue(maxsize=self.tamanho_max)
+        self._escritor = asyncio.create_task(self._drenar())
+
+    async def parar(self, timeout: float | None = None) -> None:
+        """Para de aceitar submissões e grava tudo o que está na fila."""
+        if not self.ativa:
+            return
+        escritor, self._escritor = self._escritor, None
+
+        async def drenar():
+            # Com a fila cheia o put espera o escritor: também no prazo
+            await self._fila.put(None)
+            await escritor
+
+        try:
+            await asyncio.wait_for(drenar(), timeout)
+        except TimeoutError:
+            # O lote interrompido é desfeito junto com a transação
+            interrompidas = self._gravando
+            escritor.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await escritor
+            perdidas = interrompidas + sum(
+                submissao is not None for submissao in _esvaziar(self._fila)
+            )
+            logger.error(
+                'Fila de ingestão não drenou em %ss; %d submissões perdidas',
+                timeout,
+                perdidas,
+            )
+
+    def enfileirar(  # noqa: PLR0913, PLR0917
+        self,
+        questionario_id: int,
+        nome: str,
+        email: str,
+        linhas: list[dict],
+        chave_idempotencia: str | None = None,
+        email_unico: str | None = None,
+    ) -> str:
+        if not self.ativa:
+            raise FilaCheia
+        recibo = uuid.uuid4().hex
+        try:
+            self._fila.put_nowait(
+                Submissao(
+                    recibo,
+                    questionario_id,
+                    nome,
+                    email,
+                    linhas,
+                    chave_idempotencia,
+                    email_unico,
+                )
+            )
+        except asyncio.QueueFull:
+            raise FilaCheia
+        self.recibos.set(recibo, EstadoRecibo(StatusRecibo.pendente))
+        return recibo
+
+    async def status(self, recibo: str) -> EstadoRecibo | None:
+        estado = self.recibos.get(recibo)
+        if estado is not None:
+            return estado
+
+        # O recibo pode ter sido emitido por outro worker ou já ter saído
+        # do cache local: o que foi gravado está no banco
+        async with AsyncSessionLocal() as session:
+            resposta_questionario_id = await session.scalar(
+                select(RespostaQuestionario.id).where(
+                    RespostaQuestionario.recibo == recibo
+                )
+            )
+        if resposta_questionario_id is None:
+            return None
+        return EstadoRecibo(StatusRecibo.gravado, resposta_questionario_id)
+
+    async def _drenar(self) -> None:
+        loop = asyncio.get_running_loop()
+        parar = False
+        while not parar:
+            primeira = await self._fila.get()
+            if primeira is None:
+                break
+            lote = [primeira]
+            prazo = loop.time() + self.intervalo
+            while len(lote) < self.lote_max:
+                restante = prazo - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    submissao = await asyncio.wait_for(
+                        self._fila.get(), restante
+                    )
+                except TimeoutError:
+                    break
+                if submissao is None:
+                    parar = True
+                    break
+                lote.append(submissao)
+            self._gravando = len(lote)
+            try:
+                await self._gravar(lote)
+            finally:
+                self._gravando = 0
+
+    async def _gravar(self, lote: list[Submissao]) -> None:
+        try:
+            ids = await _gravar_retentando(lote)
+        except Exception as erro:
+            if _transitoria(erro):
+                logger.error(
+                    'Banco indisponível por %ss; %d submissões não gravadas',
+                    settings.INGESTAO_RETENTATIVA_SEGUNDOS,
+                    len(lote),
+                )
+                for submissao in lote:
+                    self._falhou(submissao, 'Banco de dados indisponível')
+                return
+            if len(lote) == 1:
+                if isinstance(erro, exc.IntegrityError):
+                    # Repetida em outro worker (Idempotency-Key ou e-mail
+                    # de questionário com resposta única)
+                    detalhe = 'Submissão repetida'
+                else:
+                    logger.exception(
+                        'Falha ao gravar o recibo %s', lote[0].recibo
+                    )
+                    detalhe = str(erro)
+                self._falhou(lote[0], detalhe)
+                return
+            # Isola a submissão problemática sem perder o resto do lote
+            for submissao in lote:
+                await self._gravar([submissao])
+            return
+
+        for submissao, resposta_questionario_id in zip(lote, ids):
+            self.recibos.set(
+                submissao.recibo,
+                EstadoRecibo(StatusRecibo.gravado, resposta_questionario_id),
+            )
+
+    def _falhou(self, submissao: Submissao, detalhe: str) -> None:
+        # A submissão foi registrada nos filtros ao entrar na fila; sem
+        # isso um reenvio receberia este recibo com erro
+        duplicidade.descartar(
+            submissao.questionario_id,
+            submissao.chave_idempotencia,
+            submissao.email_unico,
+        )
+        self.recibos.set(
+            submissao.recibo, EstadoRecibo(StatusRecibo.erro, detalhe=detalhe)
+        )
+
+
+def _transitoria(erro: Exception) -> bool:
+    """Falha que passa sozinha: conexão perdida, banco fora, pool cheio."""
+    return isinstance(erro, (exc.OperationalError, exc.TimeoutError)) or (
+        isinstance(erro, exc.DBAPIError) and erro.connection_invalidated
+    )
+
+
+async def _gravar_retentando(lote: list[Submissao]) -> list[int]:
+    """
+    Grava o lote em uma transação, repetindo com espera crescente nas
+    falhas transitórias por até `INGESTAO_RETENTATIVA_SEGUNDOS`: as
+    submissões já foram aceitas (202) e não podem se perder por uma
+    queda momentânea do banco.
+    """
+    loop = asyncio.get_running_loop()
+    prazo = loop.time() + settings.INGESTAO_RETENTATIVA_SEGUNDOS
+    espera = ESPERA_INICIAL
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                ids = await _inserir_lote(session, lote)
+                await session.commit()
+            return ids
+        except Exception as erro:
+            if not _transitoria(erro) or loop.time() + espera > prazo:
+                raise
+            logger.warning(
+                'Falha transitória ao gravar %d submissões; nova tentativa '
+                'em %.1fs: %s',
+                len(lote),
+                espera,
+                erro,
+            )
+        await asyncio.sleep(espera)
+        espera = min(espera * 2, ESPERA_MAXIMA)
+
+
+def _esvaziar(fila: asyncio.Queue):
+    while not fila.empty():
+        yield fila.get_nowait()
+
+
+async def _inserir_lote(
+    session: AsyncSession, lote: list[Submissao]
+) -> list[int]:
+    na_transacao = settings.RESULTADOS_MODO == 'transacao'
+    ids = (
+        await session.scalars(
+            insert(RespostaQuestionario).returning(
+                RespostaQuestionario.id, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    'nome': submissao.nome,
+                    'email': submissao.email,
+                    'questionario_id': submissao.questionario_id,
+                    'recibo': submissao.recibo,
+                    'chave_idempotencia': submissao.chave_idempotencia,
+                    'email_unico': submissao.email_unico,
+                    'contabilizada': na_transacao,
+                }
+                for submissao in lote
+            ],
+        )
+    ).all()
+
+    linhas = [
+        {**linha, 'resposta_questionario_id': resposta_questionario_id}
+        for submissao, resposta_questionario_id in zip(lote, ids)
+        for linha in submissao.linhas
+    ]
+    if linhas:
+        await session.execute(insert(RespostaQuestao), linhas)
+    if na_transacao:
+        await session.run_sync(
+            resultados.registrar,
+            [
+                (submissao.questionario_id, resposta_questionario_id)
+                for submissao, resposta_questionario_id in zip(lote, ids)
+            ],
+            linhas,
+        )
+    return ids
+
+
+fila_ingestao = FilaIngestao(
+    tamanho_max=settings.INGESTAO_FILA_MAX,
+    lote_max=settings.INGESTAO_LOTE_MAX,
+    intervalo=settings.INGESTAO_INTERVALO_MS / 1000,
+)
@@ -0,0 +1,341 @@
+"""
+Instrumentação de SQL por requisição.
+
+Os eventos `before/after_cursor_execute` das engines (ligados em
+`database.py`) registram cada comando na medição da requisição corrente,
+guardada em uma ContextVar pelo `InstrumentacaoMiddleware`: número de
+comandos, tempo total no banco, os mais lentos e quantas vezes cada
+forma de comando (o SQL com os parâmetros e listas normalizados) se
+repetiu. Ao fim da requisição o middleware:
+
+- devolve os totais no cabeçalho `Server-Timing`;
+- acumula contadores e histogramas expostos em `/metrics`, no formato
+  texto do Prometheus (por processo);
+- registra no log as requisições com comandos lentos e as formas
+  repetidas mais de `SQL_REPETICOES_LIMIAR` vezes (provável N+1).
+
+Nos testes, `assert_max_queries(n)` falha se o bloco emitir mais de `n`
+comandos.
+"""
+
+import heapq
+import logging
+import re
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from pesquisa.settings import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+_ESPACOS = re.compile(r'\s+')
+_PARAMETRO = re.compile(r'%\(\w+\)s|%s|\$\d+|\?')
+_LISTA = re.compile(r'\?(?:\s*,\s*\?)+')
+_TUPLAS = re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+')
+
+
+@lru_cache(maxsize=4096)
+def forma(sql: str) -> str:
+    """O comando sem os parâmetros, com listas `IN`/`VALUES` colapsadas."""
+    sql = _PARAMETRO.sub('?', _ESPACOS.sub(' ', sql).strip())
+    return _TUPLAS.sub('(?)', _LISTA.sub('?', sql))
+
+
+@dataclass(slots=True)
+class Medicao:
+    consultas: int = 0
+    tempo_db: float = 0.0
+    # (duração, sql) dos mais lentos, em um heap de tamanho fixo
+    lentas: list = field(default_factory=list)
+    formas: Counter = field(default_factory=Counter)
+
+    def registrar(self, sql: str, duracao: float) -> None:
+        self.consultas += 1
+        self.tempo_db += duracao
+        self.formas[forma(sql)] += 1
+        item = (duracao, sql)
+        if len(self.lentas) < settings.SQL_LENTAS_POR_REQUISICAO:
+            heapq.heappush(self.lentas, item)
+        elif item > self.lentas[0]:
+            heapq.heapreplace(self.lentas, item)
+
+    def mais_lentas(self) -> list[tuple[float, str]]:
+        return sorted(self.lentas, reverse=True)
+
+    def repetidas(self, limiar: int) -> list[tuple[str, int]]:
+        return [(f, n) for f, n in self.formas.most_common() if n > limiar]
+
+
+_medicao_atual: ContextVar[Medicao | None] = ContextVar(
+    'medicao_sql', default=None
+)
+# Medições abertas por `contar_consultas`, que veem todos os comandos
+_observadores: list[Medicao] = []
+
+
+class Metricas:
+    """Contadores e histogramas no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._descricoes: dict[str, tuple[str, str]] = {}
+        self._contadores: dict[tuple, float] = {}
+        self._histogramas: dict[tuple, list] = {}
+        self._faixas: dict[str, tuple[float, ...]] = {}
+        self._coletores: list[Callable[[], Iterator[str]]] = []
+
+    def contador(self, nome: str, descricao: str) -> None:
+        self._descricoes[nome] = ('counter', descricao)
+
+    def histograma(
+        self, nome: str, descricao: str, faixas: tuple[float, ...]
+    ) -> None:
+        self._descricoes[nome] = ('histogram', descricao)
+        self._faixas[nome] = faixas
+
+    def coletor(self, funcao: Callable[[], Iterator[str]]):
+        """Registra uma função que gera linhas extras para `/metrics`."""
+        self._coletores.append(funcao)
+        return funcao
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos) -> None:
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome: str, valor: float, **rotulos) -> None:
+        chave = (nome, tuple(sorted(rotulos.items())))
+        faixas = self._faixas[nome]
+        with self._lock:
+            # [contagem por faixa..., +Inf, soma]
+            serie = self._histogramas.setdefault(
+                chave, [0] * (len(faixas) + 2)
+            )
+            serie[bisect_left(faixas, valor)] += 1
+            serie[-1] += valor
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def renderizar(self) -> str:
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = {k: list(v) for k, v in self._histogramas.items()}
+
+        linhas = []
+        for nome, (tipo, descricao) in self._descricoes.items():
+            linhas += [f'# HELP {nome} {descricao}', f'# TYPE {nome} {tipo}']
+            if tipo == 'counter':
+                for (metrica, rotulos), valor in sorted(contadores.items()):
+                    if metrica == nome:
+                        linhas.append(f'{nome}{_rotulos(rotulos)} {valor}')
+                continue
+            faixas = self._faixas[nome]
+            for (metrica, rotulos), serie in sorted(histogramas.items()):
+                if metrica != nome:
+                    continue
+                acumulado = 0
+                for limite, quantidade in zip((*faixas, '+Inf'), serie[:-1]):
+                    acumulado += quantidade
+                    le = _rotulos((*rotulos, ('le', limite)))
+                    linhas.append(f'{nome}_bucket{le} {acumulado}')
+                linhas.append(f'{nome}_sum{_rotulos(rotulos)} {serie[-1]}')
+                linhas.append(f'{nome}_count{_rotulos(rotulos)} {acumulado}')
+        for coletor in self._coletores:
+            linhas.extend(coletor())
+        return '\n'.join(linhas) + '\n'
+
+
+def _rotulos(rotulos) -> str:
+    if not rotulos:
+        return ''
+    pares = ','.join(
+        f'{chave}="{str(valor).replace(chr(34), chr(92) + chr(34))}"'
+        for chave, valor in rotulos
+    )
+    return '{' + pares + '}'
+
+
+metricas = Metricas()
+metricas.contador(
+    'pesquisa_http_requisicoes_total', 'Requisições HTTP atendidas'
+)
+metricas.histograma(
+    'pesquisa_http_duracao_segundos',
+    'Duração das requisições HTTP',
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+metricas.histograma(
+    'pesquisa_db_consultas_por_requisicao',
+    'Comandos SQL emitidos por requisição',
+    (0, 1, 2, 5, 10, 20, 50, 100),
+)
+metricas.contador('pesquisa_db_consultas_total', 'Comandos SQL executados')
+metricas.contador(
+    'pesquisa_db_tempo_segundos_total', 'Tempo gasto em comandos SQL'
+)
+metricas.contador(
+    'pesquisa_db_consultas_lentas_total',
+    'Comandos SQL acima de SQL_LENTA_MS',
+)
+metricas.contador(
+    'pesquisa_db_n_mais_um_total',
+    'Requisições que repetiram uma forma de comando acima do limiar',
+)
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):  # noqa: PLR0913, PLR0917
+    context._inicio_consulta = time.perf_counter()
+
+
+def _depois(conn, cursor, statement, parameters, context, executemany):  # noqa: PLR0913, PLR0917
+    duracao = time.perf_counter() - context._inicio_consulta
+    metricas.incrementar('pesquisa_db_consultas_total')
+    metricas.incrementar('pesquisa_db_tempo_segundos_total', duracao)
+
+    medicao = _medicao_atual.get()
+    if duracao * 1000 > settings.SQL_LENTA_MS:
+        metricas.incrementar('pesquisa_db_consultas_lentas_total')
+        if medicao is None:
+            # Fora de uma requisição (CLI, ingestão) não há a quem
+            # relatar no fim: registra já
+            logger.warning(
+                'SQL lento (%.1f ms): %s', duracao * 1000, forma(statement)
+            )
+    if medicao is not None:
+        medicao.registrar(statement, duracao)
+    for observador in _observadores:
+        observador.registrar(statement, duracao)
+
+
+def instrumentar(engine: Engine) -> None:
+    """Liga a instrumentação a uma engine (síncrona ou `.sync_engine`)."""
+    if not event.contains(engine, 'before_cursor_execute', _antes):
+        event.listen(engine, 'before_cursor_execute', _antes)
+        event.listen(engine, 'after_cursor_execute', _depois)
+
+
+def _relatar(rota: str, medicao: Medicao) -> None:
+    repetidas = medicao.repetidas(settings.SQL_REPETICOES_LIMIAR)
+    if repetidas:
+        metricas.incrementar('pesquisa_db_n_mais_um_total', rota=rota)
+        for sql, vezes in repetidas:
+            logger.warning(
+                'Possível N+1 em %s: %d execuções de %s', rota, vezes, sql
+            )
+    lentas = [
+        (duracao, sql)
+        for duracao, sql in medicao.mais_lentas()
+        if duracao * 1000 > settings.SQL_LENTA_MS
+    ]
+    if lentas:
+        logger.warning(
+            'SQL lento em %s (%d comandos, %.1f ms no banco):\n%s',
+            rota,
+            medicao.consultas,
+            medicao.tempo_db * 1000,
+            '\n'.join(
+                f'  {duracao * 1000:.1f} ms: {forma(sql)}'
+                for duracao, sql in lentas
+            ),
+        )
+
+
+class InstrumentacaoMiddleware:
+    """Mede o SQL de cada requisição HTTP (middleware ASGI puro)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        medicao = Medicao()
+        token = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem['type'] == 'http.response.start':
+                status = mensagem['status']
+                total = (time.perf_counter() - inicio) * 1000
+                MutableHeaders(scope=mensagem).append(
+                    'Server-Timing',
+                    f'db;dur={medicao.tempo_db * 1000:.1f};'
+                    f'desc="{medicao.consultas} consultas", '
+                    f'app;dur={total:.1f}',
+                )
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicao_atual.reset(token)
+            # O modelo da rota (`/questionarios/{questionario_id}`), não o
+            # caminho, para manter a cardinalidade dos rótulos baixa
+            route = scope.get('route')
+            rota = getattr(route, 'path', None) or 'outras'
+            metricas.incrementar(
+                'pesquisa_http_requisicoes_total',
+                metodo=scope['method'],
+                rota=rota,
+                status=status,
+            )
+            metricas.observar(
+                'pesquisa_http_duracao_segundos',
+                time.perf_counter() - inicio,
+                rota=rota,
+            )
+            metricas.observar(
+                'pesquisa_db_consultas_por_requisicao',
+                medicao.consultas,
+                rota=rota,
+            )
+            _relatar(rota, medicao)
+
+
+@contextmanager
+def contar_consultas() -> Iterator[Medicao]:
+    """Mede todos os comandos SQL emitidos dentro do bloco."""
+    medicao = Medicao()
+    _observadores.append(medicao)
+    try:
+        yield medicao
+    finally:
+        _observadores.remove(medicao)
+
+
+@contextmanager
+def assert_max_queries(n: int) -> Iterator[Medicao]:
+    """
+    Falha se o bloco emitir mais de `n` comandos SQL:
+
+        with assert_max_queries(3):
+            client.post('/pesquisa/questionarios/1/respostas/', ...)
+    """
+    with contar_consultas() as medicao:
+        yield medicao
+    if medicao.consultas > n:
+        formas = '\n'.join(
+            f'  {vezes}x {sql}' for sql, vezes in medicao.formas.most_common()
+        )
+        raise AssertionError(
+            f'{medicao.consultas} comandos SQL, máximo {n}:\n{formas}'
+        )
@@ -0,0 +1,295 @@
+"""
+Limite de taxa das submissões de respostas (token bucket).
+
+Cada `POST /pesquisa/questionarios/{id}/respostas` consome uma ficha de
+dois baldes: o do IP do cliente e o do questionário. As fichas só saem
+se os dois têm: uma submissão recusada por um balde não gasta o outro.
+Balde vazio é 429 com `Retry-After`.
+
+O IP é o `X-Real-IP` (definido pelo nginx) só quando a conexão vem de um
+proxy de `LIMITE_PROXIES`; de qualquer outra origem o cabeçalho seria
+escolhido pelo cliente, e vale o endereço da conexão.
+
+Os baldes ficam em um backend:
+
+- `BackendLocal`: um LRU de `LIMITE_SLOTS` baldes por processo; cada
+  worker tem seus limites.
+- `BackendCompartilhado`: uma tabela de tamanho fixo em um arquivo
+  mapeado em memória (em `/dev/shm` quando existe), com `flock` em volta
+  de cada atualização. Os workers do mesmo host dividem os baldes, e o
+  limite vale para o servidor e não para cada worker.
+
+Os dois backends são caches: na tabela compartilhada, quando os slots
+de uma chave estão todos ocupados, o balde atualizado há mais tempo é
+descartado (e volta cheio); no LRU, o usado há mais tempo. Com
+`LIMITE_SLOTS` bem acima dos clientes ativos isso só atinge quem já
+parou de enviar.
+"""
+
+import fcntl
+import hashlib
+import ipaddress
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Sequence
+
+from starlette.responses import JSONResponse
+
+from pesquisa.cache import LRUCache
+from pesquisa.carga import SUBMISSAO
+from pesquisa.instrumentacao import metricas
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+
+# (chave, taxa em fichas por segundo, rajada)
+Balde = tuple[str, float, int]
+
+
+def reabastecer(
+    fichas: float, atualizado: float, agora: float, taxa: float, rajada: int
+) -> float:
+    """As fichas do balde em `agora`."""
+    # Relógio para trás (outro processo, outro boot): balde cheio
+    decorrido = agora - atualizado
+    return rajada if decorrido < 0 else min(rajada, fichas + decorrido * taxa)
+
+
+def _recusa(
+    baldes: Sequence[Balde], fichas: Sequence[float]
+) -> tuple[int, float] | None:
+    """O primeiro balde sem ficha e a espera até a próxima."""
+    for indice, ((_, taxa, _), disponiveis) in enumerate(zip(baldes, fichas)):
+        if disponiveis < 1:
+            return indice, (1 - disponiveis) / taxa
+    return None
+
+
+class BackendLocal:
+    def __init__(self, slots: int):
+        # chave -> (fichas, atualizado)
+        self._baldes = LRUCache(max_itens=slots)
+        self._lock = threading.Lock()
+
+    def consumir(self, baldes: Sequence[Balde]) -> tuple[int, float] | None:
+        """
+        Tira uma ficha de cada balde, ou de nenhum: sem ficha em algum,
+        retorna o índice dele e a espera.
+        """
+        agora = time.time()
+        with self._lock:
+            fichas = [
+                reabastecer(
+                    *self._baldes.get(chave, (rajada, agora)),
+                    agora,
+                    taxa,
+                    rajada,
+                )
+                for chave, taxa, rajada in baldes
+            ]
+            recusa = _recusa(baldes, fichas)
+            if recusa is None:
+                for (chave, _, _), disponiveis in zip(baldes, fichas):
+                    self._baldes.set(chave, (disponiveis - 1, agora))
+        return recusa
+
+
+def _codigo(chave: str) -> int:
+    resumo = hashlib.blake2b(chave.encode(), digest_size=8).digest()
+    # 0 marca slot vazio
+    return int.from_bytes(resumo) or 1
+
+
+class BackendCompartilhado:
+    """Baldes em um arquivo mapeado em memória, divididos entre processos."""
+
+    # hash da chave, fichas, momento da última atualização
+    SLOT = struct.Struct('<Qdd')
+    SONDAGEM = 8
+
+    def __init__(self, caminho: str | Path, slots: int):
+        self.caminho = Path(caminho)
+        self.slots = slots
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _abrir(self):
+        # Aberto no próprio processo: depois de um fork cada worker precisa
+        # do seu descritor, ou o flock seria dividido com o pai
+        if self._pid == os.getpid():
+            return
+        tamanho = self.slots * self.SLOT.size
+        fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < tamanho:
+                os.ftruncate(fd, tamanho)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        self._mapa = mmap.mmap(fd, tamanho)
+        self._pid = os.getpid()
+
+    def consumir(self, baldes: Sequence[Balde]) -> tuple[int, float] | None:
+        """
+        Tira uma ficha de cada balde, ou de nenhum: sem ficha em algum,
+        retorna o índice dele e a espera.
+        """
+        with self._lock:
+            self._abrir()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                agora = time.time()
+                codigos = [_codigo(chave) for chave, _, _ in baldes]
+                slots, fichas = [], []
+                for codigo, (_, taxa, rajada) in zip(codigos, baldes):
+                    indice, disponiveis, atualizado = self._localizar(
+                        codigo, agora, rajada, slots
+                    )
+                    slots.append(indice)
+                    fichas.append(
+                        reabastecer(
+                            disponiveis, atualizado, agora, taxa, rajada
+                        )
+                    )
+                recusa = _recusa(baldes, fichas)
+                # Recusado, cada balde é gravado só reabastecido (o mesmo
+                # estado): a submissão não gasta o balde que tinha ficha
+                gasto = 0 if recusa else 1
+                for codigo, indice, disponiveis in zip(codigos, slots, fichas):
+                    self.SLOT.pack_into(
+                        self._mapa,
+                        indice * self.SLOT.size,
+                        codigo,
+                        disponiveis - gasto,
+                        agora,
+                    )
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return recusa
+
+    def _localizar(
+        self, codigo: int, agora: float, rajada: int, reservados: list[int]
+    ) -> tuple[int, float, float]:
+        """
+        O slot da chave; sem ele, um vazio ou o mais antigo, fora os
+        `reservados` para os outros baldes da mesma submissão.
+        """
+        inicio = codigo % self.slots
+        livre, mais_antigo = None, None
+        for passo in range(self.SONDAGEM):
+            indice = (inicio + passo) % self.slots
+            existente, fichas, atualizado = self.SLOT.unpack_from(
+                self._mapa, indice * self.SLOT.size
+            )
+            if existente == codigo:
+                return indice, fichas, atualizado
+            if indice in reservados:
+                continue
+            if existente == 0:
+                livre = indice if livre is None else livre
+            elif mais_antigo is None or atualizado < mais_antigo[1]:
+                mais_antigo = (indice, atualizado)
+        if livre is None:
+            livre = mais_antigo[0]
+        return livre, rajada, agora
+
+
+def _backend():
+    if settings.LIMITE_BACKEND == 'local':
+        return BackendLocal(settings.LIMITE_SLOTS)
+    caminho = settings.LIMITE_ARQUIVO
+    if caminho is None:
+        shm = Path('/dev/shm')
+        diretorio = shm if shm.is_dir() else Path(tempfile.gettempdir())
+        caminho = diretorio / 'pesquisa-limites'
+    return BackendCompartilhado(caminho, settings.LIMITE_SLOTS)
+
+
+metricas.contador(
+    'pesquisa_limite_recusadas_total',
+    'Submissões recusadas com 429 pelo limite de taxa',
+)
+
+
+def _cabecalho(scope, nome: bytes) -> str | None:
+    for chave, valor in scope['headers']:
+        if chave == nome:
+            return valor.decode('latin-1')
+    return None
+
+
+PROXIES = tuple(
+    ipaddress.ip_network(proxy) for proxy in settings.LIMITE_PROXIES
+)
+
+
+def ip_cliente(scope, proxies=PROXIES) -> str | None:
+    """O `X-Real-IP` se a conexão vem de um proxy confiável; senão, ela."""
+    cliente = scope['client'][0] if scope.get('client') else None
+    if cliente is None or not proxies:
+        return cliente
+    try:
+        endereco = ipaddress.ip_address(cliente)
+    except ValueError:  # socket Unix, cliente de teste
+        return cliente
+    if any(endereco in rede for rede in proxies):
+        return _cabecalho(scope, b'x-real-ip') or cliente
+    return cliente
+
+
+def regras(scope, questionario_id: str) -> tuple[list[str], list[Balde]]:
+    """Os nomes das regras e os baldes que a submissão consome."""
+    return ['ip', 'questionario'], [
+        (
+            f'ip:{ip_cliente(scope)}',
+            settings.LIMITE_IP_TAXA,
+            settings.LIMITE_IP_RAJADA,
+        ),
+        (
+            f'q:{questionario_id}',
+            settings.LIMITE_QUESTIONARIO_TAXA,
+            settings.LIMITE_QUESTIONARIO_RAJADA,
+        ),
+    ]
+
+
+class LimiteMiddleware:
+    """Aplica os limites por IP e por questionário às submissões."""
+
+    def __init__(self, app, backend=None):
+        self.app = app
+        self.backend = backend or _backend()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST':
+            await self.app(scope, receive, send)
+            return
+        encontrado = SUBMISSAO.match(scope['path'])
+        if encontrado is None:
+            await self.app(scope, receive, send)
+            return
+
+        nomes, baldes = regras(scope, encontrado.group(1))
+        recusa = self.backend.consumir(baldes)
+        if recusa is not None:
+            indice, espera = recusa
+            metricas.incrementar(
+                'pesquisa_limite_recusadas_total', regra=nomes[indice]
+            )
+            resposta = JSONResponse(
+                {'detail': 'Muitas submissões, tente novamente'},
+                status_code=429,
+                headers={'Retry-After': str(math.ceil(espera))},
+            )
+            await resposta(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
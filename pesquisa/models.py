@@ -1,20 +1,23 @@
 import enum
 from datetime import datetime
-from io import BytesIO
+from typing import Literal
 
 import pyotp
-import qrcode
 from sqlalchemy import (
+    DDL,
     BigInteger,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
     event,
+    false,
     func,
     select,
+    text,
 )
 from sqlalchemy.orm import (
     Mapped,
@@ -25,14 +28,59 @@ from sqlalchemy.orm import (
     validates,
 )
 
+from pesquisa import otp, paginacao, particoes
+
 table_registry = registry()
 
 
+def indice_trigrama(nome: str, coluna: str) -> Index:
+    """
+    Índice GIN de trigramas (pg_trgm): atende `LIKE`/`ILIKE '%trecho%'` e a
+    ordenação por similaridade de `pesquisa.busca`. Só existe no
+    PostgreSQL; no SQLite a busca usa um índice em memória.
+    """
+    return Index(
+        nome,
+        coluna,
+        postgresql_using='gin',
+        postgresql_ops={coluna: 'gin_trgm_ops'},
+    ).ddl_if(dialect='postgresql')
+
+
+event.listen(
+    table_registry.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql'
+    ),
+)
+
+
 class Base:
     @classmethod
     def get_by_id(cls, session: Session, id: BigInteger):
         return session.get(cls, cls.id)
 
+    @classmethod
+    def paginar(
+        cls,
+        session: Session,
+        *criterios,
+        cursor: str | None = None,
+        page_size: int = 10,
+        total: bool = False,
+        ordem: tuple = (),
+    ) -> paginacao.Pagina:
+        """Página por chave; `ordem` termina em uma coluna única (o id)."""
+        return paginacao.paginar(
+            session,
+            select(cls).where(*criterios),
+            ordem or (cls.id,),
+            cursor=cursor,
+            limite=page_size,
+            total=total,
+        )
+
     @classmethod
     def delete(cls, session: Session):
         row = session.get(cls, cls.id)
@@ -68,6 +116,9 @@ class RolePermissions(Base):
 @table_registry.mapped_as_dataclass
 class UserRoles(Base):
     __tablename__ = 'user_roles'
+    __table_args__ = (
+        Index('ix_user_roles_user_id_role_id', 'user_id', 'role_id'),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, init=False, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
@@ -80,35 +131,32 @@ class UserRoles(Base):
         cls,
         session: Session,
         user_id: int,
-        page: int = 1,
+        cursor: str | None = None,
         page_size: int = 10,
+        total: bool = False,
     ):
-        skip = (page - 1) * page_size
-        limit = page_size
-
-        subquery = select(cls).where(cls.user_id == user_id).subquery()
-
-        total_records = session.scalar(
-            select(func.count()).select_from(subquery)
-        )
-
-        rows = session.scalars(
-            select(cls)
-            .where((cls.user_id == user_id))
-            .order_by(cls.role_id)
-            .offset(skip)
-            .limit(limit)
+        pagina = cls.paginar(
+            session,
+            cls.user_id == user_id,
+            cursor=cursor,
+            page_size=page_size,
+            total=total,
+            ordem=(cls.role_id, cls.id),
         )
 
         return {
-            'rows': rows,
-            'total_records': total_records,
+            'rows': pagina.rows,
+            'next_cursor': pagina.next_cursor,
+            'total_records': pagina.total_records,
         }
 
 
 @table_registry.mapped_as_dataclass
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        indice_trigrama('ix_users_username_trgm', 'username'),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True, index=True)
@@ -163,13 +211,13 @@ class User(Base):
             name=self.username.lower(), issuer_name='Fomento'
         )
 
-    def get_qr_code(self):
-        stream = BytesIO()
-        image = qrcode.make(f'{self.otp_auth_url}')
-        image.save(stream)
-        self.qr_code = stream.getvalue()
+    def get_qr_code(self, formato: Literal['png', 'svg'] = 'png') -> bytes:
+        # Gerado sob demanda e memorizado por URI em `pesquisa.otp`
+        return otp.qr_code(self.otp_auth_url, formato)
 
-        return self.qr_code
+    @property
+    def qr_code(self) -> bytes:
+        return self.get_qr_code()
 
     def is_valid_otp(self, otp: str) -> bool:
         """lifespan_in_seconds = 30
@@ -195,33 +243,24 @@ class User(Base):
         cls,
         session: Session,
         username: str,
-        page: int = 1,
+        cursor: str | None = None,
         page_size: int = 10,
+        total: bool = False,
     ):
-        skip = (page - 1) * page_size
-        limit = page_size
         partial_name = f'%{username}%'
 
-        subquery = (
-            select(cls).where(cls.username.like(partial_name)).subquery()
-        )
-
-        total_records = session.scalar(
-            select(func.count()).select_from(subquery)
-        )
-
-        rows = (
-            session.query(cls)
-            .filter(cls.username.like(partial_name))
-            .order_by(cls.id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        pagina = cls.paginar(
+            session,
+            cls.username.like(partial_name),
+            cursor=cursor,
+            page_size=page_size,
+            total=total,
         )
 
         return {
-            'rows': rows,
-            'total_records': total_records,
+            'rows': pagina.rows,
+            'next_cursor': pagina.next_cursor,
+            'total_records': pagina.total_records,
         }
 
     def get_otp_auth_url(self):
@@ -230,20 +269,14 @@ class User(Base):
         )
         return self.otp_auth_url
 
-    def get_qr_code(self):  # noqa: F811
-        stream = BytesIO()
-        image = qrcode.make(f'{self.otp_auth_url}')
-        image.save(stream)
-        self.qr_code = stream.getvalue()
-        return self.qr_code
-
 
 # Evento para before_insert
 @event.listens_for(User, 'before_insert')
 def before_insert(mapper, connection, target):
     # if not target.full_name:
     #     target.full_name = "Usuário desconhecido"
-    print('antes de insert')
+    # Só o segredo e a URI são gravados; o QR code é renderizado quando
+    # alguém o pede (`User.get_qr_code`)
     if not target.otp_base32:
         target.otp_base32 = pyotp.random_base32()
 
@@ -251,10 +284,6 @@ def before_insert(mapper, connection, target):
         target.otp_auth_url = pyotp.TOTP(target.otp_base32).provisioning_uri(
             name=target.full_name.lower(), issuer_name='Codigo'
         )
-        stream = BytesIO()
-        image = qrcode.make(f'{target.otp_auth_url}')
-        image.save(stream)
-        target.qr_code = stream.getvalue()
 
 
 # Evento para before_update
@@ -331,6 +360,61 @@ class Module(Base):
         return f'<Module {self.title}>'
 
 
+# Versão do grafo de papéis e permissões. Triggers nas tabelas abaixo a
+# incrementam a cada alteração, inclusive as feitas fora da aplicação;
+# `pesquisa.rbac` recarrega a sua matriz quando ela muda
+TABELAS_RBAC = ('roles', 'permissions', 'role_permissions', 'module')
+
+
+@table_registry.mapped_as_dataclass
+class RbacVersao(Base):
+    __tablename__ = 'rbac_versao'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    versao: Mapped[int] = mapped_column(
+        BigInteger, default=1, server_default='1'
+    )
+
+
+def ddl_versao_rbac(dialeto: str) -> list[str]:
+    if dialeto == 'postgresql':
+        comandos = [
+            """
+            CREATE OR REPLACE FUNCTION rbac_incrementa_versao()
+            RETURNS trigger AS $$
+            BEGIN
+                UPDATE rbac_versao SET versao = versao + 1;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        ]
+        comandos += [
+            f'CREATE TRIGGER rbac_versao_{tabela} '
+            f'AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabela} '
+            'FOR EACH STATEMENT EXECUTE FUNCTION rbac_incrementa_versao()'
+            for tabela in TABELAS_RBAC
+        ]
+    else:
+        comandos = [
+            f'CREATE TRIGGER rbac_versao_{tabela}_{operacao.lower()} '
+            f'AFTER {operacao} ON {tabela} '
+            'BEGIN UPDATE rbac_versao SET versao = versao + 1; END'
+            for tabela in TABELAS_RBAC
+            for operacao in ('INSERT', 'UPDATE', 'DELETE')
+        ]
+    return ['INSERT INTO rbac_versao (id, versao) VALUES (1, 1)', *comandos]
+
+
+@event.listens_for(table_registry.metadata, 'after_create')
+def criar_versao_rbac(target, connection, **kw):
+    # Só quando a tabela de versão acaba de ser criada
+    if RbacVersao.__table__ not in kw['tables']:
+        return
+    for comando in ddl_versao_rbac(connection.dialect.name):
+        connection.exec_driver_sql(comando)
+
+
 @table_registry.mapped_as_dataclass
 class Todo(Base):
     __tablename__ = 'todos'
@@ -366,24 +450,39 @@ class TipoQuestao(enum.Enum):
 @table_registry.mapped_as_dataclass
 class Questionario(Base):
     __tablename__ = 'questionarios'
+    __table_args__ = (
+        indice_trigrama('ix_questionarios_titulo_trgm', 'titulo'),
+    )
 
     id: Mapped[int] = mapped_column(
-        init=False, primary_key=True, index=True, autoincrement=True)
+        init=False, primary_key=True, autoincrement=True)
     titulo: Mapped[str] = mapped_column(String, nullable=False)
     descricao: Mapped[str] = mapped_column(String, nullable=True)
 
     # Relacionamento com Questao
     questoes: Mapped[list["Questao"]] = relationship(
-        "Questao", back_populates="questionario")
+        "Questao", back_populates="questionario", order_by="Questao.id")
+
+    # Incrementada a cada alteração na estrutura (questões/opções); compõe a
+    # chave do cache de questionários compilados
+    versao: Mapped[int] = mapped_column(
+        Integer, init=False, default=1, server_default='1')
+
+    # Aceita uma única resposta por e-mail (ver duplicidade.py)
+    resposta_unica_por_email: Mapped[bool] = mapped_column(
+        init=False, default=False, server_default=false())
 
 
 # Modelo de Questão
 @table_registry.mapped_as_dataclass
 class Questao(Base):
     __tablename__ = 'questoes'
+    __table_args__ = (
+        Index('ix_questoes_questionario_id_id', 'questionario_id', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(
-        init=False, primary_key=True, index=True, autoincrement=True)
+        init=False, primary_key=True, autoincrement=True)
     texto: Mapped[str] = mapped_column(String, nullable=False)
 
     # Tipo da questão: texto, seleção única, seleção múltipla
@@ -396,7 +495,7 @@ class Questao(Base):
 
     # Relacionamento com Opções (somente para questões tipo SELECT)
     opcoes: Mapped[list["Opcao"] | None] = relationship(
-        "Opcao", back_populates="questao")
+        "Opcao", back_populates="questao", order_by="Opcao.id")
     # Novo campo para definir o limite de respostas permitidas
     limite_respostas: Mapped[int | None] = mapped_column(
         Integer, nullable=True)  # Limite para questões SELECT_MULTIPLE
@@ -408,9 +507,12 @@ class Questao(Base):
 @table_registry.mapped_as_dataclass
 class Opcao(Base):
     __tablename__ = 'opcoes'
+    __table_args__ = (
+        Index('ix_opcoes_questao_id_id', 'questao_id', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(
-        init=False, primary_key=True, index=True, autoincrement=True)
+        init=False, primary_key=True, autoincrement=True)
     texto: Mapped[str] = mapped_column(String, nullable=False)
 
     # Relacionamento com Questão
@@ -423,9 +525,40 @@ class Opcao(Base):
 @table_registry.mapped_as_dataclass
 class RespostaQuestionario(Base):
     __tablename__ = 'respostas_questionario'
+    __table_args__ = (
+        # Exportação e reprocessamento percorrem as respostas de um
+        # questionário em ordem de id
+        Index(
+            'ix_respostas_questionario_questionario_id_id',
+            'questionario_id',
+            'id',
+        ),
+        # Submissões repetidas (ver duplicidade.py); nulos não colidem
+        Index(
+            'uq_respostas_questionario_questionario_id_chave_idempotencia',
+            'questionario_id',
+            'chave_idempotencia',
+            unique=True,
+        ),
+        Index(
+            'uq_respostas_questionario_questionario_id_email_unico',
+            'questionario_id',
+            'email_unico',
+            unique=True,
+        ),
+        # Submissões ainda não somadas aos resultados (modo 'lote'). O
+        # predicado é o que `~contabilizada` gera em cada dialeto: o
+        # planejador só usa o índice se a consulta repete a condição
+        Index(
+            'ix_respostas_questionario_pendentes',
+            'questionario_id',
+            postgresql_where=text('NOT contabilizada'),
+            sqlite_where=text('contabilizada = 0'),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
-        init=False, primary_key=True, index=True, autoincrement=True)
+        init=False, primary_key=True, autoincrement=True)
     nome: Mapped[str] = mapped_column(String, nullable=False)
     email: Mapped[str] = mapped_column(String, nullable=False)
 
@@ -438,14 +571,59 @@ class RespostaQuestionario(Base):
     respostas_questoes: Mapped[list["RespostaQuestao"]] = relationship(
         "RespostaQuestao", back_populates="resposta_questionario")
 
+    # Recibo devolvido ao cliente (e de novo nos reenvios com a mesma
+    # Idempotency-Key); nulo nas respostas anteriores a ele
+    recibo: Mapped[str | None] = mapped_column(
+        String(32), init=False, default=None, nullable=True, unique=True)
+
+    # Idempotency-Key enviada com a submissão
+    chave_idempotencia: Mapped[str | None] = mapped_column(
+        String(255), init=False, default=None, nullable=True)
+
+    # E-mail normalizado, só nos questionários com
+    # `resposta_unica_por_email`: nos demais fica nulo e não colide
+    email_unico: Mapped[str | None] = mapped_column(
+        String, init=False, default=None, nullable=True)
+
+    # Momento da submissão: define a partição das respostas (ver
+    # particoes.py)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now())
+
+    # Já somada aos resultados agregados: na própria transação (modo
+    # 'transacao') ou por `resultados.reprocessar` (modo 'lote')
+    contabilizada: Mapped[bool] = mapped_column(
+        init=False, default=False, server_default=false())
+
 
 # Modelo de Resposta de Questão Individual
 @table_registry.mapped_as_dataclass
 class RespostaQuestao(Base):
     __tablename__ = 'respostas_questao'
+    __table_args__ = (
+        Index(
+            'ix_respostas_questao_resposta_questionario_id',
+            'resposta_questionario_id',
+        ),
+        # Agregação de resultados por opção
+        Index(
+            'ix_respostas_questao_questao_id_opcao_id',
+            'questao_id',
+            'opcao_id',
+        ),
+        Index('ix_respostas_questao_opcao_id', 'opcao_id'),
+        indice_trigrama(
+            'ix_respostas_questao_resposta_texto_trgm', 'resposta_texto'
+        ),
+        # Particionada por mês no PostgreSQL (ver particoes.py)
+        {
+            'postgresql_partition_by': 'RANGE (created_at)',
+            'info': {'colunas_particao': ('created_at',)},
+        },
+    )
 
     id: Mapped[int] = mapped_column(
-        init=False, primary_key=True, index=True, autoincrement=True)
+        init=False, primary_key=True, autoincrement=True)
 
     # Relacionamento com a Resposta do Questionário (quem respondeu)
     resposta_questionario_id: Mapped[int] = mapped_column(
@@ -464,3 +642,52 @@ class RespostaQuestao(Base):
     opcao_id: Mapped[int | None] = mapped_column(
         ForeignKey('opcoes.id'), nullable=True)
     opcao: Mapped["Opcao"] = relationship("Opcao")
+
+    # Mesmo valor do `created_at` da submissão (mesma transação): é a
+    # chave da partição
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now())
+
+    @classmethod
+    def desde(cls, session: Session, *criterios) -> list:
+        """
+        Limite inferior de `created_at` para as respostas das submissões
+        que atendem `criterios`, para o PostgreSQL descartar as partições
+        anteriores à primeira delas. Sem partições (SQLite) não há filtro.
+        """
+        if session.get_bind().dialect.name != 'postgresql':
+            return []
+        inicio = session.scalar(
+            select(func.min(RespostaQuestionario.created_at)).where(
+                *criterios)
+        )
+        return [] if inicio is None else [cls.created_at >= inicio]
+
+
+event.listen(
+    RespostaQuestao.__table__,
+    'after_create',
+    particoes.criar_ao_criar_tabela,
+)
+
+
+# Contadores mantidos incrementalmente a cada submissão (ou pelo
+# reprocessamento em lote das respostas ainda não contabilizadas)
+@table_registry.mapped_as_dataclass
+class ResultadoOpcao(Base):
+    __tablename__ = 'resultados_opcao'
+
+    questao_id: Mapped[int] = mapped_column(
+        ForeignKey('questoes.id'), primary_key=True)
+    opcao_id: Mapped[int] = mapped_column(
+        ForeignKey('opcoes.id'), primary_key=True)
+    total: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+@table_registry.mapped_as_dataclass
+class ResultadoQuestionario(Base):
+    __tablename__ = 'resultados_questionario'
+
+    questionario_id: Mapped[int] = mapped_column(
+        ForeignKey('questionarios.id'), primary_key=True)
+    total_respondentes: Mapped[int] = mapped_column(BigInteger, default=0)
@@ -0,0 +1,25 @@
+from functools import lru_cache
+from io import BytesIO
+from typing import Literal
+
+import qrcode
+from qrcode.image.svg import SvgPathImage
+
+# Cada QR code tem poucos KiB; o limite é por worker
+QR_CODE_CACHE_MAX = 1024
+
+
+@lru_cache(maxsize=QR_CODE_CACHE_MAX)
+def qr_code(
+    otp_auth_url: str, formato: Literal['png', 'svg'] = 'png'
+) -> bytes:
+    """
+    Renderiza o QR code de uma URI de provisionamento OTP. O resultado só
+    depende da URI, então fica em cache; o SVG não depende do PIL.
+    """
+    stream = BytesIO()
+    if formato == 'svg':
+        qrcode.make(otp_auth_url, image_factory=SvgPathImage).save(stream)
+    else:
+        qrcode.make(otp_auth_url).save(stream)
+    return stream.getvalue()
@@ -0,0 +1,164 @@
+"""
+Paginação por chave (keyset): em vez de `OFFSET`, cada página continua
+depois da chave da última linha da página anterior, o que o índice
+resolve com o mesmo custo em qualquer profundidade.
+
+O cliente recebe essa chave como um cursor opaco (`next_cursor`) e o
+devolve para buscar a próxima página. O total de registros é opcional:
+sem filtros, no PostgreSQL, ele é estimado por `pg_class.reltuples`; nos
+outros casos o `count()` exato fica em cache por `PAGINACAO_TOTAL_TTL`
+segundos.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Sequence
+
+from sqlalchemy import Select, Table, func, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from pesquisa.cache import LRUCache
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+totais_cache = LRUCache(max_itens=1024, ttl=settings.PAGINACAO_TOTAL_TTL)
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Pagina:
+    rows: list
+    next_cursor: str | None
+    total_records: int | None = None
+
+
+def codificar_cursor(chave: Sequence[Any]) -> str:
+    dados = json.dumps(
+        [v.isoformat() if isinstance(v, date) else v for v in chave],
+        separators=(',', ':'),
+    ).encode()
+    return base64.urlsafe_b64encode(dados).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor: str, colunas: Sequence) -> tuple:
+    """
+    A chave do cursor com cada valor no tipo da sua coluna. Qualquer
+    divergência é `CursorInvalido`, e não um erro do banco na consulta.
+    """
+    try:
+        chave = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        )
+    except ValueError:
+        raise CursorInvalido('Cursor inválido')
+    if not isinstance(chave, list) or len(chave) != len(colunas):
+        raise CursorInvalido('Cursor inválido')
+    return tuple(
+        _converter(valor, coluna) for valor, coluna in zip(chave, colunas)
+    )
+
+
+def _converter(valor: Any, coluna) -> Any:
+    try:
+        tipo = coluna.type.python_type
+    except NotImplementedError:
+        tipo = None
+
+    # bool é subclasse de int, mas `true` não é um id
+    if tipo is int and type(valor) is int:
+        return valor
+    if tipo is str and isinstance(valor, str):
+        return valor
+    if tipo in {datetime, date} and isinstance(valor, str):
+        try:
+            return tipo.fromisoformat(valor)
+        except ValueError:
+            raise CursorInvalido('Cursor inválido')
+    if tipo is None and isinstance(valor, (int, float, str)):
+        return valor
+    raise CursorInvalido('Cursor inválido')
+
+
+def paginar(  # noqa: PLR0913
+    session: Session,
+    stmt: Select,
+    colunas: Sequence,
+    *,
+    cursor: str | None = None,
+    limite: int = 10,
+    total: bool = False,
+) -> Pagina:
+    """
+    Uma página de `stmt` em ordem crescente de `colunas`, que precisam
+    identificar a linha de forma única (ex.: `(Model.fk, Model.id)`) e,
+    para o custo ser constante, corresponder a um índice.
+    """
+    pagina = stmt.order_by(None).order_by(*colunas)
+    if cursor is not None:
+        chave = decodificar_cursor(cursor, colunas)
+        pagina = pagina.where(tuple_(*colunas) > tuple_(*chave))
+
+    # Com `select(Model)` as linhas são os objetos; senão, tuplas
+    descricoes = stmt.column_descriptions
+    entidade = len(descricoes) == 1 and (
+        descricoes[0]['expr'] is descricoes[0]['entity']
+    )
+
+    # Uma linha a mais diz se existe uma próxima página
+    rows = session.execute(pagina.limit(limite + 1)).all()
+    if entidade:
+        rows = [row[0] for row in rows]
+
+    proximo = None
+    if len(rows) > limite:
+        rows = rows[:limite]
+        ultima = rows[-1]
+        proximo = codificar_cursor([
+            getattr(ultima, coluna.key)
+            if entidade
+            else ultima._mapping[coluna]
+            for coluna in colunas
+        ])
+
+    return Pagina(
+        rows=rows,
+        next_cursor=proximo,
+        total_records=contar(session, stmt) if total else None,
+    )
+
+
+def contar(session: Session, stmt: Select) -> int:
+    """Total de linhas de `stmt`, estimado ou em cache."""
+    origens = stmt.get_final_froms()
+    if (
+        session.get_bind().dialect.name == 'postgresql'
+        and stmt.whereclause is None
+        and len(origens) == 1
+        and isinstance(origens[0], Table)
+    ):
+        estimativa = session.scalar(
+            text(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = CAST(:tabela AS regclass)'
+            ),
+            {'tabela': origens[0].name},
+        )
+        # -1: a tabela nunca foi analisada
+        if estimativa is not None and estimativa >= 0:
+            return estimativa
+
+    compilado = stmt.compile(session.get_bind())
+    chave = (str(compilado), tuple(sorted(compilado.params.items())))
+    total = totais_cache.get(chave)
+    if total is None:
+        total = session.scalar(
+            select(func.count()).select_from(stmt.order_by(None).subquery())
+        )
+        totais_cache.set(chave, total)
+    return total
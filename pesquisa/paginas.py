@@ -0,0 +1,58 @@
+"""
+Página pública de resposta de um questionário (`GET /pesquisa/s/{id}`).
+
+O HTML só muda com a estrutura do questionário, então é renderizado uma
+vez por versão e guardado em um LRU por worker, chaveado por
+`(id, versao)` como o cache de questionários compilados. Cada acesso
+custa a leitura da versão pela chave primária e a troca do nonce.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from pesquisa import templating
+from pesquisa.cache import LRUCache
+from pesquisa.models import Questao, Questionario
+from pesquisa.settings import Settings
+from pesquisa.templating import PaginaRenderizada
+
+settings = Settings()
+
+TEMPLATE = 'responder.html'
+
+cache = LRUCache(
+    max_itens=settings.PAGINA_CACHE_MAX_ITENS,
+    max_bytes=settings.PAGINA_CACHE_MAX_BYTES,
+    tamanho=lambda pagina: pagina.tamanho,
+)
+
+
+def renderizar(session: Session, questionario_id: int) -> PaginaRenderizada:
+    questionario = session.scalar(
+        select(Questionario)
+        .where(Questionario.id == questionario_id)
+        .options(
+            selectinload(Questionario.questoes).selectinload(Questao.opcoes)
+        )
+    )
+    return templating.renderizar(TEMPLATE, questionario=questionario)
+
+
+def obter(session: Session, questionario_id: int) -> PaginaRenderizada | None:
+    """A página do questionário, ou `None` se ele não existir."""
+    versao = session.scalar(
+        select(Questionario.versao).where(Questionario.id == questionario_id)
+    )
+    if versao is None:
+        return None
+
+    pagina = cache.get((questionario_id, versao))
+    if pagina is None:
+        pagina = renderizar(session, questionario_id)
+        invalidar(questionario_id)
+        cache.set((questionario_id, versao), pagina)
+    return pagina
+
+
+def invalidar(questionario_id: int) -> None:
+    cache.remover_se(lambda chave: chave[0] == questionario_id)
@@ -0,0 +1,174 @@
+"""
+Particionamento de `respostas_questao` por mês de `created_at` (só no
+PostgreSQL; no SQLite a tabela é comum).
+
+Cada mês fica em uma partição `respostas_questao_pAAAA_MM`, e o que não
+cabe em nenhuma vai para `respostas_questao_padrao`. As partições dos
+próximos meses são criadas com antecedência (`pesquisa-admin particoes
+criar`, também no `create_all`); as antigas são desanexadas para
+arquivamento (`particoes desanexar`) e viram tabelas comuns, que podem
+ir para um `pg_dump` e ser removidas sem `DELETE` nem vacuum na tabela
+principal.
+
+As consultas por questionário limitam `created_at` a partir da primeira
+submissão da faixa consultada (`RespostaQuestao.desde`), para o
+planejador descartar as partições anteriores.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import PrimaryKeyConstraint, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.compiler import compiles
+
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+TABELA = 'respostas_questao'
+PADRAO = f'{TABELA}_padrao'
+
+_LIMITES = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@compiles(PrimaryKeyConstraint, 'postgresql')
+def _chave_primaria(constraint, compiler, **kw):
+    """
+    Em uma tabela particionada a chave primária precisa conter as colunas
+    da partição. Elas entram só no DDL do PostgreSQL (via
+    `Table.info['colunas_particao']`): para o ORM e o SQLite a chave
+    continua sendo só o `id` autoincremental.
+    """
+    ddl = compiler.visit_primary_key_constraint(constraint, **kw)
+    colunas = constraint.table.info.get('colunas_particao', ())
+    extras = [
+        compiler.preparer.quote(coluna)
+        for coluna in colunas
+        if coluna not in constraint.columns
+    ]
+    if not ddl or not extras:
+        return ddl
+    return f'{ddl[:-1]}, {", ".join(extras)})'
+
+
+@dataclass(frozen=True, slots=True)
+class Particao:
+    nome: str
+    inicio: date | None  # None: a partição padrão
+    fim: date | None
+
+
+def inicio_do_mes(dia: date) -> date:
+    return dia.replace(day=1)
+
+
+def mes_seguinte(mes: date) -> date:
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def nome_particao(mes: date) -> str:
+    return f'{TABELA}_p{mes:%Y_%m}'
+
+
+def listar(conn: Connection) -> list[Particao]:
+    linhas = conn.execute(
+        text(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) '
+            'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = CAST(:tabela AS regclass) '
+            'ORDER BY c.relname'
+        ),
+        {'tabela': TABELA},
+    )
+    particoes = []
+    for nome, limites in linhas:
+        faixa = _LIMITES.search(limites)
+        particoes.append(
+            Particao(
+                nome,
+                date.fromisoformat(faixa[1][:10]) if faixa else None,
+                date.fromisoformat(faixa[2][:10]) if faixa else None,
+            )
+        )
+    return particoes
+
+
+def criar(conn: Connection, a_partir_de: date, meses: int) -> list[str]:
+    """
+    Cria a partição padrão e as de `meses` meses a partir do mês de
+    `a_partir_de`, se ainda não existirem; devolve as criadas.
+
+    Linhas do mês que já estejam na partição padrão são movidas para a
+    nova partição (o PostgreSQL recusa criá-la com elas lá).
+    """
+    existentes = {particao.nome for particao in listar(conn)}
+    criadas = []
+    if PADRAO not in existentes:
+        conn.execute(
+            text(f'CREATE TABLE {PADRAO} PARTITION OF {TABELA} DEFAULT')
+        )
+        criadas.append(PADRAO)
+
+    mes = inicio_do_mes(a_partir_de)
+    for _ in range(meses):
+        proximo = mes_seguinte(mes)
+        nome = nome_particao(mes)
+        if nome not in existentes:
+            faixa = {'inicio': mes, 'fim': proximo}
+            filtro = 'created_at >= :inicio AND created_at < :fim'
+            orfas = conn.scalar(
+                text(f'SELECT count(*) FROM {PADRAO} WHERE {filtro}'), faixa
+            )
+            if orfas:
+                conn.execute(
+                    text(f'ALTER TABLE {TABELA} DETACH PARTITION {PADRAO}')
+                )
+            conn.execute(
+                text(
+                    f'CREATE TABLE {nome} PARTITION OF {TABELA} '
+                    f"FOR VALUES FROM ('{mes}') TO ('{proximo}')"
+                )
+            )
+            if orfas:
+                conn.execute(
+                    text(
+                        f'INSERT INTO {TABELA} SELECT * FROM {PADRAO} '
+                        f'WHERE {filtro}'
+                    ),
+                    faixa,
+                )
+                conn.execute(
+                    text(f'DELETE FROM {PADRAO} WHERE {filtro}'), faixa
+                )
+                conn.execute(
+                    text(
+                        f'ALTER TABLE {TABELA} ATTACH PARTITION {PADRAO} '
+                        'DEFAULT'
+                    )
+                )
+            criadas.append(nome)
+        mes = proximo
+    return criadas
+
+
+def desanexar(conn: Connection, antes_de: date) -> list[str]:
+    """
+    Desanexa as partições mensais que terminam até `antes_de`; elas ficam
+    como tabelas independentes, para arquivar e remover.
+    """
+    desanexadas = []
+    for particao in listar(conn):
+        if particao.fim is not None and particao.fim <= antes_de:
+            conn.execute(
+                text(f'ALTER TABLE {TABELA} DETACH PARTITION {particao.nome}')
+            )
+            desanexadas.append(particao.nome)
+    return desanexadas
+
+
+def criar_ao_criar_tabela(target, connection, **kw):
+    """`after_create` da tabela: a padrão e os próximos meses."""
+    if connection.dialect.name == 'postgresql':
+        criar(connection, date.today(), settings.PARTICOES_ANTECEDENCIA_MESES)
@@ -0,0 +1,153 @@
+"""
+Profiling sob demanda de um worker em produção (opt-in, com
+`PROFILING_HABILITADO`; desligado, nada disto é instalado).
+
+- `amostrar`: perfil por amostragem do processo inteiro. Uma thread lê
+  `sys._current_frames()` a cada intervalo e conta as pilhas de todas as
+  outras threads (incluindo a do event loop), no formato "collapsed" do
+  flamegraph.pl / speedscope (`a;b;c 42`). Não instrumenta nada: o custo
+  fica na thread de amostragem e só enquanto ela roda.
+- `ProfilerMiddleware`: `?__profile=1` em qualquer rota, para
+  superusuários, roda a requisição sob o cProfile e devolve o resumo do
+  pstats no lugar da resposta. Desde o Python 3.12 o cProfile usa
+  `sys.monitoring` e vê também as threads do threadpool (rotas
+  síncronas); requisições concorrentes entram no mesmo perfil.
+
+Só um perfil de cada tipo roda por vez no processo.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette.responses import PlainTextResponse
+
+from pesquisa.database import engine
+from pesquisa.security import get_current_active_user, get_current_user
+
+
+class ProfilerOcupado(Exception):
+    pass
+
+
+_amostragem = threading.Lock()
+_cprofile = threading.Lock()
+
+
+def _pilha(frame) -> str:
+    nomes = []
+    while frame is not None:
+        codigo = frame.f_code
+        nomes.append(
+            f'{frame.f_globals.get("__name__", "?")}:{codigo.co_qualname}'
+        )
+        frame = frame.f_back
+    return ';'.join(reversed(nomes))
+
+
+def amostrar(duracao: float, intervalo: float) -> Counter:
+    """Conta as pilhas de todas as threads durante `duracao` segundos."""
+    if not _amostragem.acquire(blocking=False):
+        raise ProfilerOcupado('Já há uma amostragem em andamento')
+    try:
+        propria = threading.get_ident()
+        nomes = {t.ident: t.name for t in threading.enumerate()}
+        pilhas = Counter()
+        fim = time.monotonic() + duracao
+        while time.monotonic() < fim:
+            for ident, frame in sys._current_frames().items():
+                if ident != propria:
+                    thread = nomes.get(ident, ident)
+                    pilhas[f'{thread};{_pilha(frame)}'] += 1
+            time.sleep(intervalo)
+        return pilhas
+    finally:
+        _amostragem.release()
+
+
+def colapsar(pilhas: Counter) -> str:
+    return ''.join(
+        f'{pilha} {quantidade}\n' for pilha, quantidade in pilhas.most_common()
+    )
+
+
+async def _superusuario(scope) -> bool:
+    cabecalhos = dict(scope['headers'])
+    autorizacao = cabecalhos.get(b'authorization', b'').decode('latin-1')
+    esquema, _, token = autorizacao.partition(' ')
+    if esquema.lower() != 'bearer' or not token:
+        return False
+    with Session(engine) as session:
+        try:
+            user = await get_current_active_user(
+                await get_current_user(session=session, token=token)
+            )
+        except HTTPException:
+            return False
+    return user.is_superuser
+
+
+class ProfilerMiddleware:
+    """`?__profile=1`: resumo do cProfile da requisição (superusuários)."""
+
+    def __init__(self, app, linhas: int = 40):
+        self.app = app
+        self.linhas = linhas
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or b'__profile=' not in scope.get(
+            'query_string', b''
+        ):
+            await self.app(scope, receive, send)
+            return
+        consulta = parse_qs(scope['query_string'].decode('latin-1'))
+        if consulta.get('__profile') != ['1'] or not await _superusuario(
+            scope
+        ):
+            await self.app(scope, receive, send)
+            return
+        if not _cprofile.acquire(blocking=False):
+            await PlainTextResponse(
+                'Já há um perfil em andamento', HTTPStatus.CONFLICT
+            )(scope, receive, send)
+            return
+
+        status = None
+
+        async def descartar(mensagem):
+            # A resposta original é trocada pelo relatório
+            nonlocal status
+            if mensagem['type'] == 'http.response.start':
+                status = mensagem['status']
+
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            perfil.enable()
+            try:
+                await self.app(scope, receive, descartar)
+            finally:
+                perfil.disable()
+        finally:
+            _cprofile.release()
+        decorrido = (time.perf_counter() - inicio) * 1000
+
+        saida = io.StringIO()
+        saida.write(
+            f'{scope["method"]} {scope["path"]} -> {status} '
+            f'em {decorrido:.1f} ms\n\n'
+        )
+        pstats.Stats(perfil, stream=saida).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(self.linhas)
+        await PlainTextResponse(
+            saida.getvalue(), headers={'X-Profile-Status': str(status)}
+        )(scope, receive, send)
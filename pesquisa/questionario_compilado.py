@@ -0,0 +1,119 @@
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from pesquisa.cache import LRUCache
+from pesquisa.models import Opcao, Questao, Questionario, TipoQuestao
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+
+@dataclass(frozen=True, slots=True)
+class QuestaoCompilada:
+    id: int
+    tipo: TipoQuestao
+    limite_respostas: int | None
+    opcoes: frozenset[int]
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionarioCompilado:
+    """
+    Estrutura imutável com tudo o que a validação de uma submissão precisa
+    saber sobre um questionário, sem tocar no banco.
+    """
+
+    id: int
+    versao: int
+    questoes: Mapping[int, QuestaoCompilada]
+    tamanho: int
+    resposta_unica_por_email: bool = False
+
+
+def _tamanho_estimado(questoes: dict[int, QuestaoCompilada]) -> int:
+    tamanho = sys.getsizeof(questoes)
+    for questao in questoes.values():
+        tamanho += sys.getsizeof(questao) + sys.getsizeof(questao.opcoes)
+        tamanho += sys.getsizeof(0) * len(questao.opcoes)
+    return tamanho
+
+
+def compilar(
+    session: Session, questionario_id: int, versao: int
+) -> QuestionarioCompilado:
+    """Carrega o questionário, as questões e as opções e os compila."""
+    opcoes: dict[int, set[int]] = {}
+    for opcao_id, questao_id in session.execute(
+        select(Opcao.id, Opcao.questao_id)
+        .join(Questao, Opcao.questao_id == Questao.id)
+        .where(Questao.questionario_id == questionario_id)
+    ):
+        opcoes.setdefault(questao_id, set()).add(opcao_id)
+
+    questoes = {
+        questao_id: QuestaoCompilada(
+            id=questao_id,
+            tipo=tipo,
+            limite_respostas=limite_respostas,
+            opcoes=frozenset(opcoes.get(questao_id, ())),
+        )
+        for questao_id, tipo, limite_respostas in session.execute(
+            select(Questao.id, Questao.tipo, Questao.limite_respostas).where(
+                Questao.questionario_id == questionario_id
+            )
+        )
+    }
+
+    return QuestionarioCompilado(
+        id=questionario_id,
+        versao=versao,
+        questoes=MappingProxyType(questoes),
+        tamanho=_tamanho_estimado(questoes),
+        resposta_unica_por_email=session.scalar(
+            select(Questionario.resposta_unica_por_email).where(
+                Questionario.id == questionario_id
+            )
+        ),
+    )
+
+
+# Cache por worker, chaveado por (id, versao)
+cache = LRUCache(
+    max_itens=settings.QUESTIONARIO_CACHE_MAX_ITENS,
+    max_bytes=settings.QUESTIONARIO_CACHE_MAX_BYTES,
+    tamanho=lambda compilado: compilado.tamanho,
+)
+
+
+def obter(
+    session: Session, questionario_id: int
+) -> QuestionarioCompilado | None:
+    """
+    Devolve o questionário compilado, ou `None` se ele não existir.
+
+    A única consulta no caminho quente é a leitura da versão pela chave
+    primária; como a versão faz parte da chave do cache, uma alteração
+    feita por outro worker também invalida a entrada local.
+    """
+    versao = session.scalar(
+        select(Questionario.versao).where(Questionario.id == questionario_id)
+    )
+    if versao is None:
+        return None
+
+    compilado = cache.get((questionario_id, versao))
+    if compilado is None:
+        compilado = compilar(session, questionario_id, versao)
+        invalidar(questionario_id)
+        cache.set((questionario_id, versao), compilado)
+    return compilado
+
+
+def invalidar(questionario_id: int) -> None:
+    """Remove todas as versões de um questionário do cache local."""
+    cache.remover_se(lambda chave: chave[0] == questionario_id)
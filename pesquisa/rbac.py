@@ -0,0 +1,222 @@
+"""
+Matriz de papéis e permissões.
+
+O grafo inteiro (papéis, permissões e módulos) é carregado de uma vez em
+uma matriz de bits: cada papel vira um inteiro em que cada bit ligado é
+uma permissão. Uma permissão ocupa dois bits, um pelo nome (como as
+verificações sempre fizeram) e outro pelo nome qualificado com o módulo,
+`'<modulo>:<nome>'`; assim a verificação de "todas as permissões
+exigidas" é um único `&` entre inteiros.
+
+A matriz é recarregada quando `rbac_versao.versao` muda, o que é
+consultado no máximo a cada `RBAC_VERIFICACAO_INTERVALO` segundos.
+"""
+
+import time
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from threading import Lock
+from typing import Iterable
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from pesquisa.database import get_session
+from pesquisa.models import (
+    Module,
+    Permission,
+    RbacVersao,
+    Role,
+    RolePermissions,
+)
+from pesquisa.security import UsuarioAutenticado, get_current_active_user
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+
+@dataclass(slots=True)
+class MatrizRBAC:
+    versao: int
+    # nome do papel -> bit do papel
+    papeis: dict[str, int]
+    # nome (ou 'modulo:nome') da permissão -> bit da permissão
+    permissoes: dict[str, int]
+    # bit do papel -> máscara das permissões do papel
+    permissoes_papel: list[int]
+    # máscaras já calculadas por conjunto de papéis de um usuário
+    _usuarios: dict[frozenset[str], tuple[int, int]] = field(
+        default_factory=dict
+    )
+
+    @classmethod
+    def construir(
+        cls,
+        versao: int,
+        papeis: Iterable[tuple[int, str]],
+        permissoes: Iterable[tuple[int, str, str]],
+        ligacoes: Iterable[tuple[int, int]],
+    ) -> 'MatrizRBAC':
+        """
+        - `papeis`: pares (id, nome);
+        - `permissoes`: triplas (id, nome, título do módulo);
+        - `ligacoes`: pares (id do papel, id da permissão).
+        """
+        indice_papel: dict[int, int] = {}
+        nomes_papel: dict[str, int] = {}
+        for papel_id, nome in papeis:
+            indice_papel[papel_id] = nomes_papel[nome] = len(nomes_papel)
+
+        bits: dict[str, int] = {}
+        mascara_permissao: dict[int, int] = {}
+        for permissao_id, nome, modulo in permissoes:
+            mascara = 0
+            for chave in (nome, f'{modulo}:{nome}'):
+                mascara |= 1 << bits.setdefault(chave, len(bits))
+            mascara_permissao[permissao_id] = mascara
+
+        permissoes_papel = [0] * len(nomes_papel)
+        for papel_id, permissao_id in ligacoes:
+            permissoes_papel[indice_papel[papel_id]] |= mascara_permissao[
+                permissao_id
+            ]
+
+        return cls(versao, nomes_papel, bits, permissoes_papel)
+
+    def mascara_papeis(self, nomes: Iterable[str]) -> int:
+        mascara = 0
+        for nome in nomes:
+            if nome in self.papeis:
+                mascara |= 1 << self.papeis[nome]
+        return mascara
+
+    def mascara_permissoes(self, nomes: Iterable[str]) -> int | None:
+        """`None` se alguma permissão não existe: ninguém a possui."""
+        mascara = 0
+        for nome in nomes:
+            if nome not in self.permissoes:
+                return None
+            mascara |= 1 << self.permissoes[nome]
+        return mascara
+
+    def usuario(self, papeis: frozenset[str]) -> tuple[int, int]:
+        """Máscaras (papéis, permissões) de um conjunto de papéis."""
+        mascaras = self._usuarios.get(papeis)
+        if mascaras is None:
+            permissoes = 0
+            for nome in papeis:
+                if nome in self.papeis:
+                    permissoes |= self.permissoes_papel[self.papeis[nome]]
+            mascaras = (self.mascara_papeis(papeis), permissoes)
+            self._usuarios[papeis] = mascaras
+        return mascaras
+
+
+def carregar(session: Session, versao: int) -> MatrizRBAC:
+    return MatrizRBAC.construir(
+        versao,
+        session.execute(select(Role.id, Role.name)),
+        session.execute(
+            select(Permission.id, Permission.name, Module.title).join(
+                Module, Module.id == Permission.module_id
+            )
+        ),
+        session.execute(
+            select(RolePermissions.role_id, RolePermissions.permission_id)
+        ),
+    )
+
+
+class RBAC:
+    """Mantém a matriz atual do worker e a recarrega quando a versão muda."""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.matriz: MatrizRBAC | None = None
+        self._verificado_em = 0.0
+        self._lock = Lock()
+
+    def _recente(self) -> bool:
+        return (
+            self.matriz is not None
+            and time.monotonic() - self._verificado_em < self.intervalo
+        )
+
+    def obter(self, session: Session) -> MatrizRBAC:
+        if self._recente():
+            return self.matriz
+
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos
+            if self._recente():
+                return self.matriz
+            versao = session.scalar(select(RbacVersao.versao)) or 0
+            if self.matriz is None or self.matriz.versao != versao:
+                self.matriz = carregar(session, versao)
+            self._verificado_em = time.monotonic()
+        return self.matriz
+
+    def invalidar(self) -> None:
+        self.matriz = None
+
+
+rbac = RBAC(intervalo=settings.RBAC_VERIFICACAO_INTERVALO)
+
+
+def require(roles: Iterable[str] = (), permissions: Iterable[str] = ()):
+    """
+    Dependência que exige pelo menos um dos papéis e todas as permissões.
+    Superusuários passam sempre; `'is_superuser'` exige um superusuário.
+
+        @router.get('/admin', dependencies=[Depends(require(roles=['admin']))])
+    """
+    roles = frozenset(roles)
+    permissions = frozenset(permissions)
+    somente_superusuario = 'is_superuser' in permissions
+    permissions -= {'is_superuser'}
+    # (matriz, papéis exigidos, permissões exigidas), recalculadas só
+    # quando a matriz muda
+    exigidas = (None, 0, 0)
+
+    def verificar(
+        current_user: UsuarioAutenticado = Depends(get_current_active_user),
+        session: Session = Depends(get_session),
+    ) -> UsuarioAutenticado:
+        nonlocal exigidas
+        if current_user.is_superuser:
+            return current_user
+        if somente_superusuario:
+            raise HTTPException(
+                status_code=HTTPStatus.FORBIDDEN,
+                detail='Not enough permissions',
+            )
+        if not roles and not permissions:
+            return current_user
+
+        matriz = rbac.obter(session)
+        if exigidas[0] is not matriz:
+            exigidas = (
+                matriz,
+                matriz.mascara_papeis(roles),
+                matriz.mascara_permissoes(permissions),
+            )
+        _, papeis_exigidos, permissoes_exigidas = exigidas
+        papeis, permissoes = matriz.usuario(current_user.roles)
+
+        if roles and not papeis & papeis_exigidos:
+            raise HTTPException(
+                status_code=HTTPStatus.FORBIDDEN,
+                detail='Not enough role permissions',
+            )
+        if permissions and (
+            permissoes_exigidas is None
+            or permissoes & permissoes_exigidas != permissoes_exigidas
+        ):
+            raise HTTPException(
+                status_code=HTTPStatus.FORBIDDEN,
+                detail='Not enough permissions',
+            )
+        return current_user
+
+    return verificar
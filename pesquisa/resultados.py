@@ -0,0 +1,185 @@
+"""
+Resultados agregados por questionário.
+
+`resultados_opcao` guarda um contador por (questao_id, opcao_id) e
+`resultados_questionario` o total de respondentes. Cada submissão já
+somada tem `RespostaQuestionario.contabilizada` verdadeiro.
+
+Com `RESULTADOS_MODO='transacao'` os contadores são atualizados na mesma
+transação de cada submissão, que já é gravada como contabilizada; com
+`'lote'` eles são atualizados por `reprocessar`, que marca e soma as
+submissões pendentes. A marcação é por linha e não por faixa de ids: uma
+transação que pegou um id menor e fez commit depois de outra com id maior
+é contabilizada no reprocessamento seguinte. Depois de criar as tabelas
+em uma base que já tem respostas, rode `python -m pesquisa.resultados`
+uma vez antes de receber tráfego.
+"""
+
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from pesquisa.models import (
+    Questionario,
+    RespostaQuestao,
+    RespostaQuestionario,
+    ResultadoOpcao,
+    ResultadoQuestionario,
+)
+
+# Submissões marcadas e somadas por vez no reprocessamento
+LOTE = 5000
+
+
+def _insert(session: Session, modelo):
+    if session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(modelo)
+    return postgresql.insert(modelo)
+
+
+def _somar_opcoes(session: Session, contagens: Counter) -> None:
+    if not contagens:
+        return
+    stmt = _insert(session, ResultadoOpcao)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['questao_id', 'opcao_id'],
+        set_={'total': ResultadoOpcao.total + stmt.excluded.total},
+    )
+    # Ordem fixa de chaves: transações concorrentes travam as linhas na
+    # mesma sequência e não entram em deadlock
+    session.execute(
+        stmt,
+        [
+            {'questao_id': questao_id, 'opcao_id': opcao_id, 'total': total}
+            for (questao_id, opcao_id), total in sorted(contagens.items())
+        ],
+    )
+
+
+def _somar_respondentes(
+    session: Session, respondentes: dict[int, int]
+) -> None:
+    if not respondentes:
+        return
+    stmt = _insert(session, ResultadoQuestionario)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['questionario_id'],
+        set_={
+            'total_respondentes': ResultadoQuestionario.total_respondentes
+            + stmt.excluded.total_respondentes,
+        },
+    )
+    session.execute(
+        stmt,
+        [
+            {'questionario_id': questionario_id, 'total_respondentes': total}
+            for questionario_id, total in sorted(respondentes.items())
+        ],
+    )
+
+
+def registrar(
+    session: Session,
+    respostas: Iterable[tuple[int, int]],
+    linhas: Iterable[dict],
+) -> None:
+    """
+    Soma aos contadores as submissões recém inseridas, na transação atual.
+    Elas devem ter sido inseridas com `contabilizada=True`.
+
+    - `respostas`: pares (questionario_id, resposta_questionario_id);
+    - `linhas`: as linhas de `RespostaQuestao` inseridas para elas.
+    """
+    respondentes = Counter(questionario_id for questionario_id, _ in respostas)
+    contagens = Counter(
+        (linha['questao_id'], linha['opcao_id'])
+        for linha in linhas
+        if linha['opcao_id'] is not None
+    )
+
+    _somar_opcoes(session, contagens)
+    _somar_respondentes(session, respondentes)
+
+
+def _marcar_pendentes(
+    session: Session, questionario_id: int, limite: int
+) -> list[int]:
+    """Marca como contabilizadas até `limite` submissões pendentes."""
+    pendentes = (
+        select(RespostaQuestionario.id)
+        .where(
+            RespostaQuestionario.questionario_id == questionario_id,
+            ~RespostaQuestionario.contabilizada,
+        )
+        .order_by(RespostaQuestionario.id)
+        .limit(limite)
+    )
+    return session.scalars(
+        update(RespostaQuestionario)
+        .where(RespostaQuestionario.id.in_(pendentes))
+        .values(contabilizada=True)
+        .returning(RespostaQuestionario.id),
+        execution_options={'synchronize_session': False},
+    ).all()
+
+
+def reprocessar(
+    session: Session, questionario_id: int, lote: int = LOTE
+) -> int:
+    """
+    Contabiliza as submissões pendentes de um questionário. Devolve
+    quantas foram contabilizadas.
+    """
+    _somar_respondentes(session, {questionario_id: 0})
+    # Trava o resumo: dois reprocessamentos simultâneos não disputam as
+    # mesmas submissões pendentes
+    session.execute(
+        select(ResultadoQuestionario.questionario_id)
+        .where(ResultadoQuestionario.questionario_id == questionario_id)
+        .with_for_update()
+    )
+
+    # O UPDATE ... RETURNING marca e devolve as mesmas linhas: o que
+    # fizer commit depois dele continua pendente para a próxima vez
+    total = 0
+    while ids := _marcar_pendentes(session, questionario_id, lote):
+        faixa = (RespostaQuestionario.id.in_(ids),)
+        contagens = Counter({
+            (questao_id, opcao_id): quantidade
+            for questao_id, opcao_id, quantidade in session.execute(
+                select(
+                    RespostaQuestao.questao_id,
+                    RespostaQuestao.opcao_id,
+                    func.count(),
+                )
+                .where(
+                    RespostaQuestao.resposta_questionario_id.in_(ids),
+                    *RespostaQuestao.desde(session, *faixa),
+                    RespostaQuestao.opcao_id.is_not(None),
+                )
+                .group_by(RespostaQuestao.questao_id, RespostaQuestao.opcao_id)
+            )
+        })
+        _somar_opcoes(session, contagens)
+        total += len(ids)
+
+    _somar_respondentes(session, {questionario_id: total})
+    return total
+
+
+def reprocessar_todos(session: Session) -> int:
+    total = 0
+    for questionario_id in session.scalars(select(Questionario.id)).all():
+        total += reprocessar(session, questionario_id)
+        session.commit()
+    return total
+
+
+if __name__ == '__main__':
+    from pesquisa.database import engine
+
+    with Session(engine) as session:
+        print(f'{reprocessar_todos(session)} respostas contabilizadas')
@@ -0,0 +1,38 @@
+import asyncio
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from pesquisa import profiler
+from pesquisa.rbac import require
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+router = APIRouter(
+    prefix='/admin',
+    tags=['admin'],
+    dependencies=[Depends(require(permissions=['is_superuser']))],
+)
+
+
+@router.get('/profile', response_class=PlainTextResponse)
+async def perfil_amostrado(
+    segundos: Annotated[
+        float, Query(gt=0, le=settings.PROFILING_DURACAO_MAX)
+    ] = 10,
+    intervalo_ms: Annotated[float, Query(ge=1, le=1000)] = 10,
+):
+    """
+    Amostra as pilhas de todas as threads do worker por `segundos` e
+    devolve as pilhas colapsadas (`flamegraph.pl`, speedscope).
+    """
+    try:
+        pilhas = await asyncio.to_thread(
+            profiler.amostrar, segundos, intervalo_ms / 1000
+        )
+    except profiler.ProfilerOcupado as e:
+        raise HTTPException(status_code=HTTPStatus.CONFLICT, detail=str(e))
+    return PlainTextResponse(profiler.colapsar(pilhas))
@@ -0,0 +1,32 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pesquisa.database import get_async_session
+from pesquisa.schemas import Token
+from pesquisa.security import autenticar_usuario, create_access_token
+
+router = APIRouter(prefix='/auth', tags=['auth'])
+T_AsyncSession = Annotated[AsyncSession, Depends(get_async_session)]
+T_OAuthForm = Annotated[OAuth2PasswordRequestForm, Depends()]
+
+
+@router.post('/token', response_model=Token)
+async def login_for_access_token(
+    form_data: T_OAuthForm, session: T_AsyncSession
+):
+    user = await autenticar_usuario(
+        session, form_data.username, form_data.password
+    )
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Incorrect username or password',
+            headers={'WWW-Authenticate': 'Bearer'},
+        )
+
+    access_token = create_access_token(data={'sub': user.username})
+    return {'access_token': access_token, 'token_type': 'bearer'}
@@ -0,0 +1,89 @@
+import logging
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from pesquisa import busca
+from pesquisa.database import get_session
+from pesquisa.schemas import BuscaPublic, ResultadoBuscaPublic
+from pesquisa.security import get_current_active_user
+from pesquisa.settings import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+router = APIRouter(prefix='/busca', tags=['busca'])
+T_Session = Annotated[Session, Depends(get_session)]
+# Trechos com menos de 3 caracteres não têm trigramas: seriam varreduras
+T_Termo = Annotated[str, Query(min_length=3, max_length=100)]
+T_Limite = Annotated[int, Query(ge=1, le=100)]
+
+
+def _responder(
+    response: Response, nome: str, termo: str, session: Session, **kwargs
+) -> BuscaPublic:
+    resultados, took_ms = busca.buscar_medindo(session, nome, termo, **kwargs)
+    if took_ms > settings.BUSCA_LATENCIA_ALVO_MS:
+        logger.warning(
+            'Busca lenta em %s (%.1f ms, alvo %s ms): %r',
+            nome,
+            took_ms,
+            settings.BUSCA_LATENCIA_ALVO_MS,
+            termo,
+        )
+    response.headers['Server-Timing'] = f'busca;dur={took_ms:.1f}'
+    return BuscaPublic(
+        termo=termo,
+        resultados=[
+            ResultadoBuscaPublic(id=r.id, texto=r.texto, score=r.score)
+            for r in resultados
+        ],
+        took_ms=round(took_ms, 3),
+    )
+
+
+@router.get(
+    '/usuarios',
+    response_model=BuscaPublic,
+    dependencies=[Depends(get_current_active_user)],
+)
+def buscar_usuarios(
+    response: Response,
+    session: T_Session,
+    q: T_Termo,
+    limit: T_Limite = 20,
+):
+    return _responder(response, 'usuarios', q, session, limite=limit)
+
+
+@router.get('/questionarios', response_model=BuscaPublic)
+def buscar_questionarios(
+    response: Response,
+    session: T_Session,
+    q: T_Termo,
+    limit: T_Limite = 20,
+):
+    return _responder(response, 'questionarios', q, session, limite=limit)
+
+
+@router.get(
+    '/respostas',
+    response_model=BuscaPublic,
+    dependencies=[Depends(get_current_active_user)],
+)
+def buscar_respostas(
+    response: Response,
+    session: T_Session,
+    q: T_Termo,
+    questionario_id: int | None = None,
+    limit: T_Limite = 20,
+):
+    return _responder(
+        response,
+        'respostas',
+        q,
+        session,
+        limite=limit,
+        questionario_id=questionario_id,
+    )
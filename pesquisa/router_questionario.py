@@ -1,145 +1,393 @@
-from ast import Dict
+import hashlib
+import uuid
 from http import HTTPStatus
-from typing import Annotated, List, Optional
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Form, HTTPException, Path, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from starlette.datastructures import FormData
 
-from pesquisa.database import get_session
+from pesquisa import (
+    duplicidade,
+    paginacao,
+    paginas,
+    questionario_compilado,
+    resultados,
+    templating,
+)
+from pesquisa.database import get_async_session, get_session
+from pesquisa.exportacao import exportar_csv, exportar_ndjson
+from pesquisa.ingestao import FilaCheia, StatusRecibo, fila_ingestao
 from pesquisa.models import (
     Opcao,
     Questao,
     Questionario,
     RespostaQuestao,
     RespostaQuestionario,
+    ResultadoOpcao,
+    ResultadoQuestionario,
     TipoQuestao,
-    User,
 )
-from pesquisa.schemas import QuestionarioSchema
-from pesquisa.security import get_current_active_user
+from pesquisa.questionario_compilado import QuestionarioCompilado
+from pesquisa.schemas import (
+    TIPOS_PERGUNTA,
+    OpcaoPublic,
+    PaginaParams,
+    PaginaRespostasParams,
+    PerguntaPublic,
+    QuestionarioList,
+    QuestionarioPublic,
+    QuestionarioSchema,
+    ReciboPublic,
+    RespostaQuestionarioList,
+    RespostaQuestionarioPublic,
+    ResultadoOpcaoPublic,
+    ResultadoQuestaoPublic,
+    ResultadosPublic,
+)
+from pesquisa.security import UsuarioAutenticado, get_current_active_user
+from pesquisa.settings import Settings
 
-templates = Jinja2Templates(directory='pesquisa/templates')
+settings = Settings()
 
 router = APIRouter(prefix='/pesquisa', tags=['pesquisa'])
 T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_active_user)]
+T_AsyncSession = Annotated[AsyncSession, Depends(get_async_session)]
+T_CurrentUser = Annotated[UsuarioAutenticado, Depends(get_current_active_user)]
 
 
-@router.get("/questionarios/", response_class=HTMLResponse)
+@router.get('/questionarios/novo', response_class=HTMLResponse)
 async def form_get_questionario(request: Request):
-    return templates.TemplateResponse(
-        "formQuestionario.html", {"request": request}
+    return templating.templates.TemplateResponse(
+        'formQuestionario.html', {'request': request}
     )
 
 
-@router.post("/questionarios/")
-def criar_questionario(  # noqa: PLR0913, PLR0917
-    session: T_Session,
-    titulo: str = Form(...),
-    descricao: str = Form(...),
-    perguntas: List[str] = Form(...),
-    tipos: List[str] = Form(...),
-    opcoes: List[Optional[str]] = Form(...),
-    limite_respostas: List[Optional[int]] | None = None,
-):
-    questionario = None
+@router.get('/s/{questionario_id}', response_class=HTMLResponse)
+async def pagina_questionario(questionario_id: int, session: T_AsyncSession):
+    """
+    Página pública para responder o questionário. O HTML vem do cache de
+    páginas renderizadas (por versão); só o nonce do script é por
+    requisição.
+    """
+    pagina = await session.run_sync(paginas.obter, questionario_id)
+    if pagina is None:
+        raise HTTPException(
+            status_code=404, detail='Questionário não encontrado'
+        )
+    nonce = templating.novo_nonce()
+    return HTMLResponse(
+        pagina.com_nonce(nonce),
+        headers={
+            'Content-Security-Policy': (
+                f"script-src 'nonce-{nonce}'; object-src 'none'; "
+                "base-uri 'none'"
+            ),
+        },
+    )
+
+
+def _etag(*partes) -> str:
+    return 'W/"' + '-'.join(str(parte) for parte in partes) + '"'
+
+
+def _nao_modificado(request: Request, etag: str) -> bool:
+    cabecalho = request.headers.get('if-none-match')
+    if not cabecalho:
+        return False
+    candidatos = {valor.strip() for valor in cabecalho.split(',')}
+    return bool(candidatos & {'*', etag, etag.removeprefix('W/')})
+
+
+async def _paginar(
+    session: AsyncSession, stmt, colunas, params: PaginaParams
+) -> paginacao.Pagina:
     try:
-        session.begin()
-        # Cria o questionário
-        questionario = Questionario(
-            titulo=titulo,
-            descricao=descricao,
-            questoes=[]
+        return await session.run_sync(
+            paginacao.paginar,
+            stmt,
+            colunas,
+            cursor=params.cursor,
+            limite=params.page_size,
+            total=params.include_total,
+        )
+    except paginacao.CursorInvalido as erro:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail=str(erro)
         )
 
-        # Adiciona o questionário na sessão
-        session.add(questionario)
-
-        # "Flush" para garantir que questionario.id esteja disponível
-        session.flush()
-
-        # Agora podemos usar o `questionario.id` para criar as questões
-        for index, valor in enumerate(tipos):
-            questao = None
-            if valor == 'texto':
-                questao = Questao(
-                    texto=perguntas[index],
-                    tipo=TipoQuestao.TEXT,
-                    questionario_id=questionario.id,  # `questionario.id` já está disponível  # noqa: E501
-                    limite_respostas=None,
-                    opcoes=[]
-                )
-                session.add(questao)
-            elif valor == 'select_single':
-                questao = Questao(
-                    texto=perguntas[index],
-                    tipo=TipoQuestao.SELECT_SINGLE,  # type: ignore
-                    questionario_id=questionario.id,
-                    limite_respostas=(limite_respostas[index] if limite_respostas and limite_respostas[index] else None),  # noqa: E501
-                    opcoes=[]
-                )
-                session.add(questao)
-                session.flush()  # Faz "flush" para garantir que `questao.id`
-                # esteja disponível
-
-                # Adiciona as opções
-                for i, v in enumerate(opcoes[index:]):
-                    if not opcoes[i]:
-                        break
-                    db_opcao = Opcao(
-                        texto=str(opcoes[i]),
-                        questao_id=questao.id,
-                        questao=questao,
-                    )
-                    session.add(db_opcao)
-            else:
-                questao = Questao(
-                    texto=perguntas[index],
-                    tipo=TipoQuestao.SELECT_MULTIPLE,  # type: ignore
-                    questionario_id=questionario.id,
-                    limite_respostas=(limite_respostas[index] if limite_respostas and limite_respostas[index] else None),  # noqa: E501
-                    opcoes=[]
-                )
-                session.add(questao)
-                session.flush()  # Faz "flush" para garantir que `questao.id`
-                # esteja disponível
-
-                # Adiciona as opções
-                for i, v in enumerate(opcoes[index:]):
-                    if not opcoes[i]:
-                        break
-                    db_opcao = Opcao(
-                        texto=str(opcoes[i]),
-                        questao_id=questao.id,
-                        questao=questao,
-                    )
-                    session.add(db_opcao)
-
-        # Commita a transação para salvar no banco de dados
-        session.commit()
-
-        # Retorna o questionário com os dados salvos
-        session.refresh(questionario)
-        return questionario
+
+def _com_arvore():
+    # Carrega questões e opções em duas consultas extras, qualquer que seja
+    # o tamanho do questionário (ou da página)
+    return selectinload(Questionario.questoes).selectinload(Questao.opcoes)
+
+
+@router.get('/questionarios/', response_model=QuestionarioList)
+async def listar_questionarios(
+    request: Request,
+    response: Response,
+    session: T_AsyncSession,
+    params: Annotated[PaginaParams, Query()],
+):
+    pagina = await _paginar(
+        session,
+        select(Questionario.id, Questionario.versao),
+        (Questionario.id,),
+        params,
+    )
+
+    # A página não mudou se os ids, as versões e o total são os mesmos
+    assinatura = hashlib.sha1(
+        repr((pagina.rows, pagina.next_cursor, pagina.total_records)).encode()
+    )
+    etag = _etag(assinatura.hexdigest()[:16])
+    if _nao_modificado(request, etag):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+        )
+
+    questionarios = await session.scalars(
+        select(Questionario)
+        .where(Questionario.id.in_([id_ for id_, _ in pagina.rows]))
+        .order_by(Questionario.id)
+        .options(_com_arvore())
+    )
+    response.headers['ETag'] = etag
+    return QuestionarioList(
+        rows=[
+            QuestionarioPublic.model_validate(questionario)
+            for questionario in questionarios
+        ],
+        next_cursor=pagina.next_cursor,
+        total_records=pagina.total_records,
+    )
+
+
+@router.get(
+    '/questionarios/{questionario_id}', response_model=QuestionarioPublic
+)
+async def obter_questionario(
+    questionario_id: int,
+    request: Request,
+    response: Response,
+    session: T_AsyncSession,
+):
+    # A versão muda a cada alteração da estrutura: basta ela para
+    # responder 304 sem carregar a árvore
+    versao = await session.scalar(
+        select(Questionario.versao).where(Questionario.id == questionario_id)
+    )
+    if versao is None:
+        raise HTTPException(
+            status_code=404, detail='Questionário não encontrado'
+        )
+
+    etag = _etag(questionario_id, versao)
+    if _nao_modificado(request, etag):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+        )
+
+    questionario = await session.scalar(
+        select(Questionario)
+        .where(Questionario.id == questionario_id)
+        .options(_com_arvore())
+    )
+    response.headers['ETag'] = etag
+    return QuestionarioPublic.model_validate(questionario)
+
+
+def _questionario_do_formulario(
+    form: FormData, limites: list[str]
+) -> QuestionarioSchema:
+    """Monta o `QuestionarioSchema` a partir dos campos do formulário."""
+    perguntas = form.getlist('perguntas')
+    opcoes = form.getlist('opcoes')
+    lista = []
+    for index, tipo in enumerate(form.getlist('tipos')):
+        pergunta = {
+            'texto': perguntas[index] if index < len(perguntas) else '',
+            'tipo': tipo,
+            'opcoes': [],
+            'limite_respostas': (
+                limites[index]
+                if index < len(limites) and limites[index]
+                else None
+            ),
+        }
+        if tipo != 'texto':
+            # As opções da pergunta começam em `opcoes[index]` e vão até o
+            # primeiro campo vazio
+            for texto in opcoes[index:]:
+                if not texto:
+                    break
+                pergunta['opcoes'].append({'texto': texto})
+        lista.append(pergunta)
+
+    return QuestionarioSchema.model_validate({
+        'titulo': form.get('titulo'),
+        'descricao': form.get('descricao'),
+        'perguntas': lista,
+        'resposta_unica_por_email': bool(form.get('respostaUnicaPorEmail')),
+    })
+
+
+def inserir_questionario(
+    session: Session, dados: QuestionarioSchema
+) -> QuestionarioPublic:
+    """
+    Insere o questionário inteiro em três comandos, qualquer que seja o
+    número de perguntas e opções: um para o questionário e um
+    `insert().returning()` em lote para cada nível da árvore.
+    """
+    questionario_id, versao = session.execute(
+        insert(Questionario)
+        .values(
+            titulo=dados.titulo,
+            descricao=dados.descricao,
+            resposta_unica_por_email=dados.resposta_unica_por_email,
+        )
+        .returning(Questionario.id, Questionario.versao)
+    ).one()
+
+    questao_ids = []
+    if dados.perguntas:
+        questao_ids = session.scalars(
+            insert(Questao).returning(
+                Questao.id, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    'texto': pergunta.texto,
+                    'tipo': TIPOS_PERGUNTA[pergunta.tipo],
+                    'questionario_id': questionario_id,
+                    'limite_respostas': (
+                        None
+                        if pergunta.tipo == 'texto'
+                        else pergunta.limite_respostas
+                    ),
+                }
+                for pergunta in dados.perguntas
+            ],
+        ).all()
+
+    opcoes = [
+        {'texto': opcao.texto, 'questao_id': questao_id}
+        for pergunta, questao_id in zip(dados.perguntas, questao_ids)
+        if pergunta.tipo != 'texto'
+        for opcao in pergunta.opcoes
+    ]
+    opcao_ids = iter(
+        session.scalars(
+            insert(Opcao).returning(Opcao.id, sort_by_parameter_order=True),
+            opcoes,
+        ).all()
+        if opcoes
+        else ()
+    )
+
+    # A resposta é montada com os ids devolvidos, sem reler a árvore
+    return QuestionarioPublic(
+        id=questionario_id,
+        versao=versao,
+        titulo=dados.titulo,
+        descricao=dados.descricao,
+        resposta_unica_por_email=dados.resposta_unica_por_email,
+        perguntas=[
+            PerguntaPublic(
+                id=questao_id,
+                texto=pergunta.texto,
+                tipo=pergunta.tipo,
+                limite_respostas=(
+                    None
+                    if pergunta.tipo == 'texto'
+                    else pergunta.limite_respostas
+                ),
+                opcoes=[
+                    OpcaoPublic(id=next(opcao_ids), texto=opcao.texto)
+                    for opcao in pergunta.opcoes
+                ]
+                if pergunta.tipo != 'texto'
+                else [],
+            )
+            for pergunta, questao_id in zip(dados.perguntas, questao_ids)
+        ],
+    )
+
+
+@router.post(
+    '/questionarios/',
+    response_model=QuestionarioPublic,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'application/json': {
+                    'schema': QuestionarioSchema.model_json_schema()
+                },
+                'application/x-www-form-urlencoded': {},
+            },
+        }
+    },
+)
+async def criar_questionario(request: Request, session: T_AsyncSession):
+    """
+    Cria um questionário a partir de um `QuestionarioSchema` em JSON ou dos
+    campos do formulário de cadastro (`perguntas`, `tipos`, `opcoes` e o
+    parâmetro de consulta `limite_respostas`).
+    """
+    try:
+        if request.headers.get('content-type', '').startswith(
+            'application/json'
+        ):
+            dados = QuestionarioSchema.model_validate_json(
+                await request.body()
+            )
+        else:
+            dados = _questionario_do_formulario(
+                await request.form(),
+                request.query_params.getlist('limite_respostas'),
+            )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    try:
+        questionario = await session.run_sync(inserir_questionario, dados)
+        await session.commit()
     except Exception as e:
         # Em caso de erro, faz o rollback da transação
-        if questionario:
-            session.delete(questionario)
-            session.flush()
-            session.commit()
-        session.rollback()
+        await session.rollback()
         # Lança a exceção novamente para que o FastAPI\
         #  possa capturá-la e retornar a resposta adequada
         raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao criar questionário: {str(e)}"
+            status_code=500, detail=f'Erro ao criar questionário: {str(e)}'
         )
 
+    questionario_compilado.invalidar(questionario.id)
+    paginas.invalidar(questionario.id)
+    return questionario
+
 
 # Endpoint para adicionar uma questão a um questionário
-@router.post("/questionarios/{questionario_id}/questoes/")
+@router.post(
+    '/questionarios/{questionario_id}/questoes/',
+    response_model=PerguntaPublic,
+)
 def adicionar_questao(
     session: T_Session,
     questionario_id: int,
@@ -147,124 +395,441 @@ def adicionar_questao(
     tipo: TipoQuestao,
     opcoes: list[str] = None,
 ):
-    questionario = session.query(Questionario).filter(
-        Questionario.id == questionario_id).first()
+    questionario = (
+        session
+        .query(Questionario)
+        .filter(Questionario.id == questionario_id)
+        .first()
+    )
     if not questionario:
         raise HTTPException(
-            status_code=404,
-            detail="Questionário não encontrado")
+            status_code=404, detail='Questionário não encontrado'
+        )
 
-    questao = Questao(texto=texto, tipo=tipo, questionario_id=questionario_id)
+    questao = Questao(
+        texto=texto,
+        tipo=tipo,
+        questionario_id=questionario_id,
+        limite_respostas=None,
+        opcoes=[],
+    )
 
     session.add(questao)
-    session.commit()
-    session.refresh(questao)
+    session.flush()
 
     # Se a questão for do tipo SELECT, adicionar opções
-    if tipo in [TipoQuestao.SELECT_SINGLE, TipoQuestao.SELECT_MULTIPLE] and opcoes:  # noqa: E501, PLR6201
+    if (
+        tipo in {TipoQuestao.SELECT_SINGLE, TipoQuestao.SELECT_MULTIPLE}
+        and opcoes
+    ):
         for opcao_texto in opcoes:
-            opcao = Opcao(texto=opcao_texto, questao_id=questao.id)
+            opcao = Opcao(
+                texto=opcao_texto, questao_id=questao.id, questao=questao
+            )
             session.add(opcao)
-        session.commit()
 
-    return questao
+    # Nova versão da estrutura: submissões passam a validar contra ela
+    questionario.versao += 1
+    session.commit()
+    questionario_compilado.invalidar(questionario_id)
+    paginas.invalidar(questionario_id)
+    session.refresh(questao)
+
+    return PerguntaPublic.model_validate(questao)
+
+
+def _montar_respostas(
+    compilado: QuestionarioCompilado,
+    respostas: dict[int, list[str]],
+) -> list[dict]:
+    """
+    Valida as respostas contra o questionário compilado e devolve as linhas
+    de `RespostaQuestao` prontas para o insert em lote.
+    """
+    linhas = []
+    for questao_id, resposta in respostas.items():
+        questao = compilado.questoes.get(questao_id)
+        if not questao:
+            raise HTTPException(
+                status_code=404, detail=f'Questão {questao_id} não encontrada'
+            )
+        if not resposta:
+            continue
+
+        # Questão do tipo texto
+        if questao.tipo == TipoQuestao.TEXT:
+            linhas.append({
+                'questao_id': questao_id,
+                'resposta_texto': resposta[0],
+                'opcao_id': None,
+            })
+            continue
+
+        # Questão de seleção única considera apenas a primeira opção
+        if questao.tipo == TipoQuestao.SELECT_SINGLE:
+            selecionadas = resposta[:1]
 
+        # Questão de seleção múltipla com limite de respostas
+        else:
+            if len(resposta) > (questao.limite_respostas or len(resposta)):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f'Você só pode selecionar até '
+                    f'{questao.limite_respostas} opções para a '
+                    f'questão {questao_id}',
+                )
+            selecionadas = resposta
 
-@router.post("/questionarios/{questionario_id}/respostas/")
-def responder_questionario(
+        # Validar cada opção contra o conjunto compilado
+        vistas = set()
+        for opcao in selecionadas:
+            opcao_id = int(opcao) if str(opcao).isdigit() else None
+            if opcao_id not in questao.opcoes:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f'Opção {opcao} não encontrada para a '
+                    f'questão {questao_id}',
+                )
+            # Repetida, seria gravada e contada duas vezes
+            if opcao_id in vistas:
+                raise HTTPException(
+                    status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                    detail=f'Opção {opcao} repetida na questão {questao_id}',
+                )
+            vistas.add(opcao_id)
+            linhas.append({
+                'questao_id': questao_id,
+                'resposta_texto': None,
+                'opcao_id': opcao_id,
+            })
+    return linhas
+
+
+def _reenvio(recibo: str) -> JSONResponse:
+    """A resposta de uma submissão repetida com a mesma Idempotency-Key."""
+    cabecalhos = {'Idempotent-Replayed': 'true'}
+    if settings.INGESTAO_ASSINCRONA:
+        estado = fila_ingestao.recibos.get(recibo)
+        status = estado.status if estado else StatusRecibo.gravado
+        return JSONResponse(
+            status_code=HTTPStatus.ACCEPTED,
+            content={'recibo': recibo, 'status': status.value},
+            headers=cabecalhos,
+        )
+    return JSONResponse(
+        content={
+            'message': 'Respostas enviadas com sucesso!',
+            'recibo': recibo,
+        },
+        headers=cabecalhos,
+    )
+
+
+def _ja_respondeu() -> HTTPException:
+    return HTTPException(
+        status_code=HTTPStatus.CONFLICT,
+        detail='Este e-mail já respondeu o questionário',
+    )
+
+
+async def _repetida(
+    session: AsyncSession,
+    questionario_id: int,
+    idempotency_key: str | None,
+    erro: IntegrityError,
+) -> JSONResponse:
+    """
+    O insert colidiu com um índice único: a submissão foi repetida em
+    outro worker, ou já saiu dos filtros locais.
+    """
+    await session.rollback()
+    if idempotency_key:
+        anterior = await session.run_sync(
+            duplicidade.recibo_original, questionario_id, idempotency_key
+        )
+        if anterior:
+            return _reenvio(anterior)
+    if 'email_unico' in str(erro.orig):
+        raise _ja_respondeu()
+    raise erro
+
+
+@router.post('/questionarios/{questionario_id}/respostas/')
+async def responder_questionario(  # noqa: PLR0913, PLR0917
     questionario_id: int,
     nome: str,
     email: str,
     respostas: dict[int, list[str]],
-    session: T_Session
+    session: T_AsyncSession,
+    idempotency_key: Annotated[
+        str | None, Header(min_length=1, max_length=255)
+    ] = None,
 ):
     """
     Recebe as respostas de um questionário.
     - `respostas`: dicionário onde a chave é o ID da questão e o valor é:
         - para questões de texto: uma string com a resposta;
         - para questões de seleção: uma lista de IDs das opções selecionadas.
+
+    A estrutura do questionário vem do cache de questionários compilados,
+    toda a validação é feita em memória e as respostas são gravadas com um
+    único insert em lote, na mesma transação do cabeçalho.
+
+    Com `INGESTAO_ASSINCRONA` ligada, a submissão validada vai para a fila
+    de ingestão e a resposta é 202 com o recibo para consulta posterior.
+
+    Um reenvio com o mesmo cabeçalho `Idempotency-Key` devolve o recibo da
+    primeira submissão, sem gravar de novo (`Idempotent-Replayed: true`).
+    Em questionários com `resposta_unica_por_email`, uma segunda resposta
+    do mesmo e-mail é recusada com 409 (ver `duplicidade.py`).
     """
-    questionario = session.query(Questionario).filter(
-        Questionario.id == questionario_id
-    ).first()
-    if not questionario:
+    compilado = await session.run_sync(
+        questionario_compilado.obter, questionario_id
+    )
+    if not compilado:
         raise HTTPException(
-            status_code=404,
-            detail="Questionário não encontrado"
+            status_code=404, detail='Questionário não encontrado'
         )
 
-    # Criar a resposta do questionário
-    resposta_questionario = RespostaQuestionario(
-        nome=nome, email=email, questionario_id=questionario_id
-    )
-    session.add(resposta_questionario)
-    session.commit()
-    session.refresh(resposta_questionario)
+    if idempotency_key:
+        recibo = await session.run_sync(
+            duplicidade.reenvio, questionario_id, idempotency_key
+        )
+        if recibo:
+            return _reenvio(recibo)
 
-    # Percorrer as respostas e associá-las às questões
-    for questao_id, resposta in respostas.items():
-        questao = session.query(Questao).filter(
-            Questao.id == questao_id, Questao.questionario_id == questionario_id
-        ).first()
-        if not questao:
+    email_unico = None
+    if compilado.resposta_unica_por_email:
+        email_unico = duplicidade.normalizar_email(email)
+        if await session.run_sync(
+            duplicidade.ja_respondeu, questionario_id, email_unico
+        ):
+            raise _ja_respondeu()
+
+    # Valida tudo antes de gravar: uma resposta inválida não deixa
+    # cabeçalho órfão no banco
+    linhas = _montar_respostas(compilado, respostas)
+
+    if settings.INGESTAO_ASSINCRONA:
+        try:
+            recibo = fila_ingestao.enfileirar(
+                questionario_id,
+                nome,
+                email,
+                linhas,
+                chave_idempotencia=idempotency_key,
+                email_unico=email_unico,
+            )
+        except FilaCheia:
             raise HTTPException(
-                status_code=404, detail=f"Questão {questao_id} não encontrada"
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Fila de respostas cheia, tente novamente',
+                headers={'Retry-After': '1'},
             )
+        # Já na fila, para um reenvio enquanto está pendente receber este
+        # recibo; a fila desfaz o registro se a gravação falhar
+        duplicidade.registrar(
+            questionario_id, recibo, idempotency_key, email_unico
+        )
+        return JSONResponse(
+            status_code=HTTPStatus.ACCEPTED,
+            content={'recibo': recibo, 'status': 'pendente'},
+        )
 
-        # Questão do tipo texto
-        if questao.tipo == TipoQuestao.TEXT:
-            resposta_questao = RespostaQuestao(
-                resposta_texto=resposta[0],
-                questao_id=questao_id,
-                resposta_questionario_id=resposta_questionario.id
+    recibo = uuid.uuid4().hex
+    try:
+        resposta_questionario_id = await session.scalar(
+            insert(RespostaQuestionario)
+            .values(
+                nome=nome,
+                email=email,
+                questionario_id=questionario_id,
+                recibo=recibo,
+                chave_idempotencia=idempotency_key,
+                email_unico=email_unico,
+                contabilizada=settings.RESULTADOS_MODO == 'transacao',
             )
+            .returning(RespostaQuestionario.id)
+        )
+    except IntegrityError as erro:
+        return await _repetida(session, questionario_id, idempotency_key, erro)
 
-        # Questão de seleção única
-        elif questao.tipo == TipoQuestao.SELECT_SINGLE:
-            opcao = session.query(Opcao).filter(
-                Opcao.id == int(resposta[0]),
-                Opcao.questao_id == questao_id
-            ).first()
-            if not opcao:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Opção {resposta[0]} não encontrada\
-                         para a questão {questao_id}"
-                )
-            resposta_questao = RespostaQuestao(
-                opcao_id=opcao.id,
-                questao_id=questao_id,
-                resposta_questionario_id=resposta_questionario.id
+    if linhas:
+        for linha in linhas:
+            linha['resposta_questionario_id'] = resposta_questionario_id
+        await session.execute(insert(RespostaQuestao), linhas)
+    if settings.RESULTADOS_MODO == 'transacao':
+        await session.run_sync(
+            resultados.registrar,
+            [(questionario_id, resposta_questionario_id)],
+            linhas,
+        )
+
+    await session.commit()
+    duplicidade.registrar(
+        questionario_id, recibo, idempotency_key, email_unico
+    )
+    return {'message': 'Respostas enviadas com sucesso!', 'recibo': recibo}
+
+
+@router.get('/respostas/recibos/{recibo}', response_model=ReciboPublic)
+async def status_recibo(recibo: str):
+    estado = await fila_ingestao.status(recibo)
+    if estado is None:
+        raise HTTPException(status_code=404, detail='Recibo não encontrado')
+    return ReciboPublic(
+        recibo=recibo,
+        status=estado.status,
+        resposta_questionario_id=estado.resposta_questionario_id,
+        detalhe=estado.detalhe,
+    )
+
+
+@router.get(
+    '/questionarios/{questionario_id}/respostas/',
+    response_model=RespostaQuestionarioList,
+    dependencies=[Depends(get_current_active_user)],
+)
+async def listar_respostas(
+    questionario_id: int,
+    session: T_AsyncSession,
+    params: Annotated[PaginaRespostasParams, Query()],
+):
+    questionario = await session.get(Questionario, questionario_id)
+    if not questionario:
+        raise HTTPException(
+            status_code=404, detail='Questionário não encontrado'
+        )
+
+    # Percorre o índice (questionario_id, id)
+    pagina = await _paginar(
+        session,
+        select(RespostaQuestionario).where(
+            RespostaQuestionario.questionario_id == questionario_id
+        ),
+        (RespostaQuestionario.id,),
+        params,
+    )
+    return RespostaQuestionarioList(
+        rows=[
+            RespostaQuestionarioPublic.model_validate(resposta)
+            for resposta in pagina.rows
+        ],
+        next_cursor=pagina.next_cursor,
+        total_records=pagina.total_records,
+    )
+
+
+@router.get(
+    '/questionarios/{questionario_id}/resultados',
+    response_model=ResultadosPublic,
+    dependencies=[Depends(get_current_active_user)],
+)
+async def resultados_questionario(
+    questionario_id: int, session: T_AsyncSession
+):
+    """
+    Contagem e percentual de cada opção, lidos dos contadores agregados:
+    o custo é proporcional ao número de opções, não ao de respostas.
+    O percentual é sobre o total de respondentes do questionário.
+    """
+    questionario = await session.get(Questionario, questionario_id)
+    if not questionario:
+        raise HTTPException(
+            status_code=404, detail='Questionário não encontrado'
+        )
+
+    resumo = await session.get(ResultadoQuestionario, questionario_id)
+    total_respondentes = resumo.total_respondentes if resumo else 0
+
+    linhas = await session.execute(
+        select(
+            Questao.id,
+            Questao.texto,
+            Opcao.id,
+            Opcao.texto,
+            func.coalesce(ResultadoOpcao.total, 0),
+        )
+        .join(Opcao, Opcao.questao_id == Questao.id)
+        .outerjoin(
+            ResultadoOpcao,
+            and_(
+                ResultadoOpcao.questao_id == Questao.id,
+                ResultadoOpcao.opcao_id == Opcao.id,
+            ),
+        )
+        .where(Questao.questionario_id == questionario_id)
+        .order_by(Questao.id, Opcao.id)
+    )
+
+    questoes: dict[int, ResultadoQuestaoPublic] = {}
+    for questao_id, questao_texto, opcao_id, opcao_texto, total in linhas:
+        questao = questoes.setdefault(
+            questao_id,
+            ResultadoQuestaoPublic(questao_id=questao_id, texto=questao_texto),
+        )
+        questao.opcoes.append(
+            ResultadoOpcaoPublic(
+                opcao_id=opcao_id,
+                texto=opcao_texto,
+                total=total,
+                percentual=(
+                    round(100 * total / total_respondentes, 2)
+                    if total_respondentes
+                    else 0.0
+                ),
             )
+        )
 
-        # Questão de seleção múltipla com limite de respostas
-        elif questao.tipo == TipoQuestao.SELECT_MULTIPLE:
-            if len(resposta) > (questao.limite_respostas or len(resposta)):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Você só pode selecionar até\
-                         {questao.limite_respostas} opções para a\
-                             questão {questao_id}"
-                )
+    return ResultadosPublic(
+        questionario_id=questionario_id,
+        total_respondentes=total_respondentes,
+        questoes=list(questoes.values()),
+    )
 
-            # Validar cada opção
-            for opcao_id in resposta:
-                opcao = session.query(Opcao).filter(
-                    Opcao.id == int(opcao_id),
-                    Opcao.questao_id == questao_id
-                ).first()
-                if not opcao:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Opção {opcao_id} não encontrada para a\
-                             questão {questao_id}"
-                    )
-                resposta_questao = RespostaQuestao(
-                    opcao_id=opcao.id,
-                    questao_id=questao_id,
-                    resposta_questionario_id=resposta_questionario.id
-                )
-                session.add(resposta_questao)
 
-    session.commit()
-    return {"message": "Respostas enviadas com sucesso!"}
+@router.get(
+    '/questionarios/{questionario_id}/export',
+    dependencies=[Depends(get_current_active_user)],
+)
+async def exportar_respostas(
+    questionario_id: int,
+    session: T_AsyncSession,
+    formato: Literal['csv', 'ndjson'] = Query('csv', alias='format'),
+):
+    """
+    Exporta as respostas em fluxo, uma linha por respondente, lendo de um
+    cursor no servidor: a memória fica constante qualquer que seja o
+    número de respostas. Exige autenticação (nome e e-mail de quem
+    respondeu).
+    """
+    questionario = await session.get(Questionario, questionario_id)
+    if not questionario:
+        raise HTTPException(
+            status_code=404, detail='Questionário não encontrado'
+        )
+
+    if formato == 'csv':
+        questoes = (
+            await session.execute(
+                select(Questao.id, Questao.texto)
+                .where(Questao.questionario_id == questionario_id)
+                .order_by(Questao.id)
+            )
+        ).all()
+        conteudo = exportar_csv(questionario_id, questoes)
+        media_type = 'text/csv; charset=utf-8'
+    else:
+        conteudo = exportar_ndjson(questionario_id)
+        media_type = 'application/x-ndjson'
+
+    return StreamingResponse(
+        conteudo,
+        media_type=media_type,
+        headers={
+            'Content-Disposition': (
+                'attachment; '
+                f'filename="questionario-{questionario_id}.{formato}"'
+            ),
+        },
+    )
@@ -1,9 +1,16 @@
 from datetime import datetime
 from typing import List, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    field_validator,
+)
 
-from pesquisa.models import TodoState
+from pesquisa.models import TipoQuestao, TodoState
 
 # from pesquisa.permissioes_schema import RolePublic
 
@@ -46,7 +53,8 @@ class UserQrCode(UserFull):
 
 class ListUserFull(BaseModel):
     rows: list[UserFull]
-    total_records: int
+    next_cursor: str | None = None
+    total_records: int | None = None
 
 
 class UserPasswordUpdate(BaseModel):
@@ -60,8 +68,8 @@ class UpdatePasswordRequest(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
-    total_records: int
-    page: int
+    next_cursor: str | None = None
+    total_records: int | None = None
     page_size: int
 
 
@@ -72,12 +80,15 @@ class UserRolesIn(BaseModel):
 
 class UserRolesOut(UserRolesIn):
     id: int
+
+
 #    role: RolePublic
 
 
 class UserRolesList(BaseModel):
     rows: list[UserRolesOut]
-    total_records: int
+    next_cursor: str | None = None
+    total_records: int | None = None
 
 
 class Token(BaseModel):
@@ -115,36 +126,155 @@ class TodoUpdate(BaseModel):
 ###############################################
 #  ########### pesquisa ######################
 
+# Tipo de pergunta como vem do formulário <-> tipo de questão do modelo
+TIPOS_PERGUNTA = {
+    'texto': TipoQuestao.TEXT,
+    'select_single': TipoQuestao.SELECT_SINGLE,
+    'select_multiple': TipoQuestao.SELECT_MULTIPLE,
+}
+TIPOS_QUESTAO = {tipo: nome for nome, tipo in TIPOS_PERGUNTA.items()}
+
+
 class OpcaoSchema(BaseModel):
-    texto: str = Field(..., title="Texto da Opção",
-                       description="Texto da opção de resposta")
+    texto: str = Field(
+        ..., title='Texto da Opção', description='Texto da opção de resposta'
+    )
 
 
 class PerguntaSchema(BaseModel):
-    texto: str = Field(..., title="Texto da Pergunta",
-                       description="Texto da pergunta")
+    texto: str = Field(
+        ..., title='Texto da Pergunta', description='Texto da pergunta'
+    )
     tipo: str = Field(
-        ..., title="Tipo da Pergunta",
+        ...,
+        title='Tipo da Pergunta',
         description="Tipo da pergunta ('texto', 'select_single', 'select_multiple')",  # noqa: E501
-        pattern="^(texto|select_single|select_multiple)$"
+        pattern='^(texto|select_single|select_multiple)$',
+    )
+    opcoes: List[OpcaoSchema] = Field(
+        default_factory=list,
+        title='Opções',
+        description='Lista de opções\
+                                     para perguntas de múltipla escolha',
     )
-    opcoes: List[OpcaoSchema] = Field(default_factory=list,
-                                title="Opções",
-                                description="Lista de opções\
-                                     para perguntas de múltipla escolha")
     limite_respostas: Optional[int] = Field(
-        None, title="Limite de Respostas",
-        description="Limite opcional de respostas para a pergunta"
+        None,
+        title='Limite de Respostas',
+        description='Limite opcional de respostas para a pergunta',
     )
 
 
 class QuestionarioSchema(BaseModel):
-    titulo: str = Field(...,
-                        title="Título do Questionário",
-                        description="Título do questionário")
-    descricao: Optional[str] = Field(None, title="Descrição",
-                                     description="Descrição do questionário")
+    titulo: str = Field(
+        ...,
+        title='Título do Questionário',
+        description='Título do questionário',
+    )
+    descricao: Optional[str] = Field(
+        None, title='Descrição', description='Descrição do questionário'
+    )
     perguntas: List[PerguntaSchema] = Field(
-        ..., title="Perguntas",
-        description="Lista de perguntas no questionário"
+        ...,
+        title='Perguntas',
+        description='Lista de perguntas no questionário',
+    )
+    resposta_unica_por_email: bool = Field(
+        False,
+        title='Resposta única por e-mail',
+        description='Recusa uma segunda resposta do mesmo e-mail',
     )
+
+
+class OpcaoPublic(OpcaoSchema):
+    id: int
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PerguntaPublic(PerguntaSchema):
+    id: int
+    opcoes: List[OpcaoPublic] = Field(default_factory=list)
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator('tipo', mode='before')
+    @classmethod
+    def tipo_do_modelo(cls, valor):
+        return TIPOS_QUESTAO.get(valor, valor)
+
+
+class QuestionarioPublic(QuestionarioSchema):
+    id: int
+    versao: int
+    perguntas: List[PerguntaPublic] = Field(
+        ..., validation_alias=AliasChoices('perguntas', 'questoes')
+    )
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PaginaParams(BaseModel):
+    """Parâmetros de query das listagens paginadas (ver `paginacao.py`)."""
+
+    cursor: str | None = None
+    page_size: int = Field(10, ge=1, le=100)
+    include_total: bool = False
+
+
+class PaginaRespostasParams(PaginaParams):
+    page_size: int = Field(50, ge=1, le=500)
+
+
+class QuestionarioList(BaseModel):
+    rows: list[QuestionarioPublic]
+    next_cursor: str | None = None
+    total_records: int | None = None
+
+
+class RespostaQuestionarioPublic(BaseModel):
+    id: int
+    nome: str
+    email: str
+    recibo: str | None = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RespostaQuestionarioList(BaseModel):
+    rows: list[RespostaQuestionarioPublic]
+    next_cursor: str | None = None
+    total_records: int | None = None
+
+
+class ReciboPublic(BaseModel):
+    recibo: str
+    status: Literal['pendente', 'gravado', 'erro']
+    resposta_questionario_id: int | None = None
+    detalhe: str | None = None
+
+
+class ResultadoOpcaoPublic(BaseModel):
+    opcao_id: int
+    texto: str
+    total: int
+    percentual: float
+
+
+class ResultadoQuestaoPublic(BaseModel):
+    questao_id: int
+    texto: str
+    opcoes: list[ResultadoOpcaoPublic] = Field(default_factory=list)
+
+
+class ResultadosPublic(BaseModel):
+    questionario_id: int
+    total_respondentes: int
+    questoes: list[ResultadoQuestaoPublic]
+
+
+class ResultadoBuscaPublic(BaseModel):
+    id: int
+    texto: str
+    score: float
+
+
+class BuscaPublic(BaseModel):
+    termo: str
+    resultados: list[ResultadoBuscaPublic]
+    took_ms: float
@@ -1,30 +1,112 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
-from pwdlib import PasswordHash
-from sqlalchemy import select
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from zoneinfo import ZoneInfo
 
+from pesquisa.cache import LRUCache
 from pesquisa.database import get_session
-from pesquisa.models import User
+from pesquisa.hashing import pool_hashing, pwd_context
+from pesquisa.models import (
+    Module,
+    Permission,
+    Role,
+    RolePermissions,
+    User,
+    UserRoles,
+)
 from pesquisa.schemas import TokenData
 from pesquisa.settings import Settings
 
-pwd_context = PasswordHash.recommended()
 oauth2_schema = OAuth2PasswordBearer(tokenUrl='auth/token')
 settings = Settings()
 
 
+@dataclass(frozen=True, slots=True)
+class UsuarioAutenticado:
+    """
+    Retrato imutável do usuário autenticado, com os nomes dos papéis e das
+    permissões já resolvidos: as verificações de autorização viram
+    consultas a conjuntos, sem acesso ao banco.
+    """
+
+    id: int
+    username: str
+    email: str
+    full_name: str
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+    roles: frozenset[str]
+    permissions: frozenset[str]
+
+
+# Chave: (username, iat do token). O TTL curto limita por quanto tempo uma
+# alteração feita por outro worker pode passar despercebida
+usuarios_cache = LRUCache(
+    max_itens=settings.USUARIO_CACHE_MAX_ITENS,
+    ttl=settings.USUARIO_CACHE_TTL,
+)
+
+
+def carregar_usuario_autenticado(
+    session: Session, username: str
+) -> UsuarioAutenticado | None:
+    user = session.scalar(select(User).where(User.username == username))
+    if user is None:
+        return None
+
+    roles, permissions = set(), set()
+    for role, permission in session.execute(
+        select(Role.name, Permission.name)
+        .select_from(UserRoles)
+        .join(Role, Role.id == UserRoles.role_id)
+        .outerjoin(RolePermissions, RolePermissions.role_id == Role.id)
+        .outerjoin(Permission, Permission.id == RolePermissions.permission_id)
+        .where(UserRoles.user_id == user.id)
+    ):
+        roles.add(role)
+        if permission is not None:
+            permissions.add(permission)
+
+    return UsuarioAutenticado(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=user.is_active,
+        is_staff=user.is_staff,
+        is_superuser=user.is_superuser,
+        roles=frozenset(roles),
+        permissions=frozenset(permissions),
+    )
+
+
+def _invalidar_usuario(mapper, connection, target):
+    usuarios_cache.remover_se(lambda chave: chave[0] == target.username)
+
+
+def _invalidar_usuarios(mapper, connection, target):
+    usuarios_cache.clear()
+
+
+for _evento in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(User, _evento, _invalidar_usuario)
+    for _modelo in (UserRoles, Role, RolePermissions, Permission, Module):
+        event.listen(_modelo, _evento, _invalidar_usuarios)
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
-    to_encode.update({'exp': expire})
+    agora = datetime.now(tz=ZoneInfo('UTC'))
+    expire = agora + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({'exp': expire, 'iat': agora})
     encoded_jwt = encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -43,6 +125,31 @@ def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
 
+async def autenticar_usuario(
+    session: AsyncSession, username: str, password: str
+) -> User | None:
+    """
+    Verifica as credenciais no pool de hashing. Se o hash da senha foi
+    gerado com parâmetros do Argon2 diferentes dos atuais, ele é refeito
+    e gravado aqui, sem o usuário perceber.
+    """
+    user = await session.scalar(select(User).where(User.username == username))
+    if user is None:
+        # Mesmo custo de uma senha errada: não revela quais usuários existem
+        await pool_hashing.hash(password)
+        return None
+
+    valido, novo_hash = await pool_hashing.verify_and_update(
+        password, user.password
+    )
+    if not valido:
+        return None
+    if novo_hash is not None:
+        user.password = novo_hash
+        await session.commit()
+    return user
+
+
 async def get_current_user(
     session: Session = Depends(get_session),
     token: str = Depends(oauth2_schema),
@@ -66,12 +173,13 @@ async def get_current_user(
     except ExpiredSignatureError:
         raise credentials_exception
 
-    user = session.scalar(
-        select(User).where(User.username == token_data.username)
-    )
-
+    chave = (token_data.username, payload.get('iat'))
+    user = usuarios_cache.get(chave)
     if user is None:
-        raise credentials_exception
+        user = carregar_usuario_autenticado(session, token_data.username)
+        if user is None:
+            raise credentials_exception
+        usuarios_cache.set(chave, user)
 
     if not user.is_active:
         raise HTTPException(status_code=400, detail='Inactive user')
@@ -80,7 +188,7 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
 ):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail='Inactive user')
@@ -103,36 +211,32 @@ def verify_token(token: str):
 
 
 def verify_user_with_roles_and_permissions(
-    current_user: User, roles: list[str] = [], permissions: list[str] = []
+    current_user: UsuarioAutenticado,
+    roles: list[str] = [],
+    permissions: list[str] = [],
 ):
     # Se o usuário for um superusuário, ele tem todas as permissões
     if current_user.is_superuser:
         return current_user
 
     if 'is_superuser' in permissions:
-        return current_user
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions",
+        )
 
     # Verifica se o usuário tem pelo menos um dos papéis (roles) exigidos
-    if roles and not any(role.role.name in roles for role in current_user.roles):
+    if roles and current_user.roles.isdisjoint(roles):
         raise HTTPException(
             status_code=403,
             detail="Not enough role permissions",
         )
 
     # Verifica se o usuário tem todas as permissões exigidas
-    if permissions:
-        user_permissions = {
-            perm.name
-            for role in current_user.roles
-            for perm in role.role.permissions
-        }
-        if not all(perm in user_permissions for perm in permissions):
-            raise HTTPException(
-                status_code=403,
-                detail="Not enough permissions",
-            )
-
-    raise HTTPException(
-        status_code=403,
-        detail="Not enough permissions",
-    )
+    if permissions and not current_user.permissions.issuperset(permissions):
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions",
+        )
+
+    return current_user
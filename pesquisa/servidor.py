@@ -0,0 +1,205 @@
+"""
+Servidor de produção com vários processos: `pesquisa-admin servidor`.
+
+O processo mestre importa a aplicação uma vez (preload), compila os
+templates, abre o socket e cria os workers com `fork`; cada um roda um
+`uvicorn.Server` no socket herdado, dividindo com os outros a memória do
+que o mestre carregou (copy-on-write). O mestre não atende requisições:
+só repõe os workers que saem e repassa os sinais.
+
+- `SERVIDOR_WORKERS` workers (0: um por CPU disponível). O número
+  resolvido é exportado no ambiente antes do preload, para `database.py`
+  dividir `DB_CONEXOES_MAX` entre os workers.
+- Logo depois do fork o worker descarta os pools das engines herdados do
+  mestre (`dispose(close=False)`): conexões nunca são divididas entre
+  processos.
+- Depois de `SERVIDOR_MAX_REQUISICOES` requisições (mais até
+  `SERVIDOR_MAX_REQUISICOES_VARIACAO`, sorteado por worker para que não
+  saiam todos juntos) o worker para de aceitar conexões, termina as que
+  tem e sai; o mestre cria outro no lugar, o que limita o crescimento da
+  memória.
+
+SIGTERM/SIGINT encerram os workers graciosamente (o lifespan drena a
+fila de ingestão); SIGHUP recicla todos. Worker que não sai em
+`SERVIDOR_TIMEOUT_ENCERRAMENTO` segundos recebe SIGKILL.
+"""
+
+import logging
+import os
+import random
+import signal
+import socket
+import time
+
+import uvicorn
+
+from pesquisa.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Worker que sai com erro antes disso é reposto com atraso, para uma
+# falha na inicialização não virar um laço de forks
+VIDA_MINIMA = 1.0  # segundos
+
+# Entre parar de aceitar conexões e encerrar, na reciclagem
+ESPERA_RECICLAGEM = 0.5  # segundos
+
+
+def numero_workers(configurado: int = 0) -> int:
+    if configurado > 0:
+        return configurado
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # sem sched_getaffinity (macOS)
+        return os.cpu_count() or 1
+
+
+class ServidorReciclavel(uvicorn.Server):
+    """
+    `uvicorn.Server` que sai depois de `maximo` requisições. O
+    `limit_max_requests` do uvicorn encerra na hora e fecha sem resposta
+    uma conexão aceita logo antes; aqui o worker primeiro fecha o socket
+    (os outros continuam aceitando) e só encerra depois de
+    `ESPERA_RECICLAGEM`, com essas requisições já em andamento.
+    """
+
+    def __init__(self, config: uvicorn.Config, maximo: int):
+        super().__init__(config)
+        self.maximo = maximo
+        self._fim = None
+
+    async def on_tick(self, counter: int) -> bool:
+        if (
+            self._fim is None
+            and self.maximo
+            and self.server_state.total_requests >= self.maximo
+        ):
+            for servidor in self.servers:
+                servidor.close()
+            self._fim = time.monotonic() + ESPERA_RECICLAGEM
+        if self._fim is not None and time.monotonic() >= self._fim:
+            return True
+        return await super().on_tick(counter)
+
+
+def _worker(app, sock: socket.socket, settings: Settings) -> None:
+    from pesquisa import database  # noqa: PLC0415 (importado no preload)
+
+    # O pool herdado continua sendo do mestre; este processo abre o seu
+    database.engine.dispose(close=False)
+    database.async_engine.sync_engine.dispose(close=False)
+
+    for sinal in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(sinal, signal.SIG_DFL)
+
+    maximo = settings.SERVIDOR_MAX_REQUISICOES
+    if maximo:
+        maximo += random.randint(0, settings.SERVIDOR_MAX_REQUISICOES_VARIACAO)
+    config = uvicorn.Config(
+        app, timeout_graceful_shutdown=settings.SERVIDOR_TIMEOUT_ENCERRAMENTO
+    )
+    ServidorReciclavel(config, maximo).run(sockets=[sock])
+
+
+class Mestre:
+    def __init__(
+        self, app, sock: socket.socket, settings: Settings, workers: int
+    ):
+        self.app = app
+        self.sock = sock
+        self.settings = settings
+        self.workers = workers
+        self.filhos: dict[int, float] = {}  # pid -> início
+        self.encerrando = False
+
+    def _criar_worker(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                _worker(self.app, self.sock, self.settings)
+            except BaseException:
+                logger.exception('Falha no worker %d', os.getpid())
+                codigo = 1
+            finally:
+                # Sem voltar ao código do mestre (atexit, finally, laço)
+                os._exit(codigo)
+        self.filhos[pid] = time.monotonic()
+
+    def _sinalizar(self, sinal: int) -> None:
+        for pid in self.filhos:
+            try:
+                os.kill(pid, sinal)
+            except ProcessLookupError:
+                pass
+
+    def _encerrar(self, sinal, frame) -> None:
+        self.encerrando = True
+        self._sinalizar(signal.SIGTERM)
+
+    def _reciclar(self, sinal, frame) -> None:
+        logger.info('SIGHUP: reciclando %d workers', len(self.filhos))
+        self._sinalizar(signal.SIGTERM)
+
+    def executar(self) -> None:
+        signal.signal(signal.SIGTERM, self._encerrar)
+        signal.signal(signal.SIGINT, self._encerrar)
+        signal.signal(signal.SIGHUP, self._reciclar)
+        logger.info(
+            'Mestre %d: %d workers em %s',
+            os.getpid(),
+            self.workers,
+            self.sock.getsockname(),
+        )
+
+        while not self.encerrando:
+            while len(self.filhos) < self.workers and not self.encerrando:
+                self._criar_worker()
+            # Os tratadores de sinal rodam durante o wait (PEP 475)
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                continue
+            inicio = self.filhos.pop(pid, None)
+            if inicio is None or self.encerrando:
+                continue
+            codigo = os.waitstatus_to_exitcode(status)
+            # -SIGTERM: reciclado por SIGHUP
+            if codigo not in {0, -signal.SIGTERM}:
+                logger.warning('Worker %d saiu com %d', pid, codigo)
+                if time.monotonic() - inicio < VIDA_MINIMA:
+                    time.sleep(VIDA_MINIMA)
+
+        self._aguardar_filhos()
+
+    def _aguardar_filhos(self) -> None:
+        limite = time.monotonic() + self.settings.SERVIDOR_TIMEOUT_ENCERRAMENTO
+        while self.filhos and time.monotonic() < limite:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.filhos.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        if self.filhos:
+            logger.warning('Forçando o fim de %d workers', len(self.filhos))
+            self._sinalizar(signal.SIGKILL)
+            for pid in self.filhos:
+                os.waitpid(pid, 0)
+
+
+def servir(host: str, porta: int) -> None:
+    settings = Settings()
+    workers = numero_workers(settings.SERVIDOR_WORKERS)
+    # Antes do preload: `database.py` usa o número para dividir o
+    # orçamento de conexões
+    os.environ['SERVIDOR_WORKERS'] = str(workers)
+
+    # Só agora: a aplicação importa `database.py`, que cria as engines
+    from pesquisa import templating  # noqa: PLC0415
+    from pesquisa.app import app  # noqa: PLC0415
+
+    templating.compilar()
+
+    sock = socket.create_server((host, porta), backlog=2048)
+    sock.set_inheritable(True)
+    Mestre(app, sock, settings, workers).executar()
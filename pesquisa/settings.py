@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +9,107 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str
+    # Opcional: URL para a engine assíncrona quando o driver síncrono não
+    # serve para as duas (ex.: `sqlite+aiosqlite` em testes)
+    DATABASE_URL_ASYNC: str | None = None
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # segundos
+    # Orçamento global de conexões do Postgres para a aplicação: quando
+    # definido, substitui DB_POOL_SIZE/DB_MAX_OVERFLOW e é dividido entre
+    # os workers e as duas engines de cada um (0: desligado)
+    DB_CONEXOES_MAX: int = 0
+
+    QUESTIONARIO_CACHE_MAX_ITENS: int = 512
+    QUESTIONARIO_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # Páginas públicas dos questionários já renderizadas, por versão
+    PAGINA_CACHE_MAX_ITENS: int = 512
+    PAGINA_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Ingestão assíncrona (write-behind) de respostas
+    INGESTAO_ASSINCRONA: bool = False
+    INGESTAO_FILA_MAX: int = 10_000
+    INGESTAO_LOTE_MAX: int = 500
+    INGESTAO_INTERVALO_MS: int = 200
+    INGESTAO_RECIBOS_MAX: int = 100_000
+    INGESTAO_TIMEOUT_DRENAGEM: int = 30  # segundos
+    # Por quanto tempo um lote é regravado após falhas transitórias do
+    # banco (conexão perdida, pool esgotado) antes de virar erro
+    INGESTAO_RETENTATIVA_SEGUNDOS: float = 120
+
+    # 'transacao': contadores de resultados atualizados em cada submissão;
+    # 'lote': atualizados por `python -m pesquisa.resultados`
+    RESULTADOS_MODO: Literal['transacao', 'lote'] = 'transacao'
+
+    # Idempotency-Key e resposta única por e-mail: recibos recentes e
+    # filtro de Bloom das submissões vistas, por worker
+    DUPLICIDADE_RECENTES_MAX: int = 100_000
+    DUPLICIDADE_BLOOM_CAPACIDADE: int = 1_000_000
+    DUPLICIDADE_BLOOM_FALSOS_POSITIVOS: float = 0.001
+
+    # Token bucket das submissões por IP e por questionário;
+    # 'compartilhado' divide os baldes entre os workers do host
+    LIMITE_HABILITADO: bool = False
+    # Proxies (IPs ou redes) cujo X-Real-IP é o IP do cliente; de outras
+    # origens vale o endereço da conexão
+    LIMITE_PROXIES: list[str] = []
+    LIMITE_BACKEND: Literal['local', 'compartilhado'] = 'compartilhado'
+    LIMITE_ARQUIVO: str | None = None  # None: /dev/shm/pesquisa-limites
+    LIMITE_SLOTS: int = 65_536
+    LIMITE_IP_TAXA: float = 2  # fichas por segundo
+    LIMITE_IP_RAJADA: int = 20
+    LIMITE_QUESTIONARIO_TAXA: float = 200
+    LIMITE_QUESTIONARIO_RAJADA: int = 400
+
+    # Descarte de carga (503) por worker; 0 desliga o critério
+    CARGA_MAX_EM_ANDAMENTO: int = 200
+    CARGA_ESPERA_POOL_MS: float = 500
+    CARGA_RETRY_AFTER: int = 1  # segundos
+
+    USUARIO_CACHE_TTL: int = 60  # segundos
+    USUARIO_CACHE_MAX_ITENS: int = 10_000
+
+    RBAC_VERIFICACAO_INTERVALO: float = 5  # segundos
+
+    # Hash de senhas (Argon2) em um pool de processos dedicado
+    HASHING_PROCESSOS: int = 2
+    HASHING_FILA_MAX: int = 32
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # Validade do count() exato em cache da paginação
+    PAGINACAO_TOTAL_TTL: int = 30  # segundos
+
+    # Acima disso a busca é registrada no log como lenta
+    BUSCA_LATENCIA_ALVO_MS: float = 100
+
+    # Instrumentação de SQL por requisição
+    SQL_LENTA_MS: float = 100
+    SQL_LENTAS_POR_REQUISICAO: int = 3
+    # Mesma forma de comando repetida acima disso na requisição: N+1
+    SQL_REPETICOES_LIMIAR: int = 10
+
+    # Profiling sob demanda (/admin/profile e ?__profile=1)
+    PROFILING_HABILITADO: bool = False
+    PROFILING_DURACAO_MAX: float = 60  # segundos
+
+    # Partições mensais de respostas_questao criadas adiante do mês atual
+    PARTICOES_ANTECEDENCIA_MESES: int = 3
+
+    # Templates Jinja2: sem auto reload o mtime não é consultado a cada
+    # uso; None usa o diretório temporário do sistema para o bytecode
+    TEMPLATES_AUTO_RELOAD: bool = False
+    TEMPLATES_BYTECODE_DIR: str | None = None
+
+    # Servidor com vários processos (`pesquisa-admin servidor`)
+    SERVIDOR_WORKERS: int = 0  # 0: um por CPU disponível
+    SERVIDOR_MAX_REQUISICOES: int = 10_000  # 0: sem reciclagem
+    SERVIDOR_MAX_REQUISICOES_VARIACAO: int = 1_000
+    SERVIDOR_TIMEOUT_ENCERRAMENTO: int = 45  # segundos
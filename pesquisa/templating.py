@@ -0,0 +1,78 @@
+"""
+Ambiente Jinja2 único da aplicação.
+
+Os templates são compilados na subida (`compilar`, no lifespan) e o
+bytecode fica em disco (`FileSystemBytecodeCache`), de modo que um
+worker novo não recompila o que outro já compilou. Sem
+`TEMPLATES_AUTO_RELOAD` o Jinja não consulta o mtime dos arquivos a cada
+uso.
+
+Páginas que não dependem da requisição podem ser renderizadas uma vez e
+guardadas como `PaginaRenderizada`: o nonce do `Content-Security-Policy`
+entra no lugar de um marcador a cada resposta, sem renderizar de novo.
+"""
+
+import secrets
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    select_autoescape,
+)
+
+from pesquisa.estaticos import static_url
+from pesquisa.settings import Settings
+
+settings = Settings()
+
+DIRETORIO = Path(__file__).parent / 'templates'
+
+# Aleatório por processo: o conteúdo dos questionários não tem como
+# reproduzi-lo
+MARCADOR_NONCE = f'nonce-{secrets.token_hex(16)}'
+
+env = Environment(
+    loader=FileSystemLoader(DIRETORIO),
+    autoescape=select_autoescape(),
+    auto_reload=settings.TEMPLATES_AUTO_RELOAD,
+    bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATES_BYTECODE_DIR),
+)
+env.globals['static_url'] = static_url
+
+templates = Jinja2Templates(env=env)
+
+
+def compilar() -> int:
+    """Carrega (e compila) todos os templates; devolve quantos."""
+    nomes = env.list_templates(extensions=['html'])
+    for nome in nomes:
+        env.get_template(nome)
+    return len(nomes)
+
+
+@dataclass(frozen=True, slots=True)
+class PaginaRenderizada:
+    partes: tuple[str, ...]
+    tamanho: int
+
+    def com_nonce(self, nonce: str) -> str:
+        return nonce.join(self.partes)
+
+
+def renderizar(nome: str, **contexto) -> PaginaRenderizada:
+    """
+    Renderiza `nome` com `nonce` valendo o marcador, para preencher a
+    cada requisição com `PaginaRenderizada.com_nonce`.
+    """
+    html = env.get_template(nome).render(nonce=MARCADOR_NONCE, **contexto)
+    return PaginaRenderizada(
+        tuple(html.split(MARCADOR_NONCE)), len(html.encode())
+    )
+
+
+def novo_nonce() -> str:
+    return secrets.token_urlsafe(16)
@@ -0,0 +1,74 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+# Settings() exige essas variáveis já na importação dos módulos. Os testes
+# que usam a aplicação precisam das duas engines no mesmo banco: um arquivo
+_BANCO = Path(tempfile.mkdtemp()) / 'pesquisa.sqlite'
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{_BANCO}')
+os.environ.setdefault('DATABASE_URL_ASYNC', f'sqlite+aiosqlite:///{_BANCO}')
+os.environ.setdefault('SECRET_KEY', 'teste')
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+
+from pesquisa.models import (  # noqa: E402
+    Opcao,
+    Questao,
+    Questionario,
+    TipoQuestao,
+    table_registry,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        'sqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+
+    @event.listens_for(engine, 'connect')
+    def _chaves_estrangeiras(conexao, registro):
+        conexao.execute('PRAGMA foreign_keys=ON')
+
+    table_registry.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def questionario(session):
+    """Questionário com uma questão de seleção múltipla de 3 opções."""
+    questionario_id = session.scalar(
+        insert(Questionario)
+        .values(titulo='Teste', descricao='')
+        .returning(Questionario.id)
+    )
+    questao_id = session.scalar(
+        insert(Questao)
+        .values(
+            texto='Cores',
+            tipo=TipoQuestao.SELECT_MULTIPLE,
+            questionario_id=questionario_id,
+            limite_respostas=3,
+        )
+        .returning(Questao.id)
+    )
+    opcoes = session.scalars(
+        insert(Opcao).returning(Opcao.id, sort_by_parameter_order=True),
+        [{'texto': f'Opção {i}', 'questao_id': questao_id} for i in range(3)],
+    ).all()
+    session.commit()
+    return questionario_id, questao_id, opcoes
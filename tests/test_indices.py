@@ -0,0 +1,135 @@
+import pytest
+from sqlalchemy import insert, select
+
+from pesquisa.models import (
+    Opcao,
+    Questao,
+    RespostaQuestao,
+    RespostaQuestionario,
+    Role,
+    UserRoles,
+)
+
+RESPONDENTES = 200
+PENDENTES = 20
+
+
+def _plano(session, stmt) -> str:
+    sql = stmt.compile(
+        session.get_bind(), compile_kwargs={'literal_binds': True}
+    )
+    return '\n'.join(
+        linha[-1]
+        for linha in session.connection().exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {sql}'
+        )
+    )
+
+
+@pytest.fixture
+def respondido(session, questionario):
+    """O questionário da fixture com respostas, algumas pendentes."""
+    questionario_id, questao_id, opcoes = questionario
+    ids = session.scalars(
+        insert(RespostaQuestionario).returning(
+            RespostaQuestionario.id, sort_by_parameter_order=True
+        ),
+        [
+            {
+                'nome': f'Pessoa {i}',
+                'email': f'pessoa{i}@example.com',
+                'questionario_id': questionario_id,
+                'contabilizada': i >= PENDENTES,
+            }
+            for i in range(RESPONDENTES)
+        ],
+    ).all()
+    session.execute(
+        insert(RespostaQuestao),
+        [
+            {
+                'resposta_questionario_id': resposta_id,
+                'questao_id': questao_id,
+                'opcao_id': opcoes[i % len(opcoes)],
+            }
+            for i, resposta_id in enumerate(ids)
+        ],
+    )
+    session.commit()
+    return questionario
+
+
+def _exportacao(questionario_id, questao_id, opcoes):
+    return (
+        select(RespostaQuestionario.id, RespostaQuestao.questao_id)
+        .select_from(RespostaQuestionario)
+        .outerjoin(
+            RespostaQuestao,
+            RespostaQuestao.resposta_questionario_id
+            == RespostaQuestionario.id,
+        )
+        .where(RespostaQuestionario.questionario_id == questionario_id)
+        .order_by(RespostaQuestionario.id, RespostaQuestao.id)
+    )
+
+
+def _compilacao(questionario_id, questao_id, opcoes):
+    return (
+        select(Opcao.id, Opcao.questao_id)
+        .join(Questao, Opcao.questao_id == Questao.id)
+        .where(Questao.questionario_id == questionario_id)
+    )
+
+
+def _pendentes(questionario_id, questao_id, opcoes):
+    return (
+        select(RespostaQuestionario.id)
+        .where(
+            RespostaQuestionario.questionario_id == questionario_id,
+            ~RespostaQuestionario.contabilizada,
+        )
+        .order_by(RespostaQuestionario.id)
+        .limit(10)
+    )
+
+
+def _exclusao_opcao(questionario_id, questao_id, opcoes):
+    # A verificação da chave estrangeira ao excluir uma opção
+    return select(RespostaQuestao.id).where(
+        RespostaQuestao.opcao_id == opcoes[0]
+    )
+
+
+def _papeis(questionario_id, questao_id, opcoes):
+    return (
+        select(Role.name)
+        .select_from(UserRoles)
+        .join(Role, Role.id == UserRoles.role_id)
+        .where(UserRoles.user_id == 1)
+    )
+
+
+@pytest.mark.parametrize(
+    ('consulta', 'indices'),
+    [
+        (
+            _exportacao,
+            [
+                'ix_respostas_questionario_questionario_id_id',
+                'ix_respostas_questao_resposta_questionario_id',
+            ],
+        ),
+        (
+            _compilacao,
+            ['ix_questoes_questionario_id_id', 'ix_opcoes_questao_id_id'],
+        ),
+        (_pendentes, ['ix_respostas_questionario_pendentes']),
+        (_exclusao_opcao, ['ix_respostas_questao_opcao_id']),
+        (_papeis, ['ix_user_roles_user_id_role_id']),
+    ],
+)
+def test_consultas_usam_indices(session, respondido, consulta, indices):
+    plano = _plano(session, consulta(*respondido))
+    for indice in indices:
+        assert f'INDEX {indice} ' in plano, plano
+    assert 'SCAN respostas' not in plano, plano
@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+pytest.importorskip('aiosqlite')  # a engine assíncrona sobre o SQLite
+
+from pesquisa import app as modulo_app  # noqa: E402
+from pesquisa import database, duplicidade, router_questionario  # noqa: E402
+from pesquisa.ingestao import fila_ingestao  # noqa: E402
+from pesquisa.models import RespostaQuestionario, table_registry  # noqa: E402
+
+RESPOSTAS = '/pesquisa/questionarios/{}/respostas/'
+RECIBOS = '/pesquisa/respostas/recibos/{}'
+
+
+@pytest.fixture(scope='module', autouse=True)
+def banco():
+    table_registry.metadata.create_all(database.engine)
+
+
+@pytest.fixture(params=['transacao', 'fila'])
+def modo(request, monkeypatch):
+    assincrona = request.param == 'fila'
+    for modulo in (modulo_app, router_questionario):
+        monkeypatch.setattr(modulo.settings, 'INGESTAO_ASSINCRONA', assincrona)
+    return request.param
+
+
+@pytest.fixture
+def fila(monkeypatch):
+    """Modo assíncrono; a fila só grava ao encerrar a aplicação."""
+    for modulo in (modulo_app, router_questionario):
+        monkeypatch.setattr(modulo.settings, 'INGESTAO_ASSINCRONA', True)
+    monkeypatch.setattr(fila_ingestao, 'intervalo', 60)
+    return fila_ingestao
+
+
+def _criar(cliente, resposta_unica_por_email=False):
+    criado = cliente.post(
+        '/pesquisa/questionarios/',
+        json={
+            'titulo': 'Teste',
+            'perguntas': [
+                {
+                    'texto': 'Cores',
+                    'tipo': 'select_multiple',
+                    'opcoes': [{'texto': 'Azul'}, {'texto': 'Verde'}],
+                }
+            ],
+            'resposta_unica_por_email': resposta_unica_por_email,
+        },
+    ).json()
+    questionario = cliente.get(
+        f'/pesquisa/questionarios/{criado["id"]}'
+    ).json()
+    pergunta = questionario['perguntas'][0]
+    return questionario['id'], pergunta['id'], pergunta['opcoes'][0]['id']
+
+
+def _responder(cliente, questionario, email='pessoa@example.com', **headers):
+    questionario_id, questao_id, opcao_id = questionario
+    return cliente.post(
+        RESPOSTAS.format(questionario_id),
+        params={'nome': 'Pessoa', 'email': email},
+        json={questao_id: [str(opcao_id)]},
+        headers=headers,
+    )
+
+
+def _gravadas(questionario):
+    with Session(database.engine) as session:
+        return session.scalar(
+            select(func.count()).where(
+                RespostaQuestionario.questionario_id == questionario[0]
+            )
+        )
+
+
+def test_fila_responde_202_e_grava_ao_encerrar(fila):
+    with TestClient(modulo_app.app) as cliente:
+        questionario = _criar(cliente)
+        resposta = _responder(cliente, questionario)
+        assert resposta.status_code == 202  # noqa: PLR2004
+        recibo = resposta.json()['recibo']
+        assert resposta.json()['status'] == 'pendente'
+        assert cliente.get(RECIBOS.format(recibo)).json()['status'] == (
+            'pendente'
+        )
+        assert _gravadas(questionario) == 0
+
+    # O desligamento drena a fila
+    assert _gravadas(questionario) == 1
+    with TestClient(modulo_app.app) as cliente:
+        estado = cliente.get(RECIBOS.format(recibo)).json()
+    assert estado['status'] == 'gravado'
+    assert estado['resposta_questionario_id'] is not None
+
+
+def test_fila_cheia_responde_503(fila, monkeypatch):
+    monkeypatch.setattr(fila, 'tamanho_max', 1)
+    monkeypatch.setattr(fila, 'lote_max', 1)
+    liberar = threading.Event()
+    gravar = fila._gravar
+
+    async def bloqueado(lote):
+        while not liberar.is_set():
+            await asyncio.sleep(0.01)
+        await gravar(lote)
+
+    monkeypatch.setattr(fila, '_gravar', bloqueado)
+
+    with TestClient(modulo_app.app) as cliente:
+        questionario = _criar(cliente)
+        # A primeira fica presa no escritor, a segunda ocupa a fila
+        assert _responder(cliente, questionario).status_code == 202  # noqa: PLR2004
+        while fila.profundidade:
+            time.sleep(0.01)
+        assert _responder(cliente, questionario).status_code == 202  # noqa: PLR2004
+        cheia = _responder(cliente, questionario)
+        assert cheia.status_code == 503  # noqa: PLR2004
+        assert cheia.headers['Retry-After'] == '1'
+        liberar.set()
+
+    assert _gravadas(questionario) == 2  # noqa: PLR2004
+
+
+def test_recibo_desconhecido(fila):
+    with TestClient(modulo_app.app) as cliente:
+        resposta = cliente.get(RECIBOS.format(uuid.uuid4().hex))
+    assert resposta.status_code == 404  # noqa: PLR2004
+
+
+def test_idempotency_key_devolve_o_primeiro_recibo(modo):
+    chave = uuid.uuid4().hex
+    with TestClient(modulo_app.app) as cliente:
+        questionario = _criar(cliente)
+        primeira = _responder(
+            cliente, questionario, **{'Idempotency-Key': chave}
+        )
+        reenvio = _responder(
+            cliente, questionario, **{'Idempotency-Key': chave}
+        )
+    assert 'Idempotent-Replayed' not in primeira.headers
+    assert reenvio.headers['Idempotent-Replayed'] == 'true'
+    assert reenvio.json()['recibo'] == primeira.json()['recibo']
+    assert _gravadas(questionario) == 1
+
+
+def test_idempotency_key_sem_os_filtros_locais(monkeypatch):
+    # Outro worker, ou a chave já saiu do LRU: quem decide é o banco
+    chave = uuid.uuid4().hex
+    with TestClient(modulo_app.app) as cliente:
+        questionario = _criar(cliente)
+        primeira = _responder(
+            cliente, questionario, **{'Idempotency-Key': chave}
+        )
+        monkeypatch.setattr(
+            duplicidade, 'idempotencia', duplicidade._registro()
+        )
+        reenvio = _responder(
+            cliente, questionario, **{'Idempotency-Key': chave}
+        )
+    assert reenvio.headers['Idempotent-Replayed'] == 'true'
+    assert reenvio.json()['recibo'] == primeira.json()['recibo']
+    assert _gravadas(questionario) == 1
+
+
+def test_resposta_unica_por_email(modo):
+    with TestClient(modulo_app.app) as cliente:
+        questionario = _criar(cliente, resposta_unica_por_email=True)
+        assert _responder(cliente, questionario).is_success
+        repetida = _responder(cliente, questionario, ' Pessoa@Example.com')
+        outra = _responder(cliente, questionario, 'outra@example.com')
+    assert repetida.status_code == 409  # noqa: PLR2004
+    assert outra.is_success
+    assert _gravadas(questionario) == 2  # noqa: PLR2004
+
+
+def test_resposta_unica_por_email_sem_os_filtros_locais(monkeypatch):
+    with TestClient(modulo_app.app) as cliente:
+        questionario = _criar(cliente, resposta_unica_por_email=True)
+        assert _responder(cliente, questionario).is_success
+        monkeypatch.setattr(
+            duplicidade, 'respondentes', duplicidade._registro()
+        )
+        repetida = _responder(cliente, questionario)
+    assert repetida.status_code == 409  # noqa: PLR2004
+    assert _gravadas(questionario) == 1
@@ -0,0 +1,60 @@
+import ipaddress
+
+import pytest
+
+from pesquisa.limites import BackendCompartilhado, BackendLocal, ip_cliente
+
+IP = ('ip:1.2.3.4', 1.0, 2)
+QUESTIONARIO = ('q:1', 1.0, 1)
+
+
+@pytest.fixture(params=['local', 'compartilhado'])
+def backend(request, tmp_path):
+    if request.param == 'local':
+        return BackendLocal(slots=64)
+    return BackendCompartilhado(tmp_path / 'limites', slots=64)
+
+
+def test_recusa_nao_gasta_os_outros_baldes(backend):
+    assert backend.consumir([IP, QUESTIONARIO]) is None
+    # O questionário ficou sem fichas: a recusa aponta para ele...
+    indice, espera = backend.consumir([IP, QUESTIONARIO])
+    assert indice == 1
+    assert espera > 0
+    # ...e a ficha que sobrou no balde do IP continua lá
+    assert backend.consumir([IP]) is None
+    assert backend.consumir([IP])[0] == 0
+
+
+def test_local_descarta_o_balde_usado_ha_mais_tempo():
+    backend = BackendLocal(slots=2)
+    assert backend.consumir([QUESTIONARIO]) is None
+    assert backend.consumir([QUESTIONARIO]) is not None
+    for ip in range(3):
+        assert backend.consumir([(f'ip:{ip}', 1.0, 1)]) is None
+    # O balde do questionário saiu do LRU e volta cheio
+    assert len(backend._baldes) == 2  # noqa: PLR2004
+    assert backend.consumir([QUESTIONARIO]) is None
+
+
+def _scope(cliente, real_ip=None):
+    headers = [(b'x-real-ip', real_ip.encode())] if real_ip else []
+    return {'client': (cliente, 50000), 'headers': headers}
+
+
+PROXIES = (ipaddress.ip_network('172.16.238.8'),)
+
+
+@pytest.mark.parametrize(
+    ('scope', 'proxies', 'esperado'),
+    [
+        # Sem proxy configurado o cabeçalho é ignorado
+        (_scope('10.0.0.1', '9.9.9.9'), (), '10.0.0.1'),
+        # Direto na porta do app, de fora do proxy
+        (_scope('10.0.0.1', '9.9.9.9'), PROXIES, '10.0.0.1'),
+        (_scope('172.16.238.8', '9.9.9.9'), PROXIES, '9.9.9.9'),
+        (_scope('172.16.238.8'), PROXIES, '172.16.238.8'),
+    ],
+)
+def test_ip_cliente_so_confia_no_proxy(scope, proxies, esperado):
+    assert ip_cliente(scope, proxies) == esperado
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import pytest
+
+from pesquisa import paginacao
+from pesquisa.models import Questionario, RespostaQuestionario
+
+
+@pytest.mark.parametrize(
+    'chave', [[{'a': 1}], [[1, 2]], ['abc'], [True], [None], [1.5], [1, 2]]
+)
+def test_cursor_invalido(session, chave):
+    cursor = paginacao.codificar_cursor(chave)
+    with pytest.raises(paginacao.CursorInvalido):
+        Questionario.paginar(session, cursor=cursor)
+
+
+def test_cursor_com_data():
+    colunas = (RespostaQuestionario.created_at, RespostaQuestionario.id)
+    momento = datetime(2024, 5, 1, 12, 30)
+    cursor = paginacao.codificar_cursor([momento, 7])
+
+    assert paginacao.decodificar_cursor(cursor, colunas) == (momento, 7)
+    with pytest.raises(paginacao.CursorInvalido):
+        paginacao.decodificar_cursor(
+            paginacao.codificar_cursor(['ontem', 7]), colunas
+        )
@@ -0,0 +1,100 @@
+from sqlalchemy import insert, select
+
+from pesquisa import resultados
+from pesquisa.models import (
+    RespostaQuestao,
+    RespostaQuestionario,
+    ResultadoOpcao,
+    ResultadoQuestionario,
+)
+
+
+def _submeter(session, questionario, opcao, resposta_id=None, **extra):
+    questionario_id, questao_id, _ = questionario
+    valores = {
+        'nome': 'Pessoa',
+        'email': 'pessoa@example.com',
+        'questionario_id': questionario_id,
+        **extra,
+    }
+    if resposta_id is not None:
+        valores['id'] = resposta_id
+    resposta_id = session.scalar(
+        insert(RespostaQuestionario)
+        .values(**valores)
+        .returning(RespostaQuestionario.id)
+    )
+    session.execute(
+        insert(RespostaQuestao).values(
+            resposta_questionario_id=resposta_id,
+            questao_id=questao_id,
+            opcao_id=opcao,
+        )
+    )
+    session.commit()
+    return resposta_id
+
+
+def _totais(session, questionario):
+    questionario_id, _, opcoes = questionario
+    respondentes = session.scalar(
+        select(ResultadoQuestionario.total_respondentes).where(
+            ResultadoQuestionario.questionario_id == questionario_id
+        )
+    )
+    por_opcao = dict(
+        session.execute(
+            select(ResultadoOpcao.opcao_id, ResultadoOpcao.total)
+        ).all()
+    )
+    return respondentes, [por_opcao.get(opcao, 0) for opcao in opcoes]
+
+
+def test_reprocessar_contabiliza_ids_com_commit_fora_de_ordem(
+    session, questionario
+):
+    questionario_id, _, opcoes = questionario
+    # A transação com id 10 faz commit antes da que pegou o id 5
+    _submeter(session, questionario, opcoes[0], resposta_id=10)
+    assert resultados.reprocessar(session, questionario_id) == 1
+    session.commit()
+
+    _submeter(session, questionario, opcoes[1], resposta_id=5)
+    assert resultados.reprocessar(session, questionario_id) == 1
+    session.commit()
+
+    assert _totais(session, questionario) == (2, [1, 1, 0])
+
+
+def test_reprocessar_nao_conta_duas_vezes(session, questionario):
+    questionario_id, _, opcoes = questionario
+    for opcao in opcoes:
+        _submeter(session, questionario, opcao)
+
+    assert resultados.reprocessar(session, questionario_id, lote=2) == len(
+        opcoes
+    )
+    session.commit()
+    assert resultados.reprocessar(session, questionario_id) == 0
+    session.commit()
+
+    assert _totais(session, questionario) == (3, [1, 1, 1])
+
+
+def test_reprocessar_ignora_as_contabilizadas_na_transacao(
+    session, questionario
+):
+    questionario_id, questao_id, opcoes = questionario
+    resposta_id = _submeter(
+        session, questionario, opcoes[2], contabilizada=True
+    )
+    resultados.registrar(
+        session,
+        [(questionario_id, resposta_id)],
+        [{'questao_id': questao_id, 'opcao_id': opcoes[2]}],
+    )
+    session.commit()
+
+    assert resultados.reprocessar(session, questionario_id) == 0
+    session.commit()
+    assert _totais(session, questionario) == (1, [0, 0, 1])